@@ -2,6 +2,7 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 import mysql.connector
 import os 
+import db
 from routes.user_auth import user_bp
 from routes.users import users_bp
 from routes.profile import profile_bp
@@ -10,13 +11,30 @@ from routes.movies import movies_bp
 from routes.tvshows import tvshows_bp
 from routes.subscriptions import subscriptions_bp
 from routes.ratings import ratings_bp
-from routes.viewing_history import viewing_history_bp
+from routes.viewing_history import viewing_history_bp, viewing_writer
 from routes.genres import genres_bp
-from routes.home_page import home_page_bp
+from routes.home_page import home_page_bp, home_feed
 from routes.payments import payments_bp
+from routes.media import media_bp
+from routes.posters import posters_bp
+from routes.search import search_bp
+from routes.recommendations import recommendations_bp
+from routes.browse import browse_bp
+from utils.cache import catalog_cache
+from utils.pagination import InvalidCursor
+from utils.auth_middleware import token_cache
+from utils import hashing
+from utils.ingest import IngestQueueFull
+from utils.progress import watch_progress
+from utils.entitlements import entitlements
+from utils.search import search_snapshot
+from utils.recommendations import neighbour_cache
+from utils.similarity import similar_cache
+from utils.facets import facet_snapshot
 
 app = Flask(__name__)
 CORS(app)  
+db.init_app(app)
 
 # Register all blueprints with URL prefixes
 app.register_blueprint(user_bp, url_prefix="/api/user")
@@ -31,11 +49,47 @@ app.register_blueprint(viewing_history_bp, url_prefix="/api/viewing_history")
 app.register_blueprint(genres_bp, url_prefix="/api/genres")
 app.register_blueprint(home_page_bp, url_prefix="/api/home")
 app.register_blueprint(payments_bp, url_prefix="/api/payments")
+app.register_blueprint(media_bp, url_prefix="/api/media")
+app.register_blueprint(posters_bp, url_prefix="/api/posters")
+app.register_blueprint(search_bp, url_prefix="/api/search")
+app.register_blueprint(recommendations_bp, url_prefix="/api/recommendations")
+app.register_blueprint(browse_bp, url_prefix="/api/browse")
+
+@app.errorhandler(InvalidCursor)
+def handle_invalid_cursor(err):
+    return jsonify({"success": False, "message": str(err)}), 400
+
+@app.errorhandler(hashing.HashingBusy)
+def handle_hashing_busy(err):
+    # Shed auth load quickly instead of queueing behind bcrypt
+    return jsonify({"success": False, "message": str(err)}), 503, {"Retry-After": str(err.retry_after)}
+
+@app.errorhandler(IngestQueueFull)
+def handle_ingest_queue_full(err):
+    return jsonify({"success": False, "message": str(err)}), 503, {"Retry-After": str(err.retry_after)}
 
 @app.route('/', methods=['GET'])
 def health_check():
     return jsonify({"success": True, "message": "Streamix API is running"})
 
+@app.route('/api/stats', methods=['GET'])
+def runtime_stats():
+    """Per-worker cache counters, used to size the in-process caches"""
+    return jsonify({
+        "success": True,
+        "catalog_cache": catalog_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "hashing": hashing.stats(),
+        "viewing_ingest": viewing_writer.stats(),
+        "watch_progress": watch_progress.stats(),
+        "entitlement_cache": entitlements.stats(),
+        "home_feed": home_feed.stats(),
+        "search_index": search_snapshot.stats(),
+        "recommendation_cache": neighbour_cache.stats(),
+        "similar_cache": similar_cache.stats(),
+        "facet_index": facet_snapshot.stats()
+    })
+
 if __name__ == '__main__':
     
     app.run(port=3001, debug=True)
\ No newline at end of file
@@ -0,0 +1,398 @@
+"""ASGI entry point: the I/O-bound reads as coroutines over an asyncio MySQL pool.
+
+    uvicorn asgi:application --port 3001 --workers 4
+
+Routes in ROUTES are answered by async handlers that await MySQL through
+db_async, so a request waiting on the database holds no OS thread and
+independent queries of one request run concurrently. Every other request
+(writes, auth, streaming, paginated and per-profile variants) goes to the
+Flask app from app.py on a thread pool, so the URL surface, status codes,
+ETags and JSON bodies are the same as the threaded server's. The shared
+state the handlers check in memory (revoked tokens, resource versions) is
+synced by a background task on that thread pool, never on the event loop.
+
+If the async pool can't be created (aiomysql missing, MySQL down) every
+request is served by the Flask app; a request whose async handler raises
+is served by it too.
+"""
+import asyncio
+import io
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from urllib.parse import parse_qs
+import jwt
+
+import db_async
+from app import app as flask_app
+from routes.movies import transform_movie
+from routes.tvshows import transform_tvshow
+from routes.watchlist import WATCHLIST_QUERY, transform_watchlist_item
+from utils.auth_middleware import REVOCATION_SYNC_INTERVAL, sync_revocations, verify_token
+from utils.cache import catalog_cache
+from utils.catalog import CATALOG_TABLES, genre_map_query, group_genres
+from utils.content import cached_records, overlay_records, records_query, store_records
+from utils.http_cache import CACHE_CONTROL, VERSION_SYNC_INTERVAL, body_etag, etag_for, sync_versions
+from utils.ratings import aggregates_query, cached_aggregates, store_aggregates, summarize
+
+# Threads for requests handed to the Flask app
+WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix="wsgi")
+_async_enabled = False
+_sync_task = None
+_first_sync = None
+
+
+class Request:
+    """The parts of an ASGI http scope the handlers need"""
+
+    def __init__(self, scope):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query_string = scope.get("query_string", b"").decode("latin-1")
+        self.args = {k: v[0] for k, v in parse_qs(self.query_string, keep_blank_values=True).items()}
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+
+    @property
+    def full_path(self):
+        # Same as Flask's request.full_path, so version tags match the threaded server's
+        return f"{self.path}?{self.query_string}"
+
+    def bearer_token(self):
+        auth_header = self.headers.get("authorization", "")
+        if auth_header.startswith("Bearer "):
+            return auth_header.split(" ")[1]
+        return None
+
+
+def conditional(resource):
+    """Async counterpart of utils.http_cache.conditional for handlers returning (status, body)"""
+    policy = CACHE_CONTROL.get(resource)
+
+    def decorator(f):
+        @wraps(f)
+        async def decorated(request, **params):
+            # Versions are kept current by _sync_loop, never synced on the event loop
+            etag = etag_for(resource, request.full_path)
+            tags = {t.strip().strip('"') for t in request.headers.get("if-none-match", "").split(",")
+                    if t.strip() and not t.strip().startswith("W/")}
+            if etag is not None and (etag in tags or "*" in tags):
+                return 304, None, [("ETag", f'"{etag}"'), ("Cache-Control", policy)]
+
+            response = await f(request, **params)
+            if response is None or response[0] != 200:
+                return response
+            status, body, headers = response
+            if etag is None:
+                # Encoded here so the tag is computed from the bytes that are sent
+                body = _encode(body)
+                etag = body_etag(body)
+                if etag in tags or "*" in tags:
+                    return 304, None, [("ETag", f'"{etag}"'), ("Cache-Control", policy)]
+            return status, body, [*headers, ("ETag", f'"{etag}"'), ("Cache-Control", policy)]
+
+        return decorated
+
+    return decorator
+
+
+def token_required(f):
+    @wraps(f)
+    async def decorated(request, **params):
+        token = request.bearer_token()
+        if not token:
+            return 401, {"success": False, "message": "Missing token"}, []
+        try:
+            # Revocations are kept current by _sync_loop, never synced on the event loop
+            current_user = verify_token(token, sync=False)
+        except jwt.ExpiredSignatureError:
+            return 401, {"success": False, "message": "Token expired"}, []
+        except jwt.InvalidTokenError:
+            return 401, {"success": False, "message": "Invalid token"}, []
+        return await f(request, current_user, **params)
+
+    return decorated
+
+
+# --- async data access, sharing the query builders of the sync helpers ---
+
+async def get_aggregates(content_type, content_ids):
+    result, missing = cached_aggregates(content_type, content_ids)
+    if missing:
+        rows = await db_async.fetch_all(*aggregates_query(content_type, missing))
+        result.update(store_aggregates(content_type, missing, rows))
+    return result
+
+
+async def resolve_many(keys):
+    """utils.content.resolve_many with the record and rating queries run concurrently"""
+    found, missing = cached_records(keys)
+    types = list(missing)
+    for content_type, rows in zip(types, await asyncio.gather(
+        *(db_async.fetch_all(*records_query(t, missing[t])) for t in types)
+    )):
+        store_records(content_type, rows, found)
+
+    by_type = {}
+    for content_type, content_id in found:
+        by_type.setdefault(content_type, []).append(content_id)
+    types = list(by_type)
+    aggregates = dict(zip(types, await asyncio.gather(*(get_aggregates(t, by_type[t]) for t in types))))
+    return overlay_records(found, aggregates)
+
+
+async def load_title(table, content_type, content_id, transform):
+    """One catalog title with genres, as the sync routes' _transform_with_genres builds it.
+
+    The title, its genres and its rating are three concurrent queries.
+    """
+    id_column = CATALOG_TABLES[table][0]
+    rows, genre_rows, _ = await asyncio.gather(
+        db_async.fetch_all(f"SELECT * FROM {table} WHERE {id_column} = %s", (content_id,)),
+        db_async.fetch_all(*genre_map_query(table, [content_id])),
+        get_aggregates(content_type, [content_id]),  # warms the store the transform reads
+    )
+    if not rows:
+        return None
+    item = transform(rows[0])
+    item["genres"] = group_genres(genre_rows).get(content_id, [])
+    return item
+
+
+# --- handlers: (status, body, headers), or None to pass the request to Flask ---
+
+@conditional("movies")
+async def get_movie(request, movie_id):
+    if "profile_id" in request.args:
+        return None  # profile restrictions are looked up on the threaded path
+    movie_id = int(movie_id)
+    movie = catalog_cache.get(f"movie:{movie_id}")
+    if movie is None:
+        movie = await load_title("movie", "Movie", movie_id, transform_movie)
+        if movie is not None:
+            catalog_cache.set(f"movie:{movie_id}", movie)
+    if movie is None:
+        return 404, {"success": False, "message": "Movie not found"}, []
+    return 200, {"success": True, "movie": movie}, []
+
+
+@conditional("tvshows")
+async def get_tvshow(request, show_id):
+    if "profile_id" in request.args:
+        return None
+    show_id = int(show_id)
+    show = catalog_cache.get(f"tvshow:{show_id}")
+    if show is None:
+        show = await load_title("tv_show", "TV_Show", show_id, transform_tvshow)
+        if show is not None:
+            catalog_cache.set(f"tvshow:{show_id}", show)
+    if show is None:
+        return 404, {"success": False, "message": "TV Show not found"}, []
+    return 200, {"success": True, "tv_show": show}, []
+
+
+@token_required
+async def get_watchlist(request, current_user, profile_id):
+    if "limit" in request.args or "cursor" in request.args:
+        return None  # keyset pages stay on the threaded path
+    results = await db_async.fetch_all(WATCHLIST_QUERY + " ORDER BY w.Date_Added DESC", (int(profile_id),))
+    contents = await resolve_many((r["Content_Type"], r["Content_Id"]) for r in results)
+    transformed = [
+        transform_watchlist_item(r, contents.get((r["Content_Type"], r["Content_Id"])))
+        for r in results
+    ]
+    return 200, {"success": True, "watchlist": transformed}, []
+
+
+async def get_rating_summary(request, content_type, content_id):
+    if content_type not in ('Movie', 'TV_Show'):
+        return 400, {"success": False, "message": "Invalid content_type"}, []
+    content_id = int(content_id)
+    aggregate = (await get_aggregates(content_type, [content_id]))[content_id]
+    return 200, {"success": True, **summarize(aggregate)}, []
+
+
+ROUTES = [
+    ("GET", re.compile(r"/api/movies/(?P<movie_id>\d+)"), get_movie),
+    ("GET", re.compile(r"/api/tvshows/(?P<show_id>\d+)"), get_tvshow),
+    ("GET", re.compile(r"/api/watchlist/all/(?P<profile_id>\d+)"), get_watchlist),
+    ("GET", re.compile(r"/api/ratings/summary/(?P<content_type>[^/]+)/(?P<content_id>\d+)"), get_rating_summary),
+]
+
+
+def _match(request):
+    for method, pattern, handler in ROUTES:
+        if request.method == method:
+            match = pattern.fullmatch(request.path)
+            if match:
+                return handler, match.groupdict()
+    return None, None
+
+
+def _encode(body):
+    # Byte for byte what jsonify produces, so ETags match the threaded server's
+    return flask_app.json.response(body).get_data()
+
+
+async def _send_response(send, request, status, body, headers):
+    """Send a JSON response; body is a JSON value, bytes already encoded by _encode, or None"""
+    payload = b"" if body is None else body if isinstance(body, bytes) else _encode(body)
+    raw = [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+    raw += [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers if value]
+    # What flask-cors sends for the app's CORS(app) defaults
+    origin = request.headers.get("origin")
+    if origin:
+        raw += [(b"access-control-allow-origin", origin.encode("latin-1")), (b"vary", b"Origin")]
+    else:
+        raw.append((b"access-control-allow-origin", b"*"))
+    await send({"type": "http.response.start", "status": status, "headers": raw})
+    await send({"type": "http.response.body", "body": payload})
+
+
+# --- everything else: the Flask app on a thread pool ---
+
+def _environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "REMOTE_ADDR": client[0],
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        # The body is read whole before the call, so it ends where the stream ends
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1")
+        value = value.decode("latin-1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def call_wsgi(scope, receive, send):
+    """Run one request through the Flask app on the thread pool, streaming its body back"""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+        return lambda data: None  # the legacy write() callable is unused by Flask
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(_executor, flask_app, _environ(scope, body), start_response)
+    try:
+        chunks = iter(result)
+        await send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+        # Chunks are pulled on the pool too, since file and video bodies read from disk
+        while True:
+            chunk = await loop.run_in_executor(_executor, next, chunks, None)
+            if chunk is None:
+                break
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        if hasattr(result, "close"):
+            await loop.run_in_executor(_executor, result.close)
+
+
+async def _lifespan(receive, send):
+    global _async_enabled
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await db_async.create_pool()
+                _async_enabled = True
+            except Exception as e:
+                print(f"❌ Async MySQL pool unavailable, serving every route through Flask: {e}")
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if _sync_task is not None:
+                _sync_task.cancel()
+            await db_async.close_pool()
+            _executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def enable_async(enabled=True):
+    """Turn the async handlers on without a lifespan startup (benchmarks, servers without lifespan)"""
+    global _async_enabled
+    _async_enabled = enabled
+
+
+def _sync_all():
+    # Each sync is rate-limited to its own interval
+    sync_versions()
+    sync_revocations()
+
+
+async def _sync_loop():
+    """Pull the shared state the handlers read in memory, on the thread pool"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(min(VERSION_SYNC_INTERVAL, REVOCATION_SYNC_INTERVAL))
+        await loop.run_in_executor(_executor, _sync_all)
+
+
+async def _ensure_synced():
+    global _sync_task, _first_sync
+    loop = asyncio.get_running_loop()
+    if _sync_task is None or _sync_task.done() or _sync_task.get_loop() is not loop:
+        _sync_task = loop.create_task(_sync_loop())
+        # Requests wait for the first sync, so a new worker starts from the shared state
+        _first_sync = loop.run_in_executor(_executor, _sync_all)
+    await _first_sync
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    if _async_enabled:
+        await _ensure_synced()
+        request = Request(scope)
+        handler, params = _match(request)
+        if handler is not None:
+            try:
+                response = await handler(request, **params)
+            except Exception as e:
+                # The handlers only read, so Flask can answer instead, with the
+                # threaded server's response (its data or its error)
+                print(f"❌ Async handler for {request.path} failed, serving it through Flask: {e}")
+                response = None
+            if response is not None:
+                await _send_response(send, request, *response)
+                return
+    await call_wsgi(scope, receive, send)
@@ -0,0 +1,342 @@
+import asyncio
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+# Ratings are cached for 5 minutes by default, which would leave the
+# watchlist endpoint one query per request; the bench measures the DB path
+os.environ.setdefault("RATING_CACHE_TTL", "0")
+
+import jwt
+from mysql.connector.errors import PoolError
+import db
+import db_async
+import asgi
+from app import app
+from utils.auth_middleware import SECRET_KEY
+
+# Usage: python bench_async.py [concurrency,...] [query_ms] [--mysql]
+# Compares the threaded Flask server with the ASGI entry point (asgi.py) on
+# the I/O-bound reads it serves natively: GET /api/watchlist/all/<profile>
+# and GET /api/ratings/summary/<type>/<id>, half each. Both servers run
+# in-process; every simulated connection is a thread on the threaded side
+# (as in app.run(threaded=True)) and a task on the async side, and sends
+# its requests back to back.
+#
+# Without --mysql the database is a stand-in: an in-memory SQLite catalog
+# where every statement holds its connection for query_ms more, as a
+# network round trip to MySQL would. The threaded side gets a pool that
+# fails like MySQLConnectionPool once its 30 connections are out (requests
+# then retry for up to DB_POOL_WAIT_TIMEOUT), the async side one that
+# queues like aiomysql's. With --mysql both use the database
+# from .env (populated, with watchlists) and aiomysql.
+
+MYSQL = "--mysql" in sys.argv
+ARGS = [a for a in sys.argv[1:] if a != "--mysql"]
+CONCURRENCY = [int(c) for c in ARGS[0].split(",")] if ARGS else [10, 50, 200, 1000]
+QUERY_MS = float(ARGS[1]) if len(ARGS) > 1 else 5.0
+REQUESTS_PER_CONNECTION = 20
+SYNC_POOL_SIZE = 30
+TITLES = 5_000
+PROFILES = 1_000
+WATCHLIST_SIZE = 20
+
+
+def stand_in_catalog():
+    conn = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE movie(Movie_Id INTEGER PRIMARY KEY, Title TEXT, Release_Date DATE, Duration INT,
+                           Description TEXT, Age_Rating TEXT, average_rating REAL, Language TEXT);
+        CREATE TABLE tv_show(Show_Id INTEGER PRIMARY KEY, Title TEXT, Release_Year INT, Description TEXT,
+                             Age_Rating TEXT, average_rating REAL, Status TEXT, Language TEXT);
+        CREATE TABLE watchlist(Watchlist_Id INTEGER PRIMARY KEY, Profile_Id INT, Content_Type TEXT,
+                               Content_Id INT, Date_Added DATE);
+        CREATE INDEX watchlist_profile ON watchlist(Profile_Id);
+        CREATE TABLE rating_aggregate(Content_Type TEXT, Content_Id INT, Rating_Sum INT, Rating_Count INT,
+                                      Count_1 INT, Count_2 INT, Count_3 INT, Count_4 INT, Count_5 INT,
+                                      PRIMARY KEY(Content_Type, Content_Id));
+    """)
+    rng = random.Random(42)
+    conn.executemany("INSERT INTO movie VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+        (i, f"Movie {i}", datetime.date(1980 + i % 45, 1 + i % 12, 1), 90 + i % 60,
+         f"Description of movie {i}", "PG-13", 3.5, "English")
+        for i in range(1, TITLES + 1)
+    ])
+    conn.executemany("INSERT INTO tv_show VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+        (i, f"Show {i}", 1990 + i % 35, f"Description of show {i}", "TV-14", 3.5, "Ongoing", "English")
+        for i in range(1, TITLES + 1)
+    ])
+    conn.executemany("INSERT INTO watchlist(Profile_Id, Content_Type, Content_Id, Date_Added) VALUES (?, ?, ?, ?)", [
+        (p, rng.choice(("Movie", "TV_Show")), rng.randint(1, TITLES), datetime.date(2024, 1, 1 + n))
+        for p in range(1, PROFILES + 1) for n in range(WATCHLIST_SIZE)
+    ])
+    for content_type in ("Movie", "TV_Show"):
+        rows = []
+        for i in range(1, TITLES + 1):
+            counts = [rng.randint(0, 20) for _ in range(5)]
+            rows.append((content_type, i, sum((s + 1) * c for s, c in enumerate(counts)), sum(counts), *counts))
+        conn.executemany("INSERT INTO rating_aggregate VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+class StandInDatabase:
+    """The SQLite catalog behind MySQL-like connections that each take QUERY_MS per statement"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def run(self, query, params):
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(query.replace("%s", "?"), tuple(params))]
+
+
+class StandInCursor:
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.rows = self.database.run(query, params)
+        time.sleep(QUERY_MS / 1000)
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def close(self):
+        pass
+
+
+class StandInConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, **kwargs):
+        return StandInCursor(self.pool.database)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.pool.release()
+
+
+class StandInPool:
+    """Behaves like MySQLConnectionPool: a fixed size, and an error instead of a wait when exhausted"""
+
+    def __init__(self, database, size):
+        self.database = database
+        self.size = size
+        self.in_use = 0
+        self.lock = threading.Lock()
+
+    def get_connection(self):
+        with self.lock:
+            if self.in_use >= self.size:
+                raise PoolError("Failed getting connection; pool exhausted")
+            self.in_use += 1
+        return StandInConnection(self)
+
+    def release(self):
+        with self.lock:
+            self.in_use -= 1
+
+
+class AsyncStandInCursor:
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def execute(self, query, params=()):
+        self.rows = self.database.run(query, params)
+        await asyncio.sleep(QUERY_MS / 1000)
+
+    async def fetchall(self):
+        return self.rows
+
+
+class AsyncStandInConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self, cursor_class=None):
+        return AsyncStandInCursor(self.database)
+
+
+class AsyncStandInPool:
+    """Behaves like aiomysql's pool: at most `size` connections, later acquirers wait"""
+
+    def __init__(self, database, size):
+        self.database = database
+        self.slots = asyncio.Semaphore(size)
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                await pool.slots.acquire()
+                return AsyncStandInConnection(pool.database)
+
+            async def __aexit__(self, *exc):
+                pool.slots.release()
+
+        return Acquire()
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+def workload():
+    """(path, headers) pairs in the order the connections send them"""
+    if MYSQL:
+        profiles = [r["Profile_Id"] for r in db.fetch_all("SELECT DISTINCT Profile_Id FROM watchlist LIMIT 1000")]
+        titles = [(r["Content_Type"], r["Content_Id"])
+                  for r in db.fetch_all("SELECT Content_Type, Content_Id FROM rating_aggregate LIMIT 5000")]
+    else:
+        profiles = range(1, PROFILES + 1)
+        titles = [(t, i) for t in ("Movie", "TV_Show") for i in range(1, TITLES + 1)]
+    if not profiles or not titles:
+        sys.exit("❌ The database needs watchlists and rating_aggregate rows (see README setup)")
+
+    token = jwt.encode(
+        {"user_id": 1, "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)},
+        SECRET_KEY, algorithm="HS256",
+    )
+    auth = {"Authorization": f"Bearer {token}"}
+    rng = random.Random(7)
+    requests = []
+    for n in range(max(CONCURRENCY) * REQUESTS_PER_CONNECTION):
+        if n % 2:
+            content_type, content_id = rng.choice(titles)
+            requests.append((f"/api/ratings/summary/{content_type}/{content_id}", {}))
+        else:
+            requests.append((f"/api/watchlist/all/{rng.choice(profiles)}", auth))
+    return requests
+
+
+def summarize_run(latencies, errors, elapsed):
+    """Throughput of answered requests; percentiles leave out the 5xx, which fail fast"""
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000 if latencies else float("nan"),
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float("nan"),
+        "errors": errors,
+    }
+
+
+def run_threaded(requests, concurrency):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency + 1)
+
+    def connection(n):
+        client = app.test_client()
+        start.wait()
+        for path, headers in requests[n::concurrency][:REQUESTS_PER_CONNECTION]:
+            started = time.perf_counter()
+            status = client.get(path, headers=headers).status_code
+            took = time.perf_counter() - started
+            with lock:
+                if status >= 500:
+                    errors[0] += 1
+                else:
+                    latencies.append(took)
+    threads = [threading.Thread(target=connection, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    start.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    return summarize_run(latencies, errors[0], time.perf_counter() - started)
+
+
+async def asgi_get(path, headers):
+    scope = {
+        "type": "http", "method": "GET", "path": path, "query_string": b"",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+    await asgi.application(scope, receive, send)
+    return status[0]
+
+
+async def run_async(requests, concurrency):
+    latencies, errors = [], 0
+
+    async def connection(n):
+        nonlocal errors
+        for path, headers in requests[n::concurrency][:REQUESTS_PER_CONNECTION]:
+            started = time.perf_counter()
+            status = await asgi_get(path, headers)
+            if status >= 500:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    await asyncio.gather(*(connection(n) for n in range(concurrency)))
+    return summarize_run(latencies, errors, time.perf_counter() - started)
+
+
+async def run_async_levels(requests, database):
+    if MYSQL:
+        await db_async.create_pool()
+    else:
+        db_async.set_pool(AsyncStandInPool(database, db_async.ASYNC_POOL_MAX))
+    asgi.enable_async()
+    try:
+        await run_async(requests, 10)  # warm-up
+        return [await run_async(requests, c) for c in CONCURRENCY]
+    finally:
+        await db_async.close_pool()
+
+
+if __name__ == "__main__":
+    database = None
+    if not MYSQL:
+        database = StandInDatabase(stand_in_catalog())
+        db.connection_pool = StandInPool(database, SYNC_POOL_SIZE)
+    requests = workload()
+    app.logger.disabled = True  # pool errors are counted in the table instead
+
+
+    run_threaded(requests, 10)  # warm-up
+    threaded = [run_threaded(requests, c) for c in CONCURRENCY]
+    async_results = asyncio.run(run_async_levels(requests, database))
+
+    source = "MySQL from .env" if MYSQL else f"stand-in MySQL, {QUERY_MS}ms per statement"
+    print(f"{source}; pools: threaded {SYNC_POOL_SIZE}, async {db_async.ASYNC_POOL_MAX} connections")
+    print(f"  {'conns':>5}  {'server':<8} {'ok/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'5xx':>6}")
+    for concurrency, t, a in zip(CONCURRENCY, threaded, async_results):
+        for name, r in (("threaded", t), ("async", a)):
+            print(f"  {concurrency:>5}  {name:<8} {r['rps']:>8.0f} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['errors']:>6}")
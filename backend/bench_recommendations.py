@@ -0,0 +1,60 @@
+import sys
+import time
+import numpy as np
+from utils.recommendations import NEIGHBOURS_PER_TITLE, SEED_COUNT, compute_neighbours, merge_recommendations
+
+# Usage: python bench_recommendations.py [events] [profiles] [titles]
+# Builds neighbour lists from synthetic interactions and times the offline
+# build and the online merge. Profiles lean towards one of a few taste
+# clusters and title popularity is Zipf-like, so the lists are not random.
+# No database is needed.
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+PROFILES = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+TITLES = int(sys.argv[3]) if len(sys.argv) > 3 else 20_000
+CLUSTERS = 50
+SERVE_SAMPLES = 10_000
+
+
+def synthetic_events(rng):
+    taste = rng.integers(0, CLUSTERS, PROFILES)
+    profiles = rng.integers(0, PROFILES, EVENTS)
+    # 70% of events come from the profile's cluster, the rest from anywhere
+    popularity = rng.zipf(1.3, EVENTS) % (TITLES // CLUSTERS)
+    in_cluster = taste[profiles] * (TITLES // CLUSTERS) + popularity
+    anywhere = rng.zipf(1.2, EVENTS) % TITLES
+    titles = np.where(rng.random(EVENTS) < 0.7, in_cluster, anywhere)
+    weights = np.where(rng.random(EVENTS) < 0.8, 1.0, 0.5)
+    return profiles, titles, weights
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    profiles, titles, weights = synthetic_events(rng)
+    interactions = [
+        (int(p), ("Movie", int(t)), float(w))
+        for p, t, w in zip(profiles, titles, weights)
+    ]
+
+    started = time.perf_counter()
+    neighbours = compute_neighbours(interactions, NEIGHBOURS_PER_TITLE)
+    build = time.perf_counter() - started
+
+    history = {}
+    for p, t in zip(profiles[:SERVE_SAMPLES * 20], titles[:SERVE_SAMPLES * 20]):
+        history.setdefault(int(p), []).append(("Movie", int(t)))
+    samples = list(history.items())[:SERVE_SAMPLES]
+
+    latencies = []
+    for _, watched in samples:
+        seeds = [(key, 1.0) for key in dict.fromkeys(reversed(watched))][:SEED_COUNT]
+        started = time.perf_counter()
+        merge_recommendations(seeds, neighbours, set(watched))
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+
+    pairs = sum(len(v) for v in neighbours.values())
+    print(f"{EVENTS} events, {PROFILES} profiles, {TITLES} titles")
+    print(f"  offline build: {build:8.2f}s  ({len(neighbours)} titles, {pairs} neighbour pairs)")
+    print(f"  online merge:  p50 {latencies[len(latencies) // 2] * 1000:.3f}ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.3f}ms  over {len(latencies)} profiles")
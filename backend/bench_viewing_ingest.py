@@ -0,0 +1,70 @@
+import sys
+import time
+from datetime import datetime
+from db import execute_query, get_connection
+from utils.ingest import BatchWriter
+
+# Usage: python bench_viewing_ingest.py <profile_id> [events] [content_id]
+# Compares insert throughput of one INSERT + COMMIT per event (the old
+# /api/viewing_history/log path) against the batched write-behind writer.
+# Needs the configured database; every row it inserts is deleted afterwards.
+
+PROFILE_ID = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+EVENTS = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+CONTENT_ID = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+INSERT = """
+    INSERT INTO viewing_history (Profile_Id, Content_Type, Content_Id, Watch_Duration, Watch_Date)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+# Far enough in the past that cleanup can't touch real history
+MARKER_DATE = datetime(2000, 1, 1)
+
+
+def rows():
+    return [(PROFILE_ID, "Movie", CONTENT_ID, i % 120 + 1, MARKER_DATE) for i in range(EVENTS)]
+
+
+def bench_per_request():
+    start = time.perf_counter()
+    for row in rows():
+        execute_query(INSERT, row)
+    return time.perf_counter() - start
+
+
+def bench_batched():
+    writer = BatchWriter("bench", INSERT, max_queue=EVENTS + 1)
+    start = time.perf_counter()
+    for row in rows():
+        writer.submit(row)
+    writer.close(timeout=None)
+    elapsed = time.perf_counter() - start
+    return elapsed, writer.stats()
+
+
+def cleanup():
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM viewing_history WHERE Profile_Id = %s AND Watch_Date = %s",
+            (PROFILE_ID, MARKER_DATE)
+        )
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    try:
+        single = bench_per_request()
+        batched, stats = bench_batched()
+    finally:
+        cleanup()
+
+    print(f"{EVENTS} events for profile {PROFILE_ID}")
+    print(f"  per-request insert: {single:8.2f}s  {EVENTS / single:10.0f} rows/s")
+    print(f"  batched writer:     {batched:8.2f}s  {EVENTS / batched:10.0f} rows/s  "
+          f"({stats['batches']} batches, {stats['failed']} failed)")
+    print(f"  speedup: {single / batched:.1f}x")
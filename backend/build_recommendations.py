@@ -0,0 +1,20 @@
+import sys
+import time
+from utils.recommendations import NEIGHBOURS_PER_TITLE, RecommendationError, rebuild_neighbours
+
+# Usage: python build_recommendations.py [neighbours_per_title]
+# Rebuilds content_neighbour from viewing_history, watchlist and
+# rating_review. Needs numpy and scipy. Meant to run periodically (e.g.
+# nightly from cron); running servers pick up the new lists when their
+# neighbour cache expires (RECOMMEND_CACHE_TTL).
+
+if __name__ == "__main__":
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else NEIGHBOURS_PER_TITLE
+    started = time.perf_counter()
+    try:
+        result = rebuild_neighbours(k)
+    except RecommendationError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Stored {result['pairs']} neighbours for {result['titles']} titles in {elapsed:.1f}s")
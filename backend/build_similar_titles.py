@@ -0,0 +1,24 @@
+import sys
+import time
+from utils.similarity import SIMILAR_PER_TITLE, SimilarityError, add_title, rebuild_similar
+
+# Usage: python build_similar_titles.py              (whole catalog)
+#        python build_similar_titles.py Movie:<id>   (fold in one new or edited title)
+# Fills similar_title from genres, descriptions, age ratings and release
+# years. Needs numpy and scipy. Running servers pick up changes when their
+# similar-title cache expires (SIMILAR_CACHE_TTL).
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    try:
+        if len(sys.argv) > 1:
+            content_type, content_id = sys.argv[1].split(":")
+            result = add_title(content_type, int(content_id), SIMILAR_PER_TITLE)
+            message = f"{content_type} {content_id}: {result['neighbours']} neighbours, {result['lists_updated']} other lists updated"
+        else:
+            result = rebuild_similar(SIMILAR_PER_TITLE)
+            message = f"{result['pairs']} similar pairs for {result['titles']} titles"
+    except SimilarityError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {message} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,17 @@
+-- ============================================
+-- Precomputed item-item recommendations
+-- ============================================
+-- The k most similar titles for every title, by co-occurrence across
+-- viewing history, watchlists and high ratings. Written in one transaction
+-- by the offline job; the recommendations endpoint only reads it:
+--   python build_recommendations.py
+
+CREATE TABLE IF NOT EXISTS content_neighbour (
+    Content_Type ENUM('Movie', 'TV_Show') NOT NULL,
+    Content_Id INT NOT NULL,
+    Rank_No SMALLINT NOT NULL,
+    Neighbour_Type ENUM('Movie', 'TV_Show') NOT NULL,
+    Neighbour_Id INT NOT NULL,
+    Score FLOAT NOT NULL,
+    PRIMARY KEY (Content_Type, Content_Id, Rank_No)
+);
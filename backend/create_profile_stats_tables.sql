@@ -0,0 +1,38 @@
+-- ============================================
+-- Materialized viewing statistics per profile
+-- ============================================
+-- Maintained incrementally when history rows are logged or deleted, so the
+-- stats endpoint never scans viewing_history. Backfill or repair with:
+--   python rebuild_viewing_stats.py [profile_id]
+
+CREATE TABLE IF NOT EXISTS profile_stats (
+    Profile_Id INT NOT NULL PRIMARY KEY,
+    Total_Minutes INT NOT NULL DEFAULT 0,
+    Views INT NOT NULL DEFAULT 0,
+    Titles_Watched INT NOT NULL DEFAULT 0,
+    Current_Streak INT NOT NULL DEFAULT 0,
+    Longest_Streak INT NOT NULL DEFAULT 0,
+    Last_Watch_Date DATE NULL
+);
+
+CREATE TABLE IF NOT EXISTS profile_genre_minutes (
+    Profile_Id INT NOT NULL,
+    Genre_Id INT NOT NULL,
+    Minutes INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Profile_Id, Genre_Id)
+);
+
+CREATE TABLE IF NOT EXISTS profile_title_views (
+    Profile_Id INT NOT NULL,
+    Content_Type ENUM('Movie', 'TV_Show') NOT NULL,
+    Content_Id INT NOT NULL,
+    Views INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Profile_Id, Content_Type, Content_Id)
+);
+
+CREATE TABLE IF NOT EXISTS profile_watch_days (
+    Profile_Id INT NOT NULL,
+    Watch_Day DATE NOT NULL,
+    Views INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Profile_Id, Watch_Day)
+);
@@ -0,0 +1,19 @@
+-- ============================================
+-- Rating aggregates
+-- ============================================
+-- Running sum/count and 1-5 histogram per title, updated in O(1) by the
+-- ratings API on every insert, edit and delete. Rebuild from rating_review
+-- at any time with: python reconcile_ratings.py
+
+CREATE TABLE IF NOT EXISTS rating_aggregate (
+    Content_Type ENUM('Movie', 'TV_Show') NOT NULL,
+    Content_Id INT NOT NULL,
+    Rating_Sum INT NOT NULL DEFAULT 0,
+    Rating_Count INT NOT NULL DEFAULT 0,
+    Count_1 INT NOT NULL DEFAULT 0,
+    Count_2 INT NOT NULL DEFAULT 0,
+    Count_3 INT NOT NULL DEFAULT 0,
+    Count_4 INT NOT NULL DEFAULT 0,
+    Count_5 INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Content_Type, Content_Id)
+);
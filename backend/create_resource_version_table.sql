@@ -0,0 +1,13 @@
+-- ============================================
+-- Resource versions (HTTP ETags)
+-- ============================================
+-- One counter per cacheable catalog resource (movies, tvshows, genres),
+-- incremented after every committed write that changes it. Each worker
+-- mirrors the table every few seconds and derives its ETags from it, so a
+-- tag issued by one worker is honoured, and retired, by all of them.
+
+CREATE TABLE IF NOT EXISTS resource_version (
+    Resource VARCHAR(32) NOT NULL,
+    Version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Resource)
+);
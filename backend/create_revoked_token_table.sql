@@ -0,0 +1,20 @@
+-- ============================================
+-- Revoked tokens (logout denylist)
+-- ============================================
+-- One row per logged-out JWT, keyed by the SHA-256 of the token. Every
+-- worker mirrors the rows revoked since shortly before its last sync (by
+-- Revoked_At, with an overlap for transactions that commit late) every few
+-- seconds, and reloads all unexpired rows now and then, so a logout holds
+-- across processes. Expires_At is the token's own exp (unix seconds); rows
+-- past it are deleted on later logouts.
+
+CREATE TABLE IF NOT EXISTS revoked_token (
+    Revocation_Id BIGINT NOT NULL AUTO_INCREMENT,
+    Token_Hash BINARY(32) NOT NULL,
+    Expires_At BIGINT NOT NULL,
+    Revoked_At TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    PRIMARY KEY (Revocation_Id),
+    UNIQUE KEY uq_revoked_token_hash (Token_Hash),
+    KEY idx_revoked_token_expiry (Expires_At),
+    KEY idx_revoked_token_revoked_at (Revoked_At)
+);
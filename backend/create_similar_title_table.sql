@@ -0,0 +1,18 @@
+-- ============================================
+-- Precomputed content-based similar titles
+-- ============================================
+-- The k nearest titles for every title by genre, description TF-IDF, age
+-- rating and era. Built by the offline job, which can also fold a single
+-- new title in without recomputing the rest:
+--   python build_similar_titles.py [Movie:<id> | TV_Show:<id>]
+
+CREATE TABLE IF NOT EXISTS similar_title (
+    Content_Type ENUM('Movie', 'TV_Show') NOT NULL,
+    Content_Id INT NOT NULL,
+    Rank_No SMALLINT NOT NULL,
+    Similar_Type ENUM('Movie', 'TV_Show') NOT NULL,
+    Similar_Id INT NOT NULL,
+    Score FLOAT NOT NULL,
+    PRIMARY KEY (Content_Type, Content_Id, Rank_No),
+    KEY idx_similar_title_target (Similar_Type, Similar_Id)
+);
@@ -0,0 +1,18 @@
+-- ============================================
+-- Watch progress (resume positions)
+-- ============================================
+-- One row per (profile, title), upserted in batches by the heartbeat API.
+-- Holds only the latest position; viewing_history keeps the full log.
+
+CREATE TABLE IF NOT EXISTS watch_progress (
+    Profile_Id INT NOT NULL,
+    Content_Type ENUM('Movie', 'TV_Show') NOT NULL,
+    Content_Id INT NOT NULL,
+    Position_Seconds INT NOT NULL DEFAULT 0,
+    Duration_Seconds INT NULL,
+    Updated_At DATETIME NOT NULL,
+    PRIMARY KEY (Profile_Id, Content_Type, Content_Id),
+    KEY idx_watch_progress_recent (Profile_Id, Updated_At)
+);
+-- No foreign key on Profile_Id: a batch must not fail because one profile
+-- was deleted between heartbeat and flush. Profile deletion removes rows explicitly.
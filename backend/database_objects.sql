@@ -124,46 +124,13 @@ END //
 DELIMITER ;
 
 -- triggers
--- update movie rating avg
+-- rating averages
+-- trg_UpdateMovieRating / trg_UpdateTVShowRating recomputed AVG() over every
+-- rating of the title on each insert. Ratings are now folded into
+-- rating_aggregate in O(1) by the API (see create_rating_aggregate_table.sql).
 DROP TRIGGER IF EXISTS trg_UpdateMovieRating;
-
-DELIMITER //
-CREATE TRIGGER trg_UpdateMovieRating
-AFTER INSERT ON rating
-FOR EACH ROW
-BEGIN
-    IF NEW.Content_Type = 'Movie' THEN
-        UPDATE movie
-        SET average_rating = (
-            SELECT AVG(Rating_Value)
-            FROM rating
-            WHERE Content_Type = 'Movie' AND Content_Id = NEW.Content_Id
-        )
-        WHERE Movie_Id = NEW.Content_Id;
-    END IF;
-END //
-DELIMITER ;
-
--- update tv rating avg
 DROP TRIGGER IF EXISTS trg_UpdateTVShowRating;
 
-DELIMITER //
-CREATE TRIGGER trg_UpdateTVShowRating
-AFTER INSERT ON rating
-FOR EACH ROW
-BEGIN
-    IF NEW.Content_Type = 'TV_Show' THEN
-        UPDATE tv_show
-        SET average_rating = (
-            SELECT AVG(Rating_Value)
-            FROM rating
-            WHERE Content_Type = 'TV_Show' AND Content_Id = NEW.Content_Id
-        )
-        WHERE Show_Id = NEW.Content_Id;
-    END IF;
-END //
-DELIMITER ;
-
 --log viewing history
 DROP TRIGGER IF EXISTS trg_LogViewingHistory;
 
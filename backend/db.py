@@ -1,7 +1,11 @@
 import mysql.connector
 from mysql.connector import pooling
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from flask import g, has_request_context
 
 load_dotenv()
 
@@ -12,25 +16,48 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'streamingdb'),
 }
 
-try:
-    connection_pool = pooling.MySQLConnectionPool(
-        pool_name="streaming_pool",
-        pool_size=30,
-        pool_reset_session=True,
-        **DB_CONFIG
-    )
-    print("✅ MySQL connection pool created successfully.")
-except mysql.connector.Error as err:
-    print(f"❌ Error creating connection pool: {err}")
-    connection_pool = None
+# Created on first use, so processes that import the app without touching
+# the database (e.g. the bcrypt worker processes) don't open 30 connections
+connection_pool = None
+_pool_lock = threading.Lock()
+
+# MySQLConnectionPool raises PoolError at once when every connection is
+# checked out; get_connection() retries for up to this many seconds first
+POOL_WAIT_TIMEOUT = float(os.getenv("DB_POOL_WAIT_TIMEOUT", "5"))
+
+
+def _create_pool():
+    global connection_pool
+    with _pool_lock:
+        if connection_pool is None:
+            try:
+                connection_pool = pooling.MySQLConnectionPool(
+                    pool_name="streaming_pool",
+                    pool_size=30,
+                    pool_reset_session=True,
+                    **DB_CONFIG
+                )
+                print("✅ MySQL connection pool created successfully.")
+            except mysql.connector.Error as err:
+                print(f"❌ Error creating connection pool: {err}")
+    return connection_pool
 
 
 # Function to get a connection from the pool
 def get_connection():
-    if connection_pool:
-        return connection_pool.get_connection()
-    else:
+    pool = connection_pool or _create_pool()
+    if not pool:
         raise ConnectionError("Database connection pool is not initialized.")
+    deadline = time.monotonic() + POOL_WAIT_TIMEOUT
+    delay = 0.005
+    while True:
+        try:
+            return pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
 
 
 # Backwards-compatible name used in some routes
@@ -38,15 +65,200 @@ def get_db_connection():
     return get_connection()
 
 
+class UnitOfWork:
+    """One pooled connection shared by every statement of a request or transaction() block.
+
+    Statements run on it are not committed individually; the owner commits
+    or rolls back once at the end and returns the connection to the pool.
+    """
+
+    def __init__(self):
+        self.conn = get_connection()
+        self.dirty = False
+        self._savepoints = 0
+        self.open_savepoints = 0
+        self._after_commit = []
+
+    def commit(self):
+        if self.dirty:
+            self.conn.commit()
+            self.dirty = False
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as err:
+                print(f"❌ Error in after-commit callback: {err}")
+
+    def rollback(self):
+        self.conn.rollback()
+        self.dirty = False
+        self._after_commit = []
+
+    def close(self):
+        try:
+            if self.dirty:
+                self.conn.rollback()
+        finally:
+            self._after_commit = []
+            self.conn.close()
+
+    @contextmanager
+    def savepoint(self):
+        """Roll back only the statements in this block if it raises"""
+        self._savepoints += 1
+        name = f"sp_{self._savepoints}"
+        cursor = self.conn.cursor()
+        cursor.execute(f"SAVEPOINT {name}")
+        self.open_savepoints += 1
+        try:
+            yield self
+        except Exception:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            raise
+        else:
+            cursor.execute(f"RELEASE SAVEPOINT {name}")
+        finally:
+            self.open_savepoints -= 1
+            cursor.close()
+
+
+# transaction() blocks running outside a Flask request (scripts, background threads)
+_local = threading.local()
+
+
+def _current_uow(create=False):
+    """Return the unit of work bound to this request/thread, if any.
+
+    Inside a Flask request the unit of work is created lazily on the first
+    statement, so requests that never touch the database never check out
+    a connection.
+    """
+    if has_request_context():
+        uow = g.get("_db_uow")
+        if uow is None and create:
+            uow = g._db_uow = UnitOfWork()
+        return uow
+    return getattr(_local, "uow", None)
+
+
+@contextmanager
+def transaction():
+    """Run the enclosed statements atomically.
+
+    Inside a request (or another transaction() block) this becomes a
+    savepoint on the already-bound connection; otherwise it checks out a
+    connection, commits on success and rolls back on error.
+    """
+    if has_request_context() or getattr(_local, "uow", None) is not None:
+        uow = _current_uow(create=True)
+        with uow.savepoint():
+            yield uow
+        return
+
+    uow = _local.uow = UnitOfWork()
+    try:
+        yield uow
+        uow.commit()
+    except Exception:
+        uow.rollback()
+        raise
+    finally:
+        _local.uow = None
+        uow.close()
+
+
+def after_commit(callback, *args):
+    """Run `callback(*args)` once the current request or transaction() commits.
+
+    Use it for cache invalidation: evicting before the commit lets a
+    concurrent reader reload the old rows into the cache. The callback is
+    dropped if the work is rolled back, and runs at once when no unit of
+    work is bound.
+    """
+    uow = _current_uow()
+    if uow is None:
+        callback(*args)
+    else:
+        uow._after_commit.append(lambda: callback(*args))
+
+
+def release_connection():
+    """Commit the request's statements so far and return its connection to the pool.
+
+    For views that block on something slow (bcrypt) between statements;
+    the next statement checks out a fresh connection. Does nothing inside
+    a transaction() block or outside a request.
+    """
+    if not has_request_context():
+        return
+    uow = g.get("_db_uow")
+    if uow is not None and not uow.open_savepoints:
+        g._db_uow = None
+        try:
+            uow.commit()
+        finally:
+            uow.close()
+
+
+def init_app(app):
+    """Bind one connection per request: commit after the view succeeds, release at teardown.
+
+    Error responses (status >= 400) are rolled back, including those a
+    view returns after catching its own exception part way through a write.
+    """
+
+    @app.after_request
+    def commit_request_transaction(response):
+        uow = g.get("_db_uow")
+        if uow is not None and response.status_code >= 400:
+            uow.rollback()
+        elif uow is not None:
+            try:
+                uow.commit()
+            except mysql.connector.Error as err:
+                uow.rollback()
+                print(f"❌ Error committing request transaction: {err}")
+                response = app.make_response(({"success": False, "message": "Database error"}, 500))
+        return response
+
+    @app.teardown_request
+    def release_request_connection(exc):
+        uow = g.pop("_db_uow", None)
+        if uow is not None:
+            # Anything still uncommitted here comes from a failed request
+            uow.close()
+
+
+@contextmanager
+def _cursor(dirty, **cursor_args):
+    uow = _current_uow(create=True)
+    if uow is not None:
+        cursor = uow.conn.cursor(**cursor_args)
+        try:
+            yield cursor
+            uow.dirty = uow.dirty or dirty
+        finally:
+            cursor.close()
+        return
+
+    # No request or transaction: one connection per statement, as before
+    conn = get_connection()
+    cursor = conn.cursor(**cursor_args)
+    try:
+        yield cursor
+        if dirty:
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
 # Utility function for executing SELECT queries
 def fetch_all(query, params=None):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(query, params or ())
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+    with _cursor(False, dictionary=True) as cursor:
+        cursor.execute(query, params or ())
+        return cursor.fetchall()
 
 
 # Alias used by some existing code
@@ -55,32 +267,21 @@ def fetch_query(query, params=None):
 
 
 def fetch_one(query, params=None):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(query, params or ())
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return row
+    # Buffered so unread extra rows can't block the next statement on a shared connection
+    with _cursor(False, dictionary=True, buffered=True) as cursor:
+        cursor.execute(query, params or ())
+        return cursor.fetchone()
 
 
 
 def execute_query(query, params=None):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(query, params or ())
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with _cursor(True) as cursor:
+        cursor.execute(query, params or ())
     return True
 
 
 def call_procedure(proc_name, params=()):
     """Call a stored procedure without returning a result set."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.callproc(proc_name, params)
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with _cursor(True) as cursor:
+        cursor.callproc(proc_name, params)
     return True
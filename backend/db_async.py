@@ -0,0 +1,71 @@
+import asyncio
+import os
+from db import DB_CONFIG
+
+try:
+    import aiomysql
+except ImportError:  # only the ASGI entry point (asgi.py) needs it
+    aiomysql = None
+
+ASYNC_POOL_MIN = int(os.getenv("ASYNC_DB_POOL_MIN", "5"))
+ASYNC_POOL_MAX = int(os.getenv("ASYNC_DB_POOL_MAX", "50"))
+
+# Created on first use inside the running event loop
+_pool = None
+_pool_lock = None
+
+
+class AsyncDatabaseError(Exception):
+    pass
+
+
+async def create_pool():
+    global _pool, _pool_lock
+    if _pool is not None:
+        return _pool
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            if aiomysql is None:
+                raise AsyncDatabaseError("aiomysql is required for the ASGI server (pip install aiomysql)")
+            _pool = await aiomysql.create_pool(
+                host=DB_CONFIG["host"],
+                user=DB_CONFIG["user"],
+                password=DB_CONFIG["password"] or "",
+                db=DB_CONFIG["database"],
+                minsize=ASYNC_POOL_MIN,
+                maxsize=ASYNC_POOL_MAX,
+                # Reads only: each statement sees the latest commit instead of
+                # a snapshot held open on a pooled connection
+                autocommit=True,
+            )
+            print("✅ Async MySQL connection pool created successfully.")
+    return _pool
+
+
+def set_pool(pool):
+    """Use an already created pool (anything with aiomysql's acquire()/cursor() interface)"""
+    global _pool
+    _pool = pool
+
+
+async def close_pool():
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+        await pool.wait_closed()
+
+
+async def fetch_all(query, params=None):
+    pool = _pool or await create_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor if aiomysql else None) as cursor:
+            await cursor.execute(query, params or ())
+            return list(await cursor.fetchall())
+
+
+async def fetch_one(query, params=None):
+    rows = await fetch_all(query, params)
+    return rows[0] if rows else None
@@ -0,0 +1,21 @@
+import sys
+from utils.posters import Image, POSTER_SOURCE, POSTER_STORE, PosterError, ingest_directory
+
+# Usage: python ingest_posters.py [source_dir]
+# Copies every image in the source directory (default: poster_sources/, or
+# POSTER_SOURCE) into the content-addressed poster store and writes the
+# manifest. Files are named after the title, e.g. "The Dark Knight.jpg".
+# Width variants and placeholders need Pillow (pip install Pillow); without
+# it only the originals are stored. Running servers pick up the new manifest
+# on their next request.
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else POSTER_SOURCE
+    try:
+        manifest = ingest_directory(source, POSTER_STORE)
+    except PosterError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if Image is None:
+        print("⚠️  Pillow is not installed: stored originals only, no size variants")
+    print(f"✅ Ingested {len(manifest)} poster(s) into {POSTER_STORE}")
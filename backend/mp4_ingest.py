@@ -0,0 +1,25 @@
+import os
+import sys
+from utils.mp4 import MP4Error, ingest
+from routes.media import MEDIA_ROOT
+
+# Usage: python mp4_ingest.py [video.mp4 ...]
+# Moves moov in front of mdat and writes <video>.index.json next to each file.
+# With no arguments every .mp4 under MEDIA_ROOT is processed.
+
+paths = sys.argv[1:] or sorted(
+    os.path.join(MEDIA_ROOT, name) for name in os.listdir(MEDIA_ROOT) if name.endswith(".mp4")
+)
+
+failed = 0
+for path in paths:
+    try:
+        rewritten, index = ingest(path)
+    except (MP4Error, OSError) as e:
+        failed += 1
+        print(f"❌ {path}: {e}")
+        continue
+    action = "rewritten to faststart" if rewritten else "already faststart"
+    print(f"✅ {os.path.basename(path)}: {action}, {len(index['keyframes'])} keyframes, {index['duration']}s")
+
+sys.exit(1 if failed else 0)
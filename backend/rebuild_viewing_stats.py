@@ -0,0 +1,12 @@
+import sys
+from utils.viewing_stats import rebuild_stats
+
+# Usage: python rebuild_viewing_stats.py [profile_id]
+# Recomputes the materialized viewing statistics from viewing_history, for
+# one profile or for everyone. Use it once after creating the tables and
+# whenever the statistics are suspected to have drifted.
+
+if __name__ == "__main__":
+    profile_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    profiles = rebuild_stats(profile_id)
+    print(f"✅ Rebuilt viewing statistics for {profiles} profile(s)")
@@ -0,0 +1,10 @@
+from utils.ratings import rebuild_aggregates
+
+# Usage: python reconcile_ratings.py
+# Rebuilds rating_aggregate from rating_review and copies the averages into
+# movie/tv_show.average_rating. Safe to run at any time (e.g. nightly);
+# running servers pick up the result when their caches expire.
+
+if __name__ == "__main__":
+    result = rebuild_aggregates()
+    print(f"✅ Rebuilt rating aggregates: {result['titles']} titles, {result['ratings']} ratings")
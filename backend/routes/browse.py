@@ -0,0 +1,106 @@
+from flask import Blueprint, jsonify, request
+from utils.content import AGE_RATING_LEVELS, resolve_many
+from utils.facets import FACETS, get_facet_index
+from utils.profile_views import UNRESTRICTED, with_restriction
+import time
+
+browse_bp = Blueprint('browse', __name__)
+
+MAX_LIMIT = 100
+
+
+def transform_browse_item(key, content):
+    """A matching title with its resolved content record"""
+    return {
+        "content_type": key[0],
+        "content_id": key[1],
+        "title": content["title"],
+        "description": content["description"],
+        "release_year": content["release_year"],
+        "age_rating": content["age_rating"],
+        "average_rating": content["average_rating"],
+        "poster_url": content["poster_url"],
+        "poster": content["poster"],
+    }
+
+
+def _values(name, facet):
+    """Repeated or comma-separated values of one query parameter"""
+    values = [v.strip() for arg in request.args.getlist(name) for v in arg.split(",") if v.strip()]
+    if facet == "decade":
+        try:
+            return [int(v.rstrip("s")) for v in values]
+        except ValueError:
+            raise ValueError(f"{name} must be a year like 1990")
+    return values
+
+
+def parse_filters():
+    """Facet filters from the query string.
+
+    For each facet, `genre=A,B` matches either, `genre_all=A,B` both and
+    `genre_not=A,B` neither; facets are combined with AND.
+    `max_age_rating=PG-13` keeps PG-13 and anything rated for younger
+    audiences. Raises ValueError on a malformed value.
+    """
+    filters = {}
+    for facet in FACETS:
+        clause = {
+            "any_of": _values(facet, facet),
+            "all_of": _values(f"{facet}_all", facet),
+            "none_of": _values(f"{facet}_not", facet),
+        }
+        if any(clause.values()):
+            filters[facet] = clause
+
+    max_age_rating = request.args.get('max_age_rating')
+    if max_age_rating:
+        if max_age_rating not in AGE_RATING_LEVELS:
+            raise ValueError(f"unknown age rating {max_age_rating}")
+        filters["age_level"] = {"any_of": list(range(AGE_RATING_LEVELS[max_age_rating] + 1))}
+    return filters
+
+
+def restrict(filters, index, restriction):
+    """Narrow facet filters to what a profile's restriction class may see"""
+    level, language = restriction
+    if level is not None:
+        requested = filters.get("age_level", {}).get("any_of", range(level + 1))
+        filters["age_level"] = {"any_of": [v for v in requested if v <= level]}
+    if language is not None:
+        other = [v for v in index.values("language") if v.casefold() != language]
+        if other:
+            clause = filters.setdefault("language", {})
+            clause["none_of"] = list(clause.get("none_of", [])) + other
+    return filters
+
+
+@browse_bp.route('/', methods=['GET'])
+@with_restriction
+def browse(restriction):
+    """Filter the catalog by facets, best rated first, with per-facet counts"""
+    try:
+        filters = parse_filters()
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = max(1, min(request.args.get('limit', 40, type=int), MAX_LIMIT))
+
+    index = get_facet_index()
+    if restriction != UNRESTRICTED:
+        filters = restrict(filters, index, restriction)
+    started = time.perf_counter()
+    selection = index.select(filters)
+    keys = index.page(selection, offset, limit)
+    facets = index.counts(filters)
+    took_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    contents = resolve_many(keys)
+    return jsonify({
+        "success": True,
+        "total": selection.bit_count(),
+        "offset": offset,
+        "results": [transform_browse_item(key, contents[key]) for key in keys if key in contents],
+        "facets": {facet: {str(v): c for v, c in counts.items()} for facet, counts in facets.items()},
+        "took_ms": took_ms,
+    })
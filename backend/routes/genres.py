@@ -1,27 +1,36 @@
 from flask import Blueprint, jsonify
 from db import fetch_all
+from utils.cache import catalog_cache
+from utils.http_cache import conditional
 
 genres_bp = Blueprint('genres', __name__)
 
 
 @genres_bp.route('/', methods=['GET'])
+@conditional('genres')
 def get_all_genres():
-    genres = fetch_all("SELECT * FROM genre ORDER BY Genre_Name")
-    
-    transformed_genres = [
-        {
-            'genre_id': g['Genre_Id'],
-            'name': g['Genre_Name'],
-            'description': g.get('Description', '')
-        }
-        for g in genres
-    ]
+    def load():
+        genres = fetch_all("SELECT * FROM genre ORDER BY Genre_Name")
+        return [
+            {
+                'genre_id': g['Genre_Id'],
+                'name': g['Genre_Name'],
+                'description': g.get('Description', '')
+            }
+            for g in genres
+        ]
+
+    transformed_genres = catalog_cache.get_or_load("genres", load)
     return jsonify({"success": True, "genres": transformed_genres})
 
 
 @genres_bp.route('/<int:genre_id>', methods=['GET'])
+@conditional('genres')
 def get_genre_by_id(genre_id):
-    genre = fetch_all("SELECT * FROM genre WHERE Genre_Id = %s", (genre_id,))
+    genre = catalog_cache.get_or_load(
+        f"genre:{genre_id}",
+        lambda: fetch_all("SELECT * FROM genre WHERE Genre_Id = %s", (genre_id,)) or None,
+    )
     if genre:
         return jsonify({"success": True, "genre": genre[0]})
     else:
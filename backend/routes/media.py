@@ -0,0 +1,200 @@
+from flask import Blueprint, Response, current_app, jsonify, request, send_file
+from werkzeug.http import http_date
+from werkzeug.security import safe_join
+from utils.auth_middleware import token_required
+from utils.entitlements import subscription_required
+from utils.cache import TTLCache
+from utils.mp4 import MP4Error, load_index, seek
+import mimetypes
+import os
+import secrets
+
+media_bp = Blueprint('media', __name__)
+
+MEDIA_ROOT = os.getenv(
+    "MEDIA_ROOT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "frontend", "my-app", "public", "videos"),
+)
+
+# Files are read in fixed, aligned chunks so hot parts of popular titles
+# (the first seconds, common seek points) are served from memory
+CHUNK_SIZE = int(os.getenv("MEDIA_CHUNK_SIZE", str(256 * 1024)))
+CHUNK_CACHE_BYTES = int(os.getenv("MEDIA_CHUNK_CACHE_MB", "64")) * 1024 * 1024
+chunk_cache = TTLCache(maxsize=max(1, CHUNK_CACHE_BYTES // CHUNK_SIZE), ttl=None)
+
+# Playback session id -> (user_id, filename). The subscription is checked once
+# when the session is opened; range requests only look the session up here.
+SESSION_TTL = int(os.getenv("MEDIA_SESSION_TTL", str(4 * 60 * 60)))
+playback_sessions = TTLCache(maxsize=10000, ttl=SESSION_TTL)
+
+# (path, mtime) -> keyframe index, so the sidecar is parsed once per file version
+seek_indexes = TTLCache(maxsize=256, ttl=None)
+
+MULTIPART_BOUNDARY = "STREAMIX_BYTERANGES"
+
+
+def _video_path(filename):
+    path = safe_join(MEDIA_ROOT, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    return path
+
+
+def _read_chunk(fd, path, mtime, index):
+    key = (path, mtime, index)
+    chunk = chunk_cache.get(key)
+    if chunk is None:
+        chunk = os.pread(fd, CHUNK_SIZE, index * CHUNK_SIZE)
+        chunk_cache.set(key, chunk)
+    return chunk
+
+
+def _iter_range(fd, path, mtime, start, end):
+    """Yield bytes start..end (inclusive) straight from their chunks, never from offset 0"""
+    first, last = start // CHUNK_SIZE, end // CHUNK_SIZE
+    for index in range(first, last + 1):
+        chunk = _read_chunk(fd, path, mtime, index)
+        lo = start - index * CHUNK_SIZE if index == first else 0
+        hi = end - index * CHUNK_SIZE + 1 if index == last else len(chunk)
+        yield chunk[lo:hi]
+
+
+def _stream(path, mtime, ranges, size, content_type):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            yield from _iter_range(fd, path, mtime, start, end)
+            return
+
+        for start, end in ranges:
+            yield (
+                f"\r\n--{MULTIPART_BOUNDARY}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+            ).encode("ascii")
+            yield from _iter_range(fd, path, mtime, start, end)
+        yield f"\r\n--{MULTIPART_BOUNDARY}--\r\n".encode("ascii")
+    finally:
+        os.close(fd)
+
+
+def _multipart_length(ranges, size, content_type):
+    length = 0
+    for start, end in ranges:
+        length += len(
+            f"\r\n--{MULTIPART_BOUNDARY}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ) + end - start + 1
+    return length + len(f"\r\n--{MULTIPART_BOUNDARY}--\r\n")
+
+
+def _resolve_ranges(range_header, size):
+    """Turn a parsed Range header into inclusive (start, end) pairs within the file"""
+    ranges = []
+    for start, stop in range_header.ranges:
+        if start < 0:  # suffix range: the last -start bytes
+            start, stop = max(size + start, 0), size
+        elif stop is None or stop > size:
+            stop = size
+        if start < stop:
+            ranges.append((start, stop - 1))
+    return ranges
+
+
+def _if_range_matches(etag, mtime):
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag.strip('"')
+    if if_range.date is not None:
+        return int(mtime) == int(if_range.date.timestamp())
+    return True
+
+
+@media_bp.route('/session/<path:filename>', methods=['POST'])
+@token_required
+@subscription_required
+def open_playback_session(current_user, filename):
+    """Check the subscription once and hand out a stream URL for this playback"""
+    if _video_path(filename) is None:
+        return jsonify({"success": False, "message": "Video not found"}), 404
+
+    session_id = secrets.token_urlsafe(24)
+    playback_sessions.set(session_id, (current_user, filename))
+    return jsonify({
+        "success": True,
+        "session": session_id,
+        "stream_url": f"/api/media/videos/{filename}?session={session_id}",
+        "expires_in": SESSION_TTL
+    })
+
+
+@media_bp.route('/index/<path:filename>', methods=['GET'])
+def get_seek_index(filename):
+    """Keyframe index (seconds -> byte offset); with ?t= returns the range to request for that seek"""
+    path = _video_path(filename)
+    if path is None:
+        return jsonify({"success": False, "message": "Video not found"}), 404
+
+    try:
+        index = seek_indexes.get_or_load((path, os.path.getmtime(path)), lambda: load_index(path))
+    except MP4Error as e:
+        return jsonify({"success": False, "message": f"Cannot index video: {e}"}), 422
+
+    t = request.args.get('t', type=float)
+    if t is not None:
+        return jsonify({"success": True, "seek": seek(index, t), "init_range": index["init_range"]})
+    return jsonify({"success": True, "index": index})
+
+
+@media_bp.route('/videos/<path:filename>', methods=['GET', 'HEAD'])
+def stream_video(filename):
+    session = playback_sessions.get(request.args.get('session', ''))
+    if not session or session[1] != filename:
+        return jsonify({"success": False, "message": "Invalid or expired playback session"}), 403
+
+    path = _video_path(filename)
+    if path is None:
+        return jsonify({"success": False, "message": "Video not found"}), 404
+
+    # Behind nginx/Apache the proxy streams the file with sendfile and handles ranges itself
+    if current_app.config.get("USE_X_SENDFILE"):
+        return send_file(path, conditional=True)
+
+    stat = os.stat(path)
+    size, mtime = stat.st_size, stat.st_mtime
+    etag = f'"{size:x}-{int(mtime * 1000):x}"'
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": http_date(mtime),
+        "Cache-Control": "private, max-age=3600",
+    }
+
+    range_header = request.range
+    if range_header is None or range_header.units != "bytes" or not _if_range_matches(etag, mtime):
+        if request.if_none_match.contains(etag.strip('"')):
+            return Response(status=304, headers=headers)
+        # Full body: gunicorn's wsgi.file_wrapper hands the open file to sendfile()
+        response = send_file(path, mimetype=content_type, conditional=False, etag=False, last_modified=mtime)
+        response.headers.update(headers)
+        return response
+
+    ranges = _resolve_ranges(range_header, size)
+    if not ranges:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status=416, headers=headers)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        mimetype = content_type
+    else:
+        headers["Content-Length"] = str(_multipart_length(ranges, size, content_type))
+        mimetype = f"multipart/byteranges; boundary={MULTIPART_BOUNDARY}"
+
+    body = [] if request.method == "HEAD" else _stream(path, mtime, ranges, size, content_type)
+    return Response(body, status=206, headers=headers, mimetype=mimetype, direct_passthrough=True)
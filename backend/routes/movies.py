@@ -1,38 +1,17 @@
-from flask import Blueprint, jsonify
-from db import fetch_all, fetch_one
+from flask import Blueprint, jsonify, request
+from utils.catalog import load_movies
+from utils.cache import catalog_cache
+from utils.pagination import get_page_request, split_page
+from utils.http_cache import conditional
+from utils.ratings import average_rating, get_aggregates
+from utils.profile_views import cached_view, filter_items, visible_keys, with_restriction
+from utils.content import MOVIE_VIDEOS, poster, resolve_many
+from utils.similarity import SIMILAR_PER_TITLE, get_similar
 
 movies_bp = Blueprint("movies", __name__)
 
+MAX_BATCH_IDS = 200
 
-MOVIE_POSTERS = {
-    "The Dark Knight": "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg",
-    "Mad Max: Fury Road": "https://image.tmdb.org/t/p/w500/hA2ple9q4qnwxp3hKVNhroipsir.jpg",
-    "John Wick": "https://image.tmdb.org/t/p/w500/fZPSd91yGE9fCcCe6OoQr6E3Bev.jpg",
-    "The Shawshank Redemption": "https://image.tmdb.org/t/p/w500/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg",
-    "Forrest Gump": "https://image.tmdb.org/t/p/w500/arw2vcBveWOVZr6pxd9XTd1TdQa.jpg",
-    "The Green Mile": "https://image.tmdb.org/t/p/w500/velWPhVMQeQKcxggNEU8YmIo52R.jpg",
-    "Inception": "https://image.tmdb.org/t/p/w500/9gk7adHYeDvHkCSEqAvQNLV5Uge.jpg",
-    "The Matrix": "https://image.tmdb.org/t/p/w500/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
-    "Interstellar": "https://image.tmdb.org/t/p/w500/gEU2QniE6E77NI6lCU6MxlNBvIx.jpg",
-    "Blade Runner 2049": "https://image.tmdb.org/t/p/w500/gajva2L0rPYkEWjzgFlBXCAVBE5.jpg",
-    "The Grand Budapest Hotel": "https://image.tmdb.org/t/p/w500/eWdyYQreja6JGCzqHWXpWHDrrPo.jpg",
-    "Superbad": "https://image.tmdb.org/t/p/w500/ek8e8txUyUwd2BNqj6lFEerJfbq.jpg",
-    "Se7en": "https://image.tmdb.org/t/p/w500/6yoghtyTpznpBik8EngEmJskVUO.jpg",
-    "Gone Girl": "https://image.tmdb.org/t/p/w500/lv5xShBIDboxe4WqAjcv8L9FALz.jpg",
-    "Shutter Island": "https://image.tmdb.org/t/p/w500/4GDy0PHYX3VRXUtwK5ysFbg3kEx.jpg",
-    "The Conjuring": "https://image.tmdb.org/t/p/w500/wVYREutTvI2tmxr6ujrHT704wGF.jpg",
-    "A Quiet Place": "https://image.tmdb.org/t/p/w500/nAU74GmpUk7t5iklEp3bufwDq4n.jpg",
-    "The Notebook": "https://image.tmdb.org/t/p/w500/rNzQyW4f8B8cQeg7Dgj3n6eT5k9.jpg",
-    "La La Land": "https://image.tmdb.org/t/p/w500/uDO8zWDhfWwoFdKS4fzkUJt0Rf0.jpg",
-    "The Godfather": "https://image.tmdb.org/t/p/w500/3bhkrj58Vtu7enYsRolD1fZdja1.jpg",
-    "Pulp Fiction": "https://image.tmdb.org/t/p/w500/d5iIlFn5s0ImszYzBPb8JPIfbXD.jpg"
-}
-
-# Map movie titles to video URLs (for movies that have videos)
-MOVIE_VIDEOS = {
-    "The Dark Knight": "/videos/15097-261402819_small.mp4",
-    "Inception": "/videos/26452-358778857_small.mp4"
-}
 
 def transform_movie(movie):
     """Transform database movie format to API format"""
@@ -40,7 +19,7 @@ def transform_movie(movie):
         return None
     
     title = movie.get("Title", "")
-    poster_url = MOVIE_POSTERS.get(title, "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg")
+    url, images = poster("Movie", title)
     video_url = MOVIE_VIDEOS.get(title)  # Will be None if no video available
     
     return {
@@ -50,57 +29,161 @@ def transform_movie(movie):
         "release_year": movie.get("Release_Date").year if movie.get("Release_Date") else None,
         "duration": movie.get("Duration"),
         "age_rating": movie.get("Age_Rating"),
-        "average_rating": float(movie.get("average_rating")) if movie.get("average_rating") else 0,
-        "poster_url": poster_url,
+        "average_rating": average_rating("Movie", movie.get("Movie_Id"), movie.get("average_rating")),
+        "poster_url": url,
+        "poster": images,
         "video_url": video_url,
     }
 
-@movies_bp.route("/", methods=["GET"])
-def get_all_movies():
-    movies = fetch_all("SELECT * FROM movie")
+def content_key(item):
+    return ("Movie", item["movie_id"])
+
+
+def _transform_with_genres(rows):
     transformed_movies = []
-    
-    for m in movies:
+    # Warm the rating store for the whole listing with one query
+    get_aggregates("Movie", [r["Movie_Id"] for r in rows])
+    for m in rows:
         movie = transform_movie(m)
         if movie:
-            # Fetch genres for this movie
-            genres = fetch_all("""
-                SELECT g.Genre_Id, g.Genre_Name 
-                FROM genre g
-                JOIN movie_genre mg ON g.Genre_Id = mg.Genre_Id
-                WHERE mg.Movie_Id = %s
-            """, (movie['movie_id'],))
-            movie['genres'] = [{'genre_id': g['Genre_Id'], 'name': g['Genre_Name']} for g in genres]
+            movie['genres'] = m['genres']
             transformed_movies.append(movie)
-    
-    return jsonify({"success": True, "movies": transformed_movies})
+    return transformed_movies
+
+@movies_bp.route("/", methods=["GET"])
+@with_restriction
+@conditional("movies")
+def get_all_movies(restriction):
+    page = get_page_request()
+    if page is None:
+        transformed_movies = catalog_cache.get_or_load(
+            "movies:all", lambda: _transform_with_genres(load_movies())
+        )
+        transformed_movies = cached_view(catalog_cache, "movies:all", transformed_movies, restriction, content_key)
+        return jsonify({"success": True, "movies": transformed_movies})
+
+    def load_page():
+        rows, next_cursor = split_page(load_movies(page=page), page[0], ["Movie_Id"])
+        return {"movies": _transform_with_genres(rows), "next_cursor": next_cursor}
+
+    cache_key = f"movies:page:{request.args.get('cursor', '')}:{page[0]}"
+    result = catalog_cache.get_or_load(cache_key, load_page)
+    # A restricted page can come out short; next_cursor still continues after it
+    items = cached_view(catalog_cache, cache_key, result["movies"], restriction, content_key)
+    return jsonify({"success": True, "movies": items, "next_cursor": result["next_cursor"]})
 
 @movies_bp.route("/<int:movie_id>", methods=["GET"])
-def get_movie_by_id(movie_id):
-    movie = fetch_one("SELECT * FROM movie WHERE Movie_Id = %s", (movie_id,))
-    if movie:
-        transformed_movie = transform_movie(movie)
-        # Fetch genres for this movie
-        genres = fetch_all("""
-            SELECT g.Genre_Id, g.Genre_Name 
-            FROM genre g
-            JOIN movie_genre mg ON g.Genre_Id = mg.Genre_Id
-            WHERE mg.Movie_Id = %s
-        """, (movie_id,))
-        transformed_movie['genres'] = [{'genre_id': g['Genre_Id'], 'name': g['Genre_Name']} for g in genres]
+@with_restriction
+@conditional("movies")
+def get_movie_by_id(movie_id, restriction):
+    def load():
+        movies = _transform_with_genres(load_movies(ids=[movie_id]))
+        return movies[0] if movies else None
+
+    transformed_movie = catalog_cache.get_or_load(f"movie:{movie_id}", load)
+    if transformed_movie and not filter_items([transformed_movie], restriction, content_key):
+        return jsonify({"success": False, "message": "Movie not available for this profile"}), 403
+    if transformed_movie:
         return jsonify({"success": True, "movie": transformed_movie})
     else:
         return jsonify({"success": False, "message": "Movie not found"}), 404
 
 @movies_bp.route("/genre/<string:genre_name>", methods=["GET"])
-def get_movies_by_genre(genre_name):
-    query = """
-        SELECT m.* 
-        FROM movie m
-        JOIN movie_genre mg ON m.Movie_Id = mg.Movie_Id
-        JOIN genre g ON mg.Genre_Id = g.Genre_Id
-        WHERE g.Genre_Name = %s
-    """
-    movies = fetch_all(query, (genre_name,))
-    transformed_movies = [transform_movie(m) for m in movies]
+@with_restriction
+@conditional("movies")
+def get_movies_by_genre(genre_name, restriction):
+    transformed_movies = catalog_cache.get_or_load(
+        f"movies:genre:{genre_name}",
+        lambda: _transform_with_genres(load_movies(genre_name=genre_name)),
+    )
+    transformed_movies = cached_view(
+        catalog_cache, f"movies:genre:{genre_name}", transformed_movies, restriction, content_key
+    )
     return jsonify({"success": True, "movies": transformed_movies})
+
+
+def parse_ids():
+    """Ids from ?ids=1,2,3 without duplicates, in request order; None if malformed or too many"""
+    try:
+        ids = [int(v) for v in (request.args.get("ids") or "").split(",") if v.strip()]
+    except ValueError:
+        return None
+    ids = list(dict.fromkeys(ids))
+    return ids if 0 < len(ids) <= MAX_BATCH_IDS else None
+
+
+def get_many(prefix, ids, load_many, id_field, restriction, content_key):
+    """Look up many titles through the per-title catalog_cache entries.
+
+    Misses are loaded with one load_many(missing_ids) call, i.e. a single
+    IN query plus its genre query. Returns (items in request order,
+    ids not found, ids hidden by the restriction).
+    """
+    found = {}
+    missing = []
+    for item_id in ids:
+        item = catalog_cache.get(f"{prefix}:{item_id}")
+        if item is None:
+            missing.append(item_id)
+        else:
+            found[item_id] = item
+    if missing:
+        for item in load_many(missing):
+            catalog_cache.set(f"{prefix}:{item[id_field]}", item)
+            found[item[id_field]] = item
+
+    items, not_found, unavailable = [], [], []
+    for item_id in ids:
+        item = found.get(item_id)
+        if item is None:
+            not_found.append(item_id)
+        elif not filter_items([item], restriction, content_key):
+            unavailable.append(item_id)
+        else:
+            items.append(item)
+    return items, not_found, unavailable
+
+
+@movies_bp.route("/batch", methods=["GET"])
+@with_restriction
+@conditional("movies")
+def get_movies_batch(restriction):
+    """Many movies by id in one request: ?ids=1,2,3"""
+    ids = parse_ids()
+    if ids is None:
+        return jsonify({"success": False, "message": f"ids must be 1-{MAX_BATCH_IDS} comma-separated integers"}), 400
+    movies, not_found, unavailable = get_many(
+        "movie", ids, lambda missing: _transform_with_genres(load_movies(ids=missing)),
+        "movie_id", restriction, content_key,
+    )
+    return jsonify({"success": True, "movies": movies, "not_found": not_found, "unavailable": unavailable})
+
+
+def similar_titles(content_type, content_id, restriction):
+    """Precomputed "more like this" titles, resolved to API format"""
+    limit = max(1, min(request.args.get('limit', SIMILAR_PER_TITLE, type=int), SIMILAR_PER_TITLE))
+    ranked = get_similar(content_type, content_id)
+    contents = resolve_many(key for key, _ in ranked)
+    # Filtered before the limit, so restricted profiles still get `limit` titles when there are enough
+    allowed = visible_keys(contents, restriction)
+    ranked = [(key, score) for key, score in ranked if key in allowed][:limit]
+    return [
+        {
+            "content_type": key[0],
+            "content_id": key[1],
+            "title": contents[key]["title"],
+            "release_year": contents[key]["release_year"],
+            "age_rating": contents[key]["age_rating"],
+            "average_rating": contents[key]["average_rating"],
+            "poster_url": contents[key]["poster_url"],
+            "poster": contents[key]["poster"],
+            "score": score,
+        }
+        for key, score in ranked
+    ]
+
+
+@movies_bp.route("/<int:movie_id>/similar", methods=["GET"])
+@with_restriction
+def get_similar_movies(movie_id, restriction):
+    return jsonify({"success": True, "similar": similar_titles("Movie", movie_id, restriction)})
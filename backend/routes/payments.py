@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
-from db import execute_query, fetch_all, fetch_one
+from db import after_commit, execute_query, fetch_all, fetch_one
 from utils.auth_middleware import token_required
+from utils.pagination import get_page_request, paginated_query, split_page
+from utils.entitlements import invalidate_entitlement
 import uuid
 from datetime import datetime
 
@@ -33,6 +35,8 @@ def create_payment(current_user):
         VALUES (%s, %s, %s, %s, %s)
     """
     execute_query(query, (subscription_id, amount, payment_method, payment_status, transaction_id))
+    if payment_status == 'Completed':
+        after_commit(invalidate_entitlement, current_user)
     return jsonify({"success": True, "message": "Payment recorded", "transaction_id": transaction_id})
 
 
@@ -57,7 +61,12 @@ def get_user_payment_history(current_user):
         FROM payment p
         JOIN subscription s ON p.Subscription_Id = s.Subscription_Id
         WHERE s.User_Id = %s
-        ORDER BY p.Payment_Date DESC
     """
-    rows = fetch_all(query, (current_user,))
-    return jsonify({"success": True, "payments": rows})
+    page = get_page_request()
+    if page is None:
+        rows = fetch_all(query + " ORDER BY p.Payment_Date DESC", (current_user,))
+        return jsonify({"success": True, "payments": rows})
+
+    query, params = paginated_query(query, (current_user,), ["p.Payment_Date", "p.Payment_Id"], page)
+    rows, next_cursor = split_page(fetch_all(query, params), page[0], ["Payment_Date", "Payment_Id"])
+    return jsonify({"success": True, "payments": rows, "next_cursor": next_cursor})
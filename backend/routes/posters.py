@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify, make_response, request, send_file
+from werkzeug.security import safe_join
+from utils.posters import POSTER_STORE
+import os
+import re
+
+posters_bp = Blueprint('posters', __name__)
+
+# Files live under their content digest and never change in place, so
+# browsers and proxies may keep them forever without revalidating
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_DIGEST = re.compile(r"^[0-9a-f]{20}$")
+_FILENAME = re.compile(r"^(w\d+|placeholder|original)\.(jpg|jpeg|png|webp)$")
+
+
+@posters_bp.route('/<digest>/<filename>', methods=['GET'])
+def get_poster(digest, filename):
+    if not _DIGEST.match(digest) or not _FILENAME.match(filename):
+        return jsonify({"success": False, "message": "Poster not found"}), 404
+
+    # The URL already names the exact bytes, so the tag needs no file access
+    etag = f"{digest}-{filename}"
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        path = safe_join(POSTER_STORE, digest, filename)
+        if path is None or not os.path.isfile(path):
+            return jsonify({"success": False, "message": "Poster not found"}), 404
+        response = send_file(path, conditional=True, etag=False, last_modified=None)
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = IMMUTABLE
+    return response
@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
-from db import fetch_all, execute_query, fetch_one
+from db import after_commit, fetch_all, execute_query, fetch_one
 from utils.auth_middleware import token_required
+from utils.ownership import invalidate_user, owns_profile
+from utils.progress import watch_progress
+from utils.viewing_stats import delete_stats
+from utils.profile_views import invalidate_profile
 
 profile_bp = Blueprint('profiles', __name__)
 
@@ -32,6 +36,7 @@ def create_profile(current_user):
         VALUES (%s, %s, %s, %s, %s)
     """
     result = execute_query(query, (current_user, profile_name, profile_picture, language_pref, age_restriction))
+    after_commit(invalidate_user, current_user)
     
     # Get the newly created profile
     new_profile = fetch_one("SELECT * FROM profile WHERE Profile_Id = LAST_INSERT_ID()")
@@ -57,11 +62,14 @@ def list_profiles(current_user):
 def delete_profile(current_user, profile_id):
     try:
         # Verify the profile belongs to the current user
-        profile = fetch_one("SELECT Profile_Id FROM profile WHERE Profile_Id = %s AND User_Id = %s", (profile_id, current_user))
-        if not profile:
+        if not owns_profile(current_user, profile_id, fresh=True):
             return jsonify({"success": False, "message": "Profile not found or not owned by user"}), 404
 
         execute_query("DELETE FROM profile WHERE Profile_Id = %s AND User_Id = %s", (profile_id, current_user))
+        after_commit(invalidate_user, current_user)
+        after_commit(invalidate_profile, profile_id)
+        watch_progress.forget(profile_id)
+        delete_stats(profile_id)
         return jsonify({"success": True, "message": "Profile deleted successfully!"}), 200
         
     except Exception as e:
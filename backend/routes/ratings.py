@@ -1,12 +1,17 @@
 from flask import Blueprint, request, jsonify
-from db import execute_query, fetch_all, fetch_one
+from db import after_commit, execute_query, fetch_all, fetch_one
 from utils.auth_middleware import token_required
+from utils.ownership import profile_owner_required
+from utils.cache import invalidate_content
+from utils.pagination import get_page_request, paginated_query, split_page
+from utils.ratings import RATING_VALUES, apply_rating_change, get_aggregate, load_aggregate, summarize
 
 ratings_bp = Blueprint('ratings', __name__)
 
 
 @ratings_bp.route('/add', methods=['POST'])
 @token_required
+@profile_owner_required
 def add_rating(current_user):
     data = request.get_json()
     profile_id = data.get('profile_id')
@@ -18,36 +23,110 @@ def add_rating(current_user):
     if not (profile_id and content_type and content_id and rating is not None):
         return jsonify({"success": False, "message": "Missing required fields"}), 400
 
-    # Ensure profile belongs to the current user
-    owner = fetch_one("SELECT Profile_Id FROM profile WHERE Profile_Id = %s AND User_Id = %s", (profile_id, current_user))
-    if not owner:
-        return jsonify({"success": False, "message": "Profile not found or not owned by user"}), 403
+    rating = _parse_rating(rating)
+    if content_type not in ('Movie', 'TV_Show') or rating is None:
+        return jsonify({"success": False, "message": "Invalid content_type or rating"}), 400
 
     query = """
         INSERT INTO rating_review (Profile_Id, Content_Type, Content_Id, Rating, Review_Text)
         VALUES (%s, %s, %s, %s, %s)
     """
     execute_query(query, (profile_id, content_type, content_id, rating, review_text))
-    # Trigger will update average_rating automatically
-    return jsonify({"success": True, "message": "Rating submitted"})
+    # Same transaction as the insert, so the aggregate can't drift from rating_review
+    apply_rating_change(content_type, content_id, new=rating)
+    after_commit(invalidate_content, content_type, content_id)
+    return jsonify({
+        "success": True,
+        "message": "Rating submitted",
+        **summarize(load_aggregate(content_type, content_id)),
+    })
+
+
+def _parse_rating(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value in RATING_VALUES else None
+
+
+def _owned_review(review_id, user_id):
+    """The review row, locked until the request commits.
+
+    A concurrent edit or delete of the same review waits here and then
+    reads the committed result, so each change is folded into the
+    aggregate from the rating it actually replaced, once.
+    """
+    return fetch_one("""
+        SELECT rr.Review_Id, rr.Content_Type, rr.Content_Id, rr.Rating
+        FROM rating_review rr
+        JOIN profile p ON rr.Profile_Id = p.Profile_Id
+        WHERE rr.Review_Id = %s AND p.User_Id = %s
+        FOR UPDATE OF rr
+    """, (review_id, user_id))
+
+
+@ratings_bp.route('/<int:review_id>', methods=['PUT'])
+@token_required
+def update_rating(current_user, review_id):
+    data = request.get_json() or {}
+    review = _owned_review(review_id, current_user)
+    if not review:
+        return jsonify({"success": False, "message": "Rating not found or not owned by user"}), 404
+
+    rating = _parse_rating(data.get('rating', review['Rating']))
+    if rating is None:
+        return jsonify({"success": False, "message": "Invalid rating"}), 400
+
+    if 'review_text' in data:
+        execute_query("UPDATE rating_review SET Rating = %s, Review_Text = %s WHERE Review_Id = %s",
+                      (rating, data['review_text'], review_id))
+    else:
+        execute_query("UPDATE rating_review SET Rating = %s WHERE Review_Id = %s", (rating, review_id))
+
+    if rating != review['Rating']:
+        apply_rating_change(review['Content_Type'], review['Content_Id'], old=review['Rating'], new=rating)
+        after_commit(invalidate_content, review['Content_Type'], review['Content_Id'])
+    return jsonify({"success": True, "message": "Rating updated"})
+
+
+@ratings_bp.route('/<int:review_id>', methods=['DELETE'])
+@token_required
+def delete_rating(current_user, review_id):
+    review = _owned_review(review_id, current_user)
+    if not review:
+        return jsonify({"success": False, "message": "Rating not found or not owned by user"}), 404
+
+    execute_query("DELETE FROM rating_review WHERE Review_Id = %s", (review_id,))
+    apply_rating_change(review['Content_Type'], review['Content_Id'], old=review['Rating'])
+    after_commit(invalidate_content, review['Content_Type'], review['Content_Id'])
+    return jsonify({"success": True, "message": "Rating deleted"})
+
+
+@ratings_bp.route('/summary/<string:content_type>/<int:content_id>', methods=['GET'])
+def get_rating_summary(content_type, content_id):
+    """Average, count and 1-5 histogram for a title, from the aggregate store"""
+    if content_type not in ('Movie', 'TV_Show'):
+        return jsonify({"success": False, "message": "Invalid content_type"}), 400
+    return jsonify({"success": True, **summarize(get_aggregate(content_type, content_id))})
 
 
 @ratings_bp.route('/content/<string:content_type>/<int:content_id>', methods=['GET'])
 def list_ratings_for_content(content_type, content_id):
-    rows = fetch_all(
-        "SELECT rr.*, p.Profile_Name FROM rating_review rr JOIN profile p ON rr.Profile_Id = p.Profile_Id WHERE rr.Content_Type = %s AND rr.Content_Id = %s ORDER BY rr.Review_Date DESC",
-        (content_type, content_id),
-    )
-    return jsonify({"success": True, "ratings": rows})
+    query = "SELECT rr.*, p.Profile_Name FROM rating_review rr JOIN profile p ON rr.Profile_Id = p.Profile_Id WHERE rr.Content_Type = %s AND rr.Content_Id = %s"
+    page = get_page_request()
+    if page is None:
+        rows = fetch_all(query + " ORDER BY rr.Review_Date DESC", (content_type, content_id))
+        return jsonify({"success": True, "ratings": rows})
+
+    query, params = paginated_query(query, (content_type, content_id), ["rr.Review_Date", "rr.Review_Id"], page)
+    rows, next_cursor = split_page(fetch_all(query, params), page[0], ["Review_Date", "Review_Id"])
+    return jsonify({"success": True, "ratings": rows, "next_cursor": next_cursor})
 
 
 @ratings_bp.route('/profile/<int:profile_id>', methods=['GET'])
 @token_required
+@profile_owner_required
 def list_profile_ratings(current_user, profile_id):
-    # Ensure profile belongs to current user
-    owner = fetch_one("SELECT Profile_Id FROM profile WHERE Profile_Id = %s AND User_Id = %s", (profile_id, current_user))
-    if not owner:
-        return jsonify({"success": False, "message": "Profile not found or not owned by user"}), 403
-
     rows = fetch_all("SELECT * FROM rating_review WHERE Profile_Id = %s ORDER BY Review_Date DESC", (profile_id,))
     return jsonify({"success": True, "ratings": rows})
@@ -0,0 +1,66 @@
+from flask import Blueprint, jsonify, request
+from utils.auth_middleware import token_required
+from utils.ownership import profile_owner_required
+from utils.content import resolve_many
+from utils.profile_views import RESTRICTED_OVERFETCH, UNRESTRICTED, profile_restriction, visible_keys
+from utils.recommendations import recommend_for_profile
+
+recommendations_bp = Blueprint('recommendations', __name__)
+
+
+def transform_recommendation(key, score, content):
+    """A recommended title with its resolved content record"""
+    return {
+        "content_type": key[0],
+        "content_id": key[1],
+        "title": content["title"],
+        "description": content["description"],
+        "release_year": content["release_year"],
+        "age_rating": content["age_rating"],
+        "average_rating": content["average_rating"],
+        "poster_url": content["poster_url"],
+        "poster": content["poster"],
+        "score": round(score, 4),
+    }
+
+
+@recommendations_bp.route('/<int:profile_id>', methods=['GET'])
+@token_required
+@profile_owner_required
+def get_recommendations(current_user, profile_id):
+    """"Because you watched" rows and an overall list, merged from precomputed neighbours.
+
+    Only titles the profile's age and language restrictions allow are recommended.
+    """
+    row_size = max(1, min(request.args.get('row_size', 20, type=int), 50))
+    limit = max(1, min(request.args.get('limit', 40, type=int), 100))
+    restriction = profile_restriction(profile_id) or UNRESTRICTED
+    depth = 1 if restriction == UNRESTRICTED else RESTRICTED_OVERFETCH
+    rows, for_you = recommend_for_profile(profile_id, row_size * depth, limit * depth)
+
+    keys = [seed for seed, _ in rows]
+    keys += [key for _, items in rows for key, _ in items]
+    keys += [key for key, _ in for_you]
+    contents = resolve_many(keys)
+    allowed = visible_keys(contents, restriction)
+
+    def items(ranked, size):
+        return [
+            transform_recommendation(key, score, contents[key]) for key, score in ranked if key in allowed
+        ][:size]
+
+    return jsonify({
+        "success": True,
+        "rows": [
+            {
+                "because_you_watched": {
+                    "content_type": seed[0],
+                    "content_id": seed[1],
+                    "title": contents[seed]["title"],
+                },
+                "items": items(ranked, row_size),
+            }
+            for seed, ranked in rows if seed in contents
+        ],
+        "for_you": items(for_you, limit),
+    })
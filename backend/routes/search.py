@@ -0,0 +1,78 @@
+from flask import Blueprint, jsonify, request
+from utils.content import CONTENT_TABLES, resolve_many
+from utils.profile_views import RESTRICTED_OVERFETCH, UNRESTRICTED, visible_keys, with_restriction
+from utils.search import SUGGEST_SIZE, get_index
+import time
+
+search_bp = Blueprint('search', __name__)
+
+MAX_QUERY_LENGTH = 200
+
+
+def transform_search_hit(key, score, content):
+    """A ranked hit with its resolved content record"""
+    return {
+        "content_type": key[0],
+        "content_id": key[1],
+        "title": content["title"],
+        "description": content["description"],
+        "release_year": content["release_year"],
+        "age_rating": content["age_rating"],
+        "average_rating": content["average_rating"],
+        "poster_url": content["poster_url"],
+        "poster": content["poster"],
+        "score": score,
+    }
+
+
+def _query_args():
+    query = (request.args.get('q') or '').strip()[:MAX_QUERY_LENGTH]
+    content_type = request.args.get('type')
+    if content_type is not None and content_type not in CONTENT_TABLES:
+        return None, None, "type must be Movie or TV_Show"
+    return query, content_type, None
+
+
+@search_bp.route('/', methods=['GET'])
+@with_restriction
+def search(restriction):
+    """Ranked title/description search, served from the in-memory index"""
+    query, content_type, error = _query_args()
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    depth = 1 if restriction == UNRESTRICTED else RESTRICTED_OVERFETCH
+
+    index = get_index()
+    started = time.perf_counter()
+    hits = index.search(query, limit * depth, content_type)
+    took_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    contents = resolve_many(key for key, _ in hits)
+    allowed = visible_keys(contents, restriction)
+    results = [
+        transform_search_hit(key, score, contents[key])
+        for key, score in hits if key in allowed
+    ][:limit]
+    return jsonify({"success": True, "query": query, "results": results, "took_ms": took_ms})
+
+
+@search_bp.route('/suggest', methods=['GET'])
+@with_restriction
+def suggest(restriction):
+    """As-you-type title completions; the last word may be partial"""
+    query, _, error = _query_args()
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+    limit = max(1, min(request.args.get('limit', SUGGEST_SIZE, type=int), SUGGEST_SIZE))
+
+    index = get_index()
+    started = time.perf_counter()
+    # Suggestions are capped at SUGGEST_SIZE, so restricted profiles filter from the full set
+    suggestions = index.suggest(query, limit if restriction == UNRESTRICTED else SUGGEST_SIZE)
+    took_ms = round((time.perf_counter() - started) * 1000, 3)
+    if restriction != UNRESTRICTED:
+        contents = resolve_many((s["content_type"], s["content_id"]) for s in suggestions)
+        allowed = visible_keys(contents, restriction)
+        suggestions = [s for s in suggestions if (s["content_type"], s["content_id"]) in allowed][:limit]
+    return jsonify({"success": True, "query": query, "suggestions": suggestions, "took_ms": took_ms})
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
-from db import execute_query, fetch_all, fetch_one
+from db import after_commit, execute_query, fetch_all
 from utils.auth_middleware import token_required
+from utils.pagination import get_page_request, paginated_query, split_page
+from utils.http_cache import conditional
+from utils.entitlements import get_entitlement, invalidate_entitlement
 from datetime import datetime, timedelta
 
 subscriptions_bp = Blueprint('subscriptions', __name__)
@@ -25,6 +28,7 @@ SUBSCRIPTION_PLANS = [
 
 
 @subscriptions_bp.route('/plans', methods=['GET'])
+@conditional("plans")
 def get_plans():
     """Get available subscription plans"""
     return jsonify({"success": True, "plans": SUBSCRIPTION_PLANS})
@@ -55,6 +59,7 @@ def subscribe(current_user):
         VALUES (%s, %s, %s, %s, %s)
     """
     execute_query(query, (current_user, start_date, end_date, 0, 'Completed'))
+    after_commit(invalidate_entitlement, current_user)
     
     return jsonify({
         "success": True, 
@@ -81,13 +86,21 @@ def create_subscription(current_user):
 		VALUES (%s, %s, %s, %s, %s)
 	"""
 	execute_query(query, (current_user, start_date, end_date, int(bool(auto_renewal)), payment_status))
+	after_commit(invalidate_entitlement, current_user)
 	return jsonify({"success": True, "message": "Subscription created"})
 
 
 @subscriptions_bp.route('/list', methods=['GET'])
 @token_required
 def list_subscriptions(current_user):
-	rows = fetch_all("SELECT * FROM subscription WHERE User_Id = %s ORDER BY Start_Date DESC", (current_user,))
+	query = "SELECT * FROM subscription WHERE User_Id = %s"
+	page = get_page_request()
+	next_cursor = None
+	if page is None:
+		rows = fetch_all(query + " ORDER BY Start_Date DESC", (current_user,))
+	else:
+		query, params = paginated_query(query, (current_user,), ["Start_Date", "Subscription_Id"], page)
+		rows, next_cursor = split_page(fetch_all(query, params), page[0], ["Start_Date", "Subscription_Id"])
 	# Transform date objects to strings
 	subscriptions = []
 	for row in rows:
@@ -97,34 +110,20 @@ def list_subscriptions(current_user):
 		if sub.get('End_Date'):
 			sub['End_Date'] = str(sub['End_Date'])
 		subscriptions.append(sub)
-	return jsonify({"success": True, "subscriptions": subscriptions})
+	response = {"success": True, "subscriptions": subscriptions}
+	if page is not None:
+		response["next_cursor"] = next_cursor
+	return jsonify(response)
 
 
 @subscriptions_bp.route('/status', methods=['GET'])
 @token_required
 def subscription_status(current_user):
-	"""Get subscription status using database function"""
-	row = fetch_one("SELECT fn_GetSubscriptionStatus(%s) AS status", (current_user,))
-	status = row['status'] if row else 'None'
-	
-	# Get latest subscription details
-	latest_sub = fetch_one(
-		"SELECT * FROM subscription WHERE User_Id = %s ORDER BY Start_Date DESC LIMIT 1",
-		(current_user,)
-	)
-	
-	result = {
+	"""Get subscription status from the entitlement cache (one query on a miss)"""
+	entitlement = get_entitlement(current_user)
+	return jsonify({
 		"success": True,
-		"status": status,
-		"subscription": None
-	}
-	
-	if latest_sub:
-		result["subscription"] = {
-			"start_date": str(latest_sub['Start_Date']) if latest_sub.get('Start_Date') else None,
-			"end_date": str(latest_sub['End_Date']) if latest_sub.get('End_Date') else None,
-			"auto_renewal": bool(latest_sub.get('Auto_Renewal')),
-			"payment_status": latest_sub.get('Payment_Status')
-		}
-	
-	return jsonify(result)
+		"status": entitlement["status"],
+		"active_until": str(entitlement["active_until"]) if entitlement["active_until"] else None,
+		"subscription": entitlement["subscription"]
+	})
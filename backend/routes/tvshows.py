@@ -1,31 +1,15 @@
-from flask import Blueprint, jsonify
-from db import fetch_all, fetch_one
+from flask import Blueprint, jsonify, request
+from utils.catalog import load_tvshows
+from utils.cache import catalog_cache
+from utils.pagination import get_page_request, split_page
+from utils.http_cache import conditional
+from utils.ratings import average_rating, get_aggregates
+from utils.content import poster
+from utils.profile_views import cached_view, filter_items, with_restriction
+from routes.movies import MAX_BATCH_IDS, get_many, parse_ids, similar_titles
 
 tvshows_bp = Blueprint("tvshows", __name__)
 
-# Map TV show titles to their actual TMDB poster URLs
-TVSHOW_POSTERS = {
-    "Breaking Bad": "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg",
-    "Better Call Saul": "https://image.tmdb.org/t/p/w500/fC2HDm5t0kHl7mTm7jxMR31b7by.jpg",
-    "The Crown": "https://image.tmdb.org/t/p/w500/1M876KPjulVwppEpldhdc8V4o68.jpg",
-    "Stranger Things": "https://image.tmdb.org/t/p/w500/x2LSRK2Cm7MZhjluni1msVJ3wDF.jpg",
-    "Black Mirror": "https://image.tmdb.org/t/p/w500/5UaYsGZOFhjFDwQh6GuLjjA1WlF.jpg",
-    "Westworld": "https://image.tmdb.org/t/p/w500/8MfgyFHf7XEboZJPZXCIDqqiz6e.jpg",
-    "Narcos": "https://image.tmdb.org/t/p/w500/rTmal9fDbwh5F0waol2hq35U4ah.jpg",
-    "Peaky Blinders": "https://image.tmdb.org/t/p/w500/vUUqzWa2LnHIVqkaKVlVGkVcZIW.jpg",
-    "Ozark": "https://image.tmdb.org/t/p/w500/m73VMp0W5Z3Qn0VY5zyQ8FgJwmV.jpg",
-    "The Office": "https://image.tmdb.org/t/p/w500/qWnJzyZhyy74gjpSjIXWmuk0ifX.jpg",
-    "Brooklyn Nine-Nine": "https://image.tmdb.org/t/p/w500/hgRMSOt7a1b8qyQR68vUixJPang.jpg",
-    "Parks and Recreation": "https://image.tmdb.org/t/p/w500/dDuzrl9rUIBYieZjqmtbJc2hPqK.jpg",
-    "Mindhunter": "https://image.tmdb.org/t/p/w500/oKt4J3TFjWirVwBqoHyIvv5IImd.jpg",
-    "True Detective": "https://image.tmdb.org/t/p/w500/cuV2O5ZyDLHSOWzg3XNBvH3hNI.jpg",
-    "Game of Thrones": "https://image.tmdb.org/t/p/w500/1XS1oqL89opfnbLl8WnZY1O1uJx.jpg",
-    "The Witcher": "https://image.tmdb.org/t/p/w500/7vjaCdMw15FEbXyLQTVa04URsPm.jpg",
-    "The Boys": "https://image.tmdb.org/t/p/w500/stTEycfG9928HYGEISBFaG1ngjM.jpg",
-    "Jack Ryan": "https://image.tmdb.org/t/p/w500/6ovk8nrrSmN1ieT44D7Foable72.jpg",
-    "The Haunting of Hill House": "https://image.tmdb.org/t/p/w500/38PkhBGRQtmVx2drvPik3F42qHO.jpg",
-    "The Walking Dead": "https://image.tmdb.org/t/p/w500/xf9wuDcqlUPWABZNeDKPbZUjWx0.jpg"
-}
 
 def transform_tvshow(show):
     """Transform database TV show format to API format"""
@@ -33,7 +17,7 @@ def transform_tvshow(show):
         return None
     
     title = show.get("Title", "")
-    poster_url = TVSHOW_POSTERS.get(title, "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg")
+    url, images = poster("TV_Show", title)
     
     return {
         "tv_show_id": show.get("Show_Id"),
@@ -42,51 +26,98 @@ def transform_tvshow(show):
         "release_year": show.get("Release_Year"),
         "status": show.get("Status"),
         "age_rating": show.get("Age_Rating"),
-        "average_rating": float(show.get("average_rating")) if show.get("average_rating") else 0,
+        "average_rating": average_rating("TV_Show", show.get("Show_Id"), show.get("average_rating")),
         "total_seasons": 5,  # Default value
         "total_episodes": 50,  # Default value
-        "poster_url": poster_url,
+        "poster_url": url,
+        "poster": images,
     }
 
-@tvshows_bp.route("/", methods=["GET"])
-def get_all_tvshows():
-    shows = fetch_all("SELECT * FROM tv_show")
+def content_key(item):
+    return ("TV_Show", item["tv_show_id"])
+
+
+def _transform_with_genres(rows):
     transformed_shows = []
-    
-    for s in shows:
+    # Warm the rating store for the whole listing with one query
+    get_aggregates("TV_Show", [r["Show_Id"] for r in rows])
+    for s in rows:
         show = transform_tvshow(s)
         if show:
-            # Fetch genres for this TV show
-            genres = fetch_all("""
-                SELECT g.Genre_Id, g.Genre_Name 
-                FROM genre g
-                JOIN tvshow_genre tg ON g.Genre_Id = tg.Genre_Id
-                WHERE tg.Show_Id = %s
-            """, (show['tv_show_id'],))
-            show['genres'] = [{'genre_id': g['Genre_Id'], 'name': g['Genre_Name']} for g in genres]
+            show['genres'] = s['genres']
             transformed_shows.append(show)
-    
-    return jsonify({"success": True, "tv_shows": transformed_shows})
+    return transformed_shows
+
+@tvshows_bp.route("/", methods=["GET"])
+@with_restriction
+@conditional("tvshows")
+def get_all_tvshows(restriction):
+    page = get_page_request()
+    if page is None:
+        transformed_shows = catalog_cache.get_or_load(
+            "tvshows:all", lambda: _transform_with_genres(load_tvshows())
+        )
+        transformed_shows = cached_view(catalog_cache, "tvshows:all", transformed_shows, restriction, content_key)
+        return jsonify({"success": True, "tv_shows": transformed_shows})
+
+    def load_page():
+        rows, next_cursor = split_page(load_tvshows(page=page), page[0], ["Show_Id"])
+        return {"tv_shows": _transform_with_genres(rows), "next_cursor": next_cursor}
+
+    cache_key = f"tvshows:page:{request.args.get('cursor', '')}:{page[0]}"
+    result = catalog_cache.get_or_load(cache_key, load_page)
+    # A restricted page can come out short; next_cursor still continues after it
+    items = cached_view(catalog_cache, cache_key, result["tv_shows"], restriction, content_key)
+    return jsonify({"success": True, "tv_shows": items, "next_cursor": result["next_cursor"]})
 
 
 @tvshows_bp.route("/<int:show_id>", methods=["GET"])
-def get_tvshow_by_id(show_id):
-    show = fetch_one("SELECT * FROM tv_show WHERE Show_Id = %s", (show_id,))
+@with_restriction
+@conditional("tvshows")
+def get_tvshow_by_id(show_id, restriction):
+    def load():
+        shows = _transform_with_genres(load_tvshows(ids=[show_id]))
+        return shows[0] if shows else None
+
+    show = catalog_cache.get_or_load(f"tvshow:{show_id}", load)
+    if show and not filter_items([show], restriction, content_key):
+        return jsonify({"success": False, "message": "TV Show not available for this profile"}), 403
     if show:
-        return jsonify({"success": True, "tv_show": transform_tvshow(show)})
+        return jsonify({"success": True, "tv_show": show})
     else:
         return jsonify({"success": False, "message": "TV Show not found"}), 404
     
 
 @tvshows_bp.route("/genre/<string:genre_name>", methods=["GET"])
-def get_tvshows_by_genre(genre_name):
-    query = """
-        SELECT t.* 
-        FROM tv_show t
-        JOIN tvshow_genre tg ON t.Show_Id = tg.Show_Id
-        JOIN genre g ON tg.Genre_Id = g.Genre_Id
-        WHERE g.Genre_Name = %s
-    """
-    shows = fetch_all(query, (genre_name,))
-    transformed_shows = [transform_tvshow(s) for s in shows]
-    return jsonify({"success": True, "tv_shows": transformed_shows})
\ No newline at end of file
+@with_restriction
+@conditional("tvshows")
+def get_tvshows_by_genre(genre_name, restriction):
+    transformed_shows = catalog_cache.get_or_load(
+        f"tvshows:genre:{genre_name}",
+        lambda: _transform_with_genres(load_tvshows(genre_name=genre_name)),
+    )
+    transformed_shows = cached_view(
+        catalog_cache, f"tvshows:genre:{genre_name}", transformed_shows, restriction, content_key
+    )
+    return jsonify({"success": True, "tv_shows": transformed_shows})
+
+
+@tvshows_bp.route("/batch", methods=["GET"])
+@with_restriction
+@conditional("tvshows")
+def get_tvshows_batch(restriction):
+    """Many TV shows by id in one request: ?ids=1,2,3"""
+    ids = parse_ids()
+    if ids is None:
+        return jsonify({"success": False, "message": f"ids must be 1-{MAX_BATCH_IDS} comma-separated integers"}), 400
+    shows, not_found, unavailable = get_many(
+        "tvshow", ids, lambda missing: _transform_with_genres(load_tvshows(ids=missing)),
+        "tv_show_id", restriction, content_key,
+    )
+    return jsonify({"success": True, "tv_shows": shows, "not_found": not_found, "unavailable": unavailable})
+
+
+@tvshows_bp.route("/<int:show_id>/similar", methods=["GET"])
+@with_restriction
+def get_similar_tvshows(show_id, restriction):
+    return jsonify({"success": True, "similar": similar_titles("TV_Show", show_id, restriction)})
@@ -1,7 +1,8 @@
 
 from flask import Blueprint, request, jsonify
 from db import fetch_all, execute_query
-import bcrypt
+from utils.auth_middleware import get_bearer_token, revoke_token
+from utils.hashing import hash_password, check_password
 import jwt
 import datetime
 import os
@@ -27,7 +28,7 @@ def signup():
     if existing_user:
         return jsonify({"success": False, "message": "User already exists!"}), 400
 
-    hashed_pw = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    hashed_pw = hash_password(password)
 
 
     query = "INSERT INTO user (Name, DOB, Country, Email) VALUES (%s, %s, %s, %s)"
@@ -52,7 +53,7 @@ def login():
     user = user[0]
 
 
-    if not bcrypt.checkpw(password.encode("utf-8"), user["Password"].encode("utf-8")):
+    if not check_password(password, user["Password"]):
         return jsonify({"success": False, "message": "Invalid email or password"}), 401
 
 
@@ -80,4 +81,7 @@ def login():
 
 @user_bp.route("/logout", methods=["POST"])
 def logout():
+    token = get_bearer_token()
+    if token:
+        revoke_token(token)
     return jsonify({"success": True, "message": "User logged out successfully!"})
\ No newline at end of file
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from db import fetch_one, execute_query
 from utils.auth_middleware import token_required
-import bcrypt
+from utils.hashing import hash_password, check_password
 
 users_bp = Blueprint('users', __name__)
 
@@ -65,11 +65,11 @@ def change_password(current_user):
     if not user:
         return jsonify({"success": False, "message": "User not found"}), 404
 
-    if not bcrypt.checkpw(old_password.encode("utf-8"), user["Password"].encode("utf-8")):
+    if not check_password(old_password, user["Password"]):
         return jsonify({"success": False, "message": "Old password is incorrect"}), 401
 
     # Hash new password
-    hashed_pw = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    hashed_pw = hash_password(new_password)
     execute_query("UPDATE user SET Password = %s WHERE User_Id = %s", (hashed_pw, current_user))
 
     return jsonify({"success": True, "message": "Password changed successfully"})
@@ -1,46 +1,34 @@
 from flask import Blueprint, request, jsonify
-from db import execute_query, fetch_all, fetch_one, call_procedure
+from db import execute_query, fetch_all, fetch_one
 from utils.auth_middleware import token_required
+from utils.ownership import profile_owner_required
+from utils.pagination import get_page_request, paginated_query, split_page
+from utils.ingest import BatchWriter
+from utils.progress import watch_progress
+from utils.viewing_stats import fold_views, get_stats, remove_view
+from utils.content import DEFAULT_POSTERS, resolve_many
+from datetime import datetime
+import os
 
 viewing_history_bp = Blueprint('viewing_history', __name__)
 
-# Poster mappings
-MOVIE_POSTERS = {
-    "The Dark Knight": "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg",
-    "Mad Max: Fury Road": "https://image.tmdb.org/t/p/w500/hA2ple9q4qnwxp3hKVNhroipsir.jpg",
-    "John Wick": "https://image.tmdb.org/t/p/w500/fZPSd91yGE9fCcCe6OoQr6E3Bev.jpg",
-    "The Shawshank Redemption": "https://image.tmdb.org/t/p/w500/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg",
-    "Forrest Gump": "https://image.tmdb.org/t/p/w500/arw2vcBveWOVZr6pxd9XTd1TdQa.jpg",
-    "The Green Mile": "https://image.tmdb.org/t/p/w500/velWPhVMQeQKcxggNEU8YmIo52R.jpg",
-    "Inception": "https://image.tmdb.org/t/p/w500/9gk7adHYeDvHkCSEqAvQNLV5Uge.jpg",
-    "The Matrix": "https://image.tmdb.org/t/p/w500/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
-    "Interstellar": "https://image.tmdb.org/t/p/w500/gEU2QniE6E77NI6lCU6MxlNBvIx.jpg",
-    "Blade Runner 2049": "https://image.tmdb.org/t/p/w500/gajva2L0rPYkEWjzgFlBXCAVBE5.jpg",
-    "The Grand Budapest Hotel": "https://image.tmdb.org/t/p/w500/eWdyYQreja6JGCzqHWXpWHDrrPo.jpg",
-    "Superbad": "https://image.tmdb.org/t/p/w500/ek8e8txUyUwd2BNqj6lFEerJfbq.jpg",
-    "Se7en": "https://image.tmdb.org/t/p/w500/6yoghtyTpznpBik8EngEmJskVUO.jpg",
-    "Gone Girl": "https://image.tmdb.org/t/p/w500/lv5xShBIDboxe4WqAjcv8L9FALz.jpg",
-    "Shutter Island": "https://image.tmdb.org/t/p/w500/4GDy0PHYX3VRXUtwK5ysFbg3kEx.jpg",
-    "The Conjuring": "https://image.tmdb.org/t/p/w500/wVYREutTvI2tmxr6ujrHT704wGF.jpg",
-    "A Quiet Place": "https://image.tmdb.org/t/p/w500/nAU74GmpUk7t5iklEp3bufwDq4n.jpg",
-    "The Notebook": "https://image.tmdb.org/t/p/w500/rNzQyW4f8B8cQeg7Dgj3n6eT5k9.jpg",
-    "La La Land": "https://image.tmdb.org/t/p/w500/uDO8zWDhfWwoFdKS4fzkUJt0Rf0.jpg",
-    "The Godfather": "https://image.tmdb.org/t/p/w500/3bhkrj58Vtu7enYsRolD1fZdja1.jpg",
-    "Pulp Fiction": "https://image.tmdb.org/t/p/w500/d5iIlFn5s0ImszYzBPb8JPIfbXD.jpg"
-}
-
-TVSHOW_POSTERS = {
-    "Breaking Bad": "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg",
-    "Better Call Saul": "https://image.tmdb.org/t/p/w500/fC2HDm5t0kHl7mTm7jxMR31b7by.jpg",
-    "The Crown": "https://image.tmdb.org/t/p/w500/1M876KPjulVwppEpldhdc8V4o68.jpg",
-    "Stranger Things": "https://image.tmdb.org/t/p/w500/x2LSRK2Cm7MZhjluni1msVJ3wDF.jpg",
-    "Black Mirror": "https://image.tmdb.org/t/p/w500/5UaYsGZOFhjFDwQix4jKEo3f8oN.jpg",
-    "Game of Thrones": "https://image.tmdb.org/t/p/w500/1XS1oqL89opfnbLl8WnZY1O1uJx.jpg",
-}
+# Viewing events are acknowledged immediately and inserted in batches
+viewing_writer = BatchWriter(
+    "viewing_history",
+    """
+        INSERT INTO viewing_history (Profile_Id, Content_Type, Content_Id, Watch_Duration, Watch_Date)
+        VALUES (%s, %s, %s, %s, %s)
+    """,
+    batch_size=int(os.getenv("VIEWING_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("VIEWING_FLUSH_INTERVAL", "1.0")),
+    max_queue=int(os.getenv("VIEWING_QUEUE_SIZE", "20000")),
+    after_write=fold_views,
+)
 
 
 @viewing_history_bp.route('/log', methods=['POST'])
 @token_required
+@profile_owner_required
 def log_viewing(current_user):
     data = request.get_json()
     profile_id = data.get('profile_id')
@@ -51,64 +39,111 @@ def log_viewing(current_user):
     if not (profile_id and content_type and content_id):
         return jsonify({"success": False, "message": "Missing required fields"}), 400
 
-    # Ensure profile belongs to the current user
-    owner = fetch_one("SELECT Profile_Id FROM profile WHERE Profile_Id = %s AND User_Id = %s", (profile_id, current_user))
-    if not owner:
-        return jsonify({"success": False, "message": "Profile not found or not owned by user"}), 403
+    if content_type not in ('Movie', 'TV_Show'):
+        return jsonify({"success": False, "message": "Invalid content_type"}), 400
+    try:
+        row = (int(profile_id), content_type, int(content_id),
+               int(watch_duration) if watch_duration is not None else None, datetime.now())
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "Invalid field values"}), 400
+
+    # Timestamped now so history order is unaffected by when the batch lands
+    viewing_writer.submit(row)
+    return jsonify({"success": True, "message": "Viewing logged"}), 202
 
-    query = """
-        INSERT INTO viewing_history (Profile_Id, Content_Type, Content_Id, Watch_Duration)
-        VALUES (%s, %s, %s, %s)
-    """
-    execute_query(query, (profile_id, content_type, content_id, watch_duration))
-    return jsonify({"success": True, "message": "Viewing logged"})
+
+@viewing_history_bp.route('/heartbeat', methods=['POST'])
+@token_required
+@profile_owner_required
+def heartbeat(current_user):
+    """Record the current playback position; players call this every few seconds"""
+    data = request.get_json() or {}
+    profile_id = data.get('profile_id')
+    content_type = data.get('content_type')
+    content_id = data.get('content_id')
+    position = data.get('position')  # in seconds
+    duration = data.get('duration')  # in seconds, optional
+
+    if not (profile_id and content_type and content_id) or position is None:
+        return jsonify({"success": False, "message": "Missing required fields"}), 400
+
+    if content_type not in ('Movie', 'TV_Show'):
+        return jsonify({"success": False, "message": "Invalid content_type"}), 400
+    try:
+        profile_id, content_id = int(profile_id), int(content_id)
+        position = int(float(position))
+        duration = int(float(duration)) if duration is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "Invalid field values"}), 400
+    if position < 0 or (duration is not None and duration <= 0):
+        return jsonify({"success": False, "message": "Invalid field values"}), 400
+
+    watch_progress.heartbeat(profile_id, content_type, content_id, position, duration)
+    return jsonify({"success": True}), 202
+
+
+def _transform_progress(item, content):
+    return {
+        "content_type": item["content_type"],
+        "content_id": item["content_id"],
+        "title": content["title"] if content else '',
+        "poster_url": content["poster_url"] if content else DEFAULT_POSTERS[item["content_type"]],
+        "poster": content["poster"] if content else None,
+        "position": item["position"],
+        "duration": item["duration"],
+        "updated_at": item["updated_at"],
+    }
+
+
+@viewing_history_bp.route('/continue/<int:profile_id>', methods=['GET'])
+@token_required
+@profile_owner_required
+def continue_watching(current_user, profile_id):
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    items = watch_progress.continue_watching(profile_id, limit)
+    contents = resolve_many((i["content_type"], i["content_id"]) for i in items)
+    return jsonify({"success": True, "items": [
+        _transform_progress(i, contents.get((i["content_type"], i["content_id"]))) for i in items
+    ]})
+
+
+@viewing_history_bp.route('/progress/<int:profile_id>/<content_type>/<int:content_id>', methods=['GET'])
+@token_required
+@profile_owner_required
+def get_progress(current_user, profile_id, content_type, content_id):
+    """Resume position for one title (0 if never started)"""
+    for item in watch_progress.positions(profile_id):
+        if item["content_type"] == content_type and item["content_id"] == content_id:
+            return jsonify({"success": True, "position": item["position"], "duration": item["duration"]})
+    return jsonify({"success": True, "position": 0, "duration": None})
 
 
 @viewing_history_bp.route('/profile/<int:profile_id>', methods=['GET'])
 @token_required
+@profile_owner_required
 def get_viewing_history(current_user, profile_id):
-    # Ensure profile belongs to current user
-    owner = fetch_one("SELECT Profile_Id FROM profile WHERE Profile_Id = %s AND User_Id = %s", (profile_id, current_user))
-    if not owner:
-        return jsonify({"success": False, "message": "Profile not found or not owned by user"}), 403
+    # Single-table query; titles and posters come from the content resolver
+    query = "SELECT vh.* FROM viewing_history vh WHERE vh.Profile_Id = %s"
+    page = get_page_request()
+    next_cursor = None
+    if page is None:
+        rows = fetch_all(query + " ORDER BY vh.Watch_Date DESC", (profile_id,))
+    else:
+        query, params = paginated_query(query, (profile_id,), ["vh.Watch_Date", "vh.History_Id"], page)
+        rows, next_cursor = split_page(fetch_all(query, params), page[0], ["Watch_Date", "History_Id"])
 
-    # Use stored procedure to get watch history
-    try:
-        results = call_procedure('sp_GetWatchHistory', (profile_id,))
-        # Add poster URLs to results
-        for item in results:
-            title = item.get('Title', '')
-            content_type = item.get('Content_Type', '')
-            if content_type == 'Movie':
-                item['poster_url'] = MOVIE_POSTERS.get(title, "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg")
-            else:
-                item['poster_url'] = TVSHOW_POSTERS.get(title, "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg")
-        return jsonify({"success": True, "history": results})
-    except Exception as e:
-        print(f"Stored procedure error: {e}, using fallback query")
-        # Fallback to direct query if procedure doesn't exist
-        query = """
-            SELECT vh.*, 
-                   CASE 
-                       WHEN vh.Content_Type = 'Movie' THEN m.Title
-                       WHEN vh.Content_Type = 'TV_Show' THEN t.Title
-                   END AS Title
-            FROM viewing_history vh
-            LEFT JOIN movie m ON vh.Content_Type = 'Movie' AND vh.Content_Id = m.Movie_Id
-            LEFT JOIN tv_show t ON vh.Content_Type = 'TV_Show' AND vh.Content_Id = t.Show_Id
-            WHERE vh.Profile_Id = %s
-            ORDER BY vh.Watch_Date DESC
-        """
-        rows = fetch_all(query, (profile_id,))
-        # Add poster URLs to results
-        for item in rows:
-            title = item.get('Title', '')
-            content_type = item.get('Content_Type', '')
-            if content_type == 'Movie':
-                item['poster_url'] = MOVIE_POSTERS.get(title, "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg")
-            else:
-                item['poster_url'] = TVSHOW_POSTERS.get(title, "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg")
-        return jsonify({"success": True, "history": rows})
+    contents = resolve_many((r["Content_Type"], r["Content_Id"]) for r in rows)
+    for item in rows:
+        content = contents.get((item["Content_Type"], item["Content_Id"]))
+        item['Title'] = content["title"] if content else None
+        item['Duration'] = content["duration"] if content and item["Content_Type"] == 'Movie' else None
+        item['poster_url'] = content["poster_url"] if content else DEFAULT_POSTERS.get(item["Content_Type"], DEFAULT_POSTERS["Movie"])
+        item['poster'] = content["poster"] if content else None
+
+    response = {"success": True, "history": rows}
+    if page is not None:
+        response["next_cursor"] = next_cursor
+    return jsonify(response)
 
 
 @viewing_history_bp.route('/delete/<int:history_id>', methods=['DELETE'])
@@ -116,7 +151,7 @@ def get_viewing_history(current_user, profile_id):
 def delete_viewing_entry(current_user, history_id):
     # Verify the history entry belongs to a profile owned by current user
     entry = fetch_one("""
-        SELECT vh.History_Id 
+        SELECT vh.History_Id, vh.Profile_Id, vh.Content_Type, vh.Content_Id, vh.Watch_Duration, vh.Watch_Date
         FROM viewing_history vh
         JOIN profile p ON vh.Profile_Id = p.Profile_Id
         WHERE vh.History_Id = %s AND p.User_Id = %s
@@ -126,4 +161,13 @@ def delete_viewing_entry(current_user, history_id):
         return jsonify({"success": False, "message": "History entry not found or not owned by user"}), 404
 
     execute_query("DELETE FROM viewing_history WHERE History_Id = %s", (history_id,))
+    remove_view(entry)
     return jsonify({"success": True, "message": "History entry deleted"})
+
+
+@viewing_history_bp.route('/stats/<int:profile_id>', methods=['GET'])
+@token_required
+@profile_owner_required
+def get_viewing_stats(current_user, profile_id):
+    """Watch minutes, titles, per-genre minutes and streaks, from the materialized tables"""
+    return jsonify({"success": True, "stats": get_stats(profile_id)})
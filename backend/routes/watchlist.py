@@ -1,52 +1,43 @@
 from flask import Blueprint, request, jsonify
-from db import execute_query, fetch_query, call_procedure, fetch_one
+from db import execute_query, fetch_query, call_procedure, transaction
 from utils.auth_middleware import token_required
+from utils.ownership import profile_owner_required
+from utils.pagination import get_page_request, paginated_query, split_page
+from utils.content import CONTENT_TABLES, DEFAULT_POSTERS, resolve_many
 
 watchlist_bp = Blueprint('watchlist', __name__)
 
-# Poster mappings
-MOVIE_POSTERS = {
-    "The Dark Knight": "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg",
-    "Inception": "https://image.tmdb.org/t/p/w500/9gk7adHYeDvHkCSEqAvQNLV5Uge.jpg",
-    "The Shawshank Redemption": "https://image.tmdb.org/t/p/w500/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg",
-    "Pulp Fiction": "https://image.tmdb.org/t/p/w500/d5iIlFn5s0ImszYzBPb8JPIfbXD.jpg",
-    "The Godfather": "https://image.tmdb.org/t/p/w500/3bhkrj58Vtu7enYsRolD1fZdja1.jpg",
-    "Interstellar": "https://image.tmdb.org/t/p/w500/gEU2QniE6E77NI6lCU6MxlNBvIx.jpg",
-    "The Matrix": "https://image.tmdb.org/t/p/w500/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
-    "Forrest Gump": "https://image.tmdb.org/t/p/w500/arw2vcBveWOVZr6pxd9XTd1TdQa.jpg",
-}
-
-TVSHOW_POSTERS = {
-    "Breaking Bad": "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg",
-    "Game of Thrones": "https://image.tmdb.org/t/p/w500/1XS1oqL89opfnbLl8WnZY1O1uJx.jpg",
-    "Stranger Things": "https://image.tmdb.org/t/p/w500/x2LSRK2Cm7MZhjluni1msVJ3wDF.jpg",
-}
-
-def transform_watchlist_item(item):
-    """Transform database format to API format with poster"""
+MAX_BULK_OPERATIONS = 1000
+
+def transform_watchlist_item(item, content):
+    """Transform a watchlist row plus its resolved content record to API format"""
     if not item:
         return None
-    
-    title = item.get("Title", "")
+
     content_type = item.get("Content_Type", "")
-    
-    # Get poster based on content type
-    if content_type == "Movie":
-        poster_url = MOVIE_POSTERS.get(title, "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg")
-    else:
-        poster_url = TVSHOW_POSTERS.get(title, "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg")
-    
-    return {
+    result = {
         "watchlist_id": item.get("Watchlist_Id"),
         "content_type": content_type,
         "content_id": item.get("Content_Id"),
-        "title": title,
+        "title": content["title"] if content else None,
         "date_added": str(item.get("Date_Added")) if item.get("Date_Added") else None,
-        "poster_url": poster_url
+        "poster_url": content["poster_url"] if content else DEFAULT_POSTERS.get(content_type, DEFAULT_POSTERS["Movie"]),
+        "poster": content["poster"] if content else None,
     }
+    # Add movie_id or tv_show_id for frontend
+    if content and content_type == "Movie":
+        result["movie_id"] = content["content_id"]
+        result["average_rating"] = content["average_rating"]
+        result["release_year"] = content["release_year"]
+        result["duration"] = content["duration"]
+    elif content:
+        result["tv_show_id"] = content["content_id"]
+        result["average_rating"] = content["average_rating"]
+    return result
 
 @watchlist_bp.route("/add", methods=["POST"])
 @token_required
+@profile_owner_required
 def add_to_watchlist(current_user):
     data = request.get_json()
     profile_id = data.get("profile_id")
@@ -62,11 +53,6 @@ def add_to_watchlist(current_user):
         print(f"Missing fields! profile_id={profile_id}, content_type={content_type}, content_id={content_id}")
         return jsonify({"success": False, "message": "Missing required fields"}), 400
 
-    # Ensure profile belongs to current user
-    owner = fetch_one("SELECT Profile_Id FROM profile WHERE Profile_Id = %s AND User_Id = %s", (profile_id, current_user))
-    if not owner:
-        return jsonify({"success": False, "message": "Profile not found or not owned by user"}), 403
-
     # Use stored procedure to add to watchlist
     try:
         call_procedure('sp_AddToWatchlist', (int(profile_id), content_type, int(content_id)))
@@ -95,54 +81,144 @@ def remove_from_watchlist(current_user):
     return jsonify({"success": True, "message": "Removed from watchlist"})
 
 
+def _parse_operation(op):
+    """(op, (Content_Type, Content_Id)) or None for a malformed entry"""
+    if not isinstance(op, dict) or op.get("op") not in ("add", "remove"):
+        return None
+    content_type = op.get("content_type")
+    try:
+        content_id = int(op.get("content_id"))
+    except (TypeError, ValueError):
+        return None
+    if content_type not in CONTENT_TABLES:
+        return None
+    return op["op"], (content_type, content_id)
+
+
+@watchlist_bp.route("/bulk", methods=["POST"])
+@token_required
+@profile_owner_required
+def bulk_update_watchlist(current_user):
+    """Apply a list of add/remove operations to one profile's watchlist atomically.
+
+    Operations are applied in order against the current list, so the whole
+    batch costs one read, one executemany per kind of change and one
+    commit. Every operation gets its own result: added, already_present,
+    removed, not_present, not_found (unknown title) or invalid.
+    """
+    data = request.get_json(silent=True) or {}
+    profile_id = data.get("profile_id")
+    operations = data.get("operations")
+    if not profile_id or not isinstance(operations, list):
+        return jsonify({"success": False, "message": "profile_id and operations are required"}), 400
+    if len(operations) > MAX_BULK_OPERATIONS:
+        return jsonify({"success": False, "message": f"At most {MAX_BULK_OPERATIONS} operations per request"}), 400
+
+    parsed = [_parse_operation(op) for op in operations]
+    keys = {p[1] for p in parsed if p is not None}
+    known = resolve_many(keys)
+
+    results = []
+    inserts = {}  # insertion-ordered set
+    deletes = set()
+    with transaction() as uow:
+        present = set()
+        if keys:
+            by_type = {}
+            for content_type, content_id in keys:
+                by_type.setdefault(content_type, []).append(content_id)
+            for content_type, ids in by_type.items():
+                placeholders = ", ".join(["%s"] * len(ids))
+                for row in fetch_query(f"""
+                    SELECT Content_Id FROM watchlist
+                    WHERE Profile_Id = %s AND Content_Type = %s AND Content_Id IN ({placeholders})
+                """, (profile_id, content_type, *ids)):
+                    present.add((content_type, row["Content_Id"]))
+
+        for op, parsed_op in zip(operations, parsed):
+            if parsed_op is None:
+                raw = op if isinstance(op, dict) else {}
+                results.append({
+                    "op": raw.get("op"),
+                    "content_type": raw.get("content_type"),
+                    "content_id": raw.get("content_id"),
+                    "status": "invalid",
+                })
+                continue
+            action, key = parsed_op
+            if action == "add":
+                if key not in known:
+                    status = "not_found"
+                elif key in present:
+                    status = "already_present"
+                else:
+                    present.add(key)
+                    if key in deletes:
+                        deletes.discard(key)  # removed and re-added in this batch: the row just stays
+                    else:
+                        inserts[key] = True
+                    status = "added"
+            else:
+                if key in present:
+                    present.discard(key)
+                    if key in inserts:
+                        del inserts[key]
+                    else:
+                        deletes.add(key)
+                    status = "removed"
+                else:
+                    status = "not_present"
+            results.append({"op": action, "content_type": key[0], "content_id": key[1], "status": status})
+
+        cursor = uow.conn.cursor()
+        try:
+            if deletes:
+                cursor.executemany("""
+                    DELETE FROM watchlist
+                    WHERE Profile_Id = %s AND Content_Type = %s AND Content_Id = %s
+                """, [(profile_id, content_type, content_id) for content_type, content_id in deletes])
+            if inserts:
+                cursor.executemany("""
+                    INSERT INTO watchlist (Profile_Id, Content_Type, Content_Id, Date_Added)
+                    VALUES (%s, %s, %s, CURDATE())
+                """, [(profile_id, content_type, content_id) for content_type, content_id in inserts])
+        finally:
+            cursor.close()
+        uow.dirty = uow.dirty or bool(deletes or inserts)
+
+    return jsonify({
+        "success": True,
+        "added": len(inserts),
+        "removed": len(deletes),
+        "results": results,
+    })
+
+
+WATCHLIST_QUERY = """
+    SELECT w.Watchlist_Id, w.Content_Type, w.Content_Id, w.Date_Added
+    FROM watchlist w
+    WHERE w.Profile_Id = %s
+"""
+
+
 @watchlist_bp.route("/all/<int:profile_id>", methods=["GET"])
 @token_required
 def get_watchlist(current_user, profile_id):
-    query = """
-        SELECT w.Watchlist_Id, w.Content_Type, w.Content_Id, w.Date_Added,
-               CASE 
-                   WHEN w.Content_Type = 'Movie' THEN m.Title
-                   WHEN w.Content_Type = 'TV_Show' THEN t.Title
-               END AS Title,
-               CASE 
-                   WHEN w.Content_Type = 'Movie' THEN m.Movie_Id
-                   ELSE NULL
-               END AS Movie_Id,
-               CASE 
-                   WHEN w.Content_Type = 'TV_Show' THEN t.Show_Id
-                   ELSE NULL
-               END AS Show_Id,
-               CASE 
-                   WHEN w.Content_Type = 'Movie' THEN m.average_rating
-                   WHEN w.Content_Type = 'TV_Show' THEN t.average_rating
-               END AS average_rating,
-               CASE 
-                   WHEN w.Content_Type = 'Movie' THEN m.Release_Date
-                   ELSE NULL
-               END AS Release_Date,
-               CASE 
-                   WHEN w.Content_Type = 'Movie' THEN m.Duration
-                   ELSE NULL
-               END AS Duration
-        FROM watchlist w
-        LEFT JOIN movie m ON w.Content_Type = 'Movie' AND w.Content_Id = m.Movie_Id
-        LEFT JOIN tv_show t ON w.Content_Type = 'TV_Show' AND w.Content_Id = t.Show_Id
-        WHERE w.Profile_Id = %s
-        ORDER BY w.Date_Added DESC
-    """
-    results = fetch_query(query, (profile_id,))
-    transformed = []
-    for r in results:
-        item = transform_watchlist_item(r)
-        # Add movie_id or tv_show_id for frontend
-        if r.get("Movie_Id"):
-            item["movie_id"] = r.get("Movie_Id")
-            item["average_rating"] = float(r.get("average_rating", 0)) if r.get("average_rating") else 0
-            item["release_year"] = r.get("Release_Date").year if r.get("Release_Date") else None
-            item["duration"] = r.get("Duration")
-        elif r.get("Show_Id"):
-            item["tv_show_id"] = r.get("Show_Id")
-            item["average_rating"] = float(r.get("average_rating", 0)) if r.get("average_rating") else 0
-        transformed.append(item)
-    return jsonify({"success": True, "watchlist": transformed})
+    query = WATCHLIST_QUERY
+    page = get_page_request()
+    next_cursor = None
+    if page is None:
+        results = fetch_query(query + " ORDER BY w.Date_Added DESC", (profile_id,))
+    else:
+        query, params = paginated_query(query, (profile_id,), ["w.Date_Added", "w.Watchlist_Id"], page)
+        results, next_cursor = split_page(fetch_query(query, params), page[0], ["Date_Added", "Watchlist_Id"])
+    contents = resolve_many((r["Content_Type"], r["Content_Id"]) for r in results)
+    transformed = [
+        transform_watchlist_item(r, contents.get((r["Content_Type"], r["Content_Id"])))
+        for r in results
+    ]
+    response = {"success": True, "watchlist": transformed}
+    if page is not None:
+        response["next_cursor"] = next_cursor
+    return jsonify(response)
 
@@ -0,0 +1,135 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from utils.mp4 import (
+    MP4Error, _children, _find, _path, _shift_chunk_offsets, build_index, faststart, is_faststart,
+    iter_boxes, read_moov,
+)
+
+# Usage: python -m unittest discover tests (from backend/)
+# Runs against the sample videos shipped with the frontend
+
+VIDEOS = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "my-app", "public", "videos")
+SAMPLES = ["15097-261402819_small.mp4", "26452-358778857_small.mp4"]
+
+
+def video_table(path, box_type):
+    """File offset of a sample table box in the video track"""
+    boxes, moov = read_moov(path)
+    for trak in (b for b in iter_boxes(moov, 8) if b[0] == b"trak"):
+        hdlr = _path(moov, trak, b"mdia", b"hdlr")
+        if moov[hdlr[1] + hdlr[3] + 8:hdlr[1] + hdlr[3] + 12] == b"vide":
+            stbl = _path(moov, trak, b"mdia", b"minf", b"stbl")
+            return _find(boxes, b"moov")[1] + _find(_children(moov, stbl), box_type)[1]
+    raise AssertionError("no video track")
+
+
+class MP4TestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def copy(self, name, data=None):
+        path = os.path.join(self.tmp, name)
+        if data is None:
+            shutil.copy(os.path.join(VIDEOS, name), path)
+        else:
+            with open(path, "wb") as f:
+                f.write(data)
+        return path
+
+    def patched(self, name, box_type, at, value):
+        """Copy of a sample with a 32-bit field `at` bytes into a video-track box overwritten"""
+        path = self.copy(name)
+        pos = video_table(path, box_type) + at
+        with open(path, "r+b") as f:
+            f.seek(pos)
+            f.write(value if isinstance(value, bytes) else struct.pack(">I", value))
+        return path
+
+
+class BuildIndexTest(MP4TestCase):
+    def test_bundled_videos(self):
+        for name in SAMPLES:
+            with self.subTest(name):
+                path = os.path.join(VIDEOS, name)
+                index = build_index(path)
+                times = [k[0] for k in index["keyframes"]]
+                offsets = [k[1] for k in index["keyframes"]]
+                self.assertTrue(index["faststart"])
+                self.assertEqual(index["size"], os.path.getsize(path))
+                self.assertGreater(index["duration"], 0)
+                self.assertEqual(times[0], 0)
+                self.assertEqual(times, sorted(times))
+                self.assertEqual(offsets, sorted(offsets))
+                self.assertLess(times[-1], index["duration"])
+                self.assertTrue(all(index["init_range"][1] < o < index["size"] for o in offsets))
+
+    def test_missing_tables(self):
+        for box_type in (b"stts", b"stsz", b"stsc"):
+            with self.subTest(box_type):
+                path = self.patched(SAMPLES[0], box_type, 4, b"free")
+                with self.assertRaisesRegex(MP4Error, f"Missing {box_type.decode()}"):
+                    build_index(path)
+        path = self.patched(SAMPLES[0], b"stco", 4, b"free")
+        with self.assertRaisesRegex(MP4Error, "Missing stco/co64"):
+            build_index(path)
+
+    def test_truncated_tables(self):
+        # Entry counts (sample count for stsz) larger than the box holds
+        for box_type, at in ((b"stts", 12), (b"stsz", 16), (b"stco", 12), (b"stsc", 12), (b"stss", 12)):
+            with self.subTest(box_type):
+                path = self.patched(SAMPLES[0], box_type, at, 0x00FFFFFF)
+                with self.assertRaisesRegex(MP4Error, f"Truncated {box_type.decode()}"):
+                    build_index(path)
+
+    def test_chunk_out_of_range(self):
+        path = self.patched(SAMPLES[1], b"stsc", 16, 10_000)  # first_chunk of the first run
+        with self.assertRaisesRegex(MP4Error, "stsc refers to chunk"):
+            build_index(path)
+
+    def test_truncated_file(self):
+        with open(os.path.join(VIDEOS, SAMPLES[1]), "rb") as f:
+            data = f.read()
+        for length in (4, 12, 5000):
+            with self.subTest(length):
+                with self.assertRaises(MP4Error):
+                    build_index(self.copy("cut.mp4", data[:length]))
+
+
+class FaststartTest(MP4TestCase):
+    def moov_last(self, name):
+        """Copy of a sample with moov moved behind the media data, as most encoders write it"""
+        src = os.path.join(VIDEOS, name)
+        boxes, moov = read_moov(src)
+        moov_box = _find(boxes, b"moov")
+        _shift_chunk_offsets(moov, -len(moov), moov_box[1] + moov_box[2], os.path.getsize(src))
+        with open(src, "rb") as f:
+            data = f.read()
+        rest = b"".join(data[o:o + s] for t, o, s, h in boxes if t != b"moov")
+        return self.copy(name, rest + moov), data
+
+    def test_round_trip(self):
+        for name in SAMPLES:
+            with self.subTest(name):
+                src, original = self.moov_last(name)
+                self.assertFalse(is_faststart(src))
+                self.assertFalse(build_index(src)["faststart"])
+
+                dst = os.path.join(self.tmp, "out.mp4")
+                self.assertTrue(faststart(src, dst))
+                with open(dst, "rb") as f:
+                    self.assertEqual(f.read(), original)
+                self.assertEqual(build_index(dst)["keyframes"], build_index(os.path.join(VIDEOS, name))["keyframes"])
+
+    def test_already_faststart(self):
+        dst = os.path.join(self.tmp, "out.mp4")
+        self.assertFalse(faststart(os.path.join(VIDEOS, SAMPLES[0]), dst))
+        self.assertFalse(os.path.exists(dst))
+
+
+if __name__ == "__main__":
+    unittest.main()
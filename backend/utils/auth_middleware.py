@@ -1,28 +1,158 @@
 from functools import wraps
 from flask import request, jsonify
+from db import execute_query, fetch_all
+from utils.cache import TTLCache
+from datetime import timedelta
+import hashlib
 import jwt
 import os
+import threading
+import time
 
 # Use the same secret as in user_auth.py
 SECRET_KEY = os.getenv("JWT_SECRET", "your_secret_key")
 
+# sha256(token) -> user_id for tokens whose signature and claims were already
+# verified. Each entry expires at the token's own exp, so a cached token is
+# never accepted past its expiry. Set TOKEN_CACHE_SIZE=0 to disable.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=None)
+
+# sha256(token) -> exp for logged-out tokens. The revoked_token table is the
+# shared list; each worker mirrors it at most every REVOCATION_SYNC_INTERVAL
+# seconds, so a logout reaches every worker within that interval. A sync
+# re-reads everything revoked since REVOCATION_SYNC_MARGIN seconds before the
+# newest row it has seen, so a row whose transaction committed after a later
+# one still gets picked up; every REVOCATION_FULL_SYNC_INTERVAL seconds all
+# unexpired rows are reloaded. Entries only leave once the token has expired.
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "2"))
+REVOCATION_SYNC_MARGIN = float(os.getenv("REVOCATION_SYNC_MARGIN", "30"))
+REVOCATION_FULL_SYNC_INTERVAL = float(os.getenv("REVOCATION_FULL_SYNC_INTERVAL", "300"))
+revoked_tokens = {}
+_revoked_lock = threading.Lock()
+_sync_lock = threading.Lock()
+_last_sync = float("-inf")
+_last_full_sync = float("-inf")
+_last_revoked_at = None
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _remember_revoked(key, expires_at):
+    with _revoked_lock:
+        revoked_tokens[key] = expires_at
+    token_cache.invalidate(key)
+
+
+def _is_revoked(key):
+    with _revoked_lock:
+        expires_at = revoked_tokens.get(key)
+    return expires_at is not None and expires_at > time.time()
+
+
+def sync_revocations(force=False):
+    """Pull revocations other workers made around and since the last sync; drop expired entries"""
+    global _last_sync, _last_full_sync, _last_revoked_at
+    if not force and time.monotonic() - _last_sync < REVOCATION_SYNC_INTERVAL:
+        return
+    # One thread syncs; the others carry on with the list as it is
+    if not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        _last_sync = time.monotonic()
+        now = time.time()
+        if _last_revoked_at is None or _last_sync - _last_full_sync >= REVOCATION_FULL_SYNC_INTERVAL:
+            rows = fetch_all(
+                "SELECT Token_Hash, Expires_At, Revoked_At FROM revoked_token WHERE Expires_At > %s",
+                (int(now),),
+            )
+            _last_full_sync = _last_sync
+        else:
+            # Overlaps the previous read: Revoked_At is set at insert, not at
+            # commit, so a slow transaction can land behind rows already seen
+            rows = fetch_all(
+                "SELECT Token_Hash, Expires_At, Revoked_At FROM revoked_token "
+                "WHERE Revoked_At >= %s AND Expires_At > %s",
+                (_last_revoked_at - timedelta(seconds=REVOCATION_SYNC_MARGIN), int(now)),
+            )
+        for row in rows:
+            _remember_revoked(bytes(row["Token_Hash"]), row["Expires_At"])
+            if _last_revoked_at is None or row["Revoked_At"] > _last_revoked_at:
+                _last_revoked_at = row["Revoked_At"]
+        with _revoked_lock:
+            for key in [k for k, expires_at in revoked_tokens.items() if expires_at <= now]:
+                del revoked_tokens[key]
+    except Exception as e:
+        print(f"❌ Error syncing revoked tokens: {e}")
+    finally:
+        _sync_lock.release()
+
+
+def verify_token(token, sync=True):
+    """Return the user id for a valid token, raising jwt.InvalidTokenError otherwise.
+
+    With sync=False the revocation list is used as it is, for callers that
+    can't block on the database (the async server syncs it in the background).
+    """
+    key = _digest(token)
+    if sync:
+        sync_revocations()
+    if _is_revoked(key):
+        raise jwt.InvalidTokenError("Token revoked")
+
+    if TOKEN_CACHE_SIZE:
+        user_id = token_cache.get(key)
+        if user_id is not None:
+            return user_id
+
+    decoded_data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    user_id = decoded_data["user_id"]
+
+    ttl = decoded_data.get("exp", 0) - time.time()
+    if TOKEN_CACHE_SIZE and ttl > 0:
+        token_cache.set(key, user_id, ttl)
+    return user_id
+
+
+def revoke_token(token):
+    """Reject this token from now on: at once in this worker, after the next sync in the others"""
+    try:
+        decoded_data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return False  # already unusable
+
+    key = _digest(token)
+    expires_at = int(decoded_data.get("exp", 0))
+    if expires_at <= time.time():
+        return True
+    _remember_revoked(key, expires_at)
+    execute_query(
+        "INSERT IGNORE INTO revoked_token (Token_Hash, Expires_At) VALUES (%s, %s)",
+        (key, expires_at),
+    )
+    execute_query("DELETE FROM revoked_token WHERE Expires_At <= %s", (int(time.time()),))
+    return True
+
+
+def get_bearer_token():
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1]
+    return None
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-
-        # Check for Authorization header
-        if "Authorization" in request.headers:
-            auth_header = request.headers["Authorization"]
-            if auth_header.startswith("Bearer "):
-                token = auth_header.split(" ")[1]
+        token = get_bearer_token()
 
         if not token:
             return jsonify({"success": False, "message": "Missing token"}), 401
 
         try:
-            decoded_data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            current_user = decoded_data["user_id"]
+            current_user = verify_token(token)
         except jwt.ExpiredSignatureError:
             return jsonify({"success": False, "message": "Token expired"}), 401
         except jwt.InvalidTokenError:
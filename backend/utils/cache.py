@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils.http_cache import bump, on_change
+from utils.snapshot import mark_stale
+from utils.search import mark_changed
+
+_DEFAULT = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time to live.
+
+    Holds at most `maxsize` entries, evicting the least recently used one
+    when full. A ttl of None means the entry only leaves through eviction
+    or explicit invalidation.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=_DEFAULT):
+        if ttl is _DEFAULT:
+            ttl = self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, ttl=_DEFAULT):
+        """Return the cached value for key, calling loader() on a miss.
+
+        None results are not cached so missing rows are looked up again.
+        """
+        value = self.get(key, _DEFAULT)
+        if value is not _DEFAULT:
+            return value
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if str(k).startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            }
+
+
+# Transformed catalog responses, per worker process.
+# Keys: "movies:<filter>", "movie:<id>", "tvshows:<filter>", "tvshow:<id>",
+# "genres", "genre:<id>". The home feed is a separate snapshot (utils/snapshot.py).
+catalog_cache = TTLCache(
+    maxsize=int(os.getenv("CATALOG_CACHE_SIZE", "512")),
+    ttl=int(os.getenv("CATALOG_CACHE_TTL", "300")),
+)
+
+
+# (Content_Type, Content_Id) -> content record, filled by utils.content.resolve_many()
+content_index = TTLCache(
+    maxsize=int(os.getenv("CONTENT_INDEX_SIZE", "50000")),
+    ttl=int(os.getenv("CONTENT_INDEX_TTL", "600")),
+)
+
+
+def invalidate_content(content_type, content_id):
+    """Evict one title and every cached listing that embeds it."""
+    content_index.invalidate((content_type, content_id))
+    if content_type == "Movie":
+        catalog_cache.invalidate(f"movie:{content_id}")
+        catalog_cache.invalidate_prefix("movies:")
+        bump("movies")
+    else:
+        catalog_cache.invalidate(f"tvshow:{content_id}")
+        catalog_cache.invalidate_prefix("tvshows:")
+        bump("tvshows")
+    mark_stale("home")
+    mark_stale("facets")
+    mark_changed(content_type, content_id)
+
+
+def invalidate_genres():
+    catalog_cache.invalidate("genres")
+    catalog_cache.invalidate_prefix("genre:")
+    catalog_cache.invalidate_prefix("movies:")
+    catalog_cache.invalidate_prefix("tvshows:")
+    catalog_cache.invalidate_prefix("movie:")
+    catalog_cache.invalidate_prefix("tvshow:")
+    mark_stale("facets")
+    bump("genres", "movies", "tvshows")
+
+
+def invalidate_home():
+    mark_stale("home")
+
+
+def invalidate_catalog():
+    catalog_cache.clear()
+    content_index.clear()
+    mark_stale("home")
+    mark_stale("search")
+    mark_stale("facets")
+    bump("movies", "tvshows", "genres")
+
+
+def _drop_remote_changes(prefixes):
+    """Listener for a resource bumped elsewhere: which title changed isn't known, so drop them all"""
+    def drop():
+        for prefix in prefixes:
+            catalog_cache.invalidate_prefix(prefix)
+        content_index.clear()
+        mark_stale("home")
+        mark_stale("facets")
+    return drop
+
+
+on_change("movies", _drop_remote_changes(("movies:", "movie:")))
+on_change("tvshows", _drop_remote_changes(("tvshows:", "tvshow:")))
+on_change("genres", _drop_remote_changes(("genres", "genre:")))
@@ -0,0 +1,100 @@
+from db import fetch_all
+from utils.pagination import paginated_query
+
+# Each content table with its primary key and genre link table
+CATALOG_TABLES = {
+    "movie": ("Movie_Id", "movie_genre"),
+    "tv_show": ("Show_Id", "tvshow_genre"),
+}
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def genre_map_query(table, ids=None):
+    """(query, params) for the genre links of a content table, or of the given ids only"""
+    id_column, link_table = CATALOG_TABLES[table]
+    query = f"""
+        SELECT l.{id_column} AS Content_Id, g.Genre_Id, g.Genre_Name
+        FROM {link_table} l
+        JOIN genre g ON g.Genre_Id = l.Genre_Id
+    """
+    params = ()
+    if ids is not None:
+        query += f" WHERE l.{id_column} IN ({_placeholders(ids)})"
+        params = tuple(ids)
+    return query, params
+
+
+def group_genres(rows):
+    genre_map = {}
+    for row in rows:
+        genre_map.setdefault(row["Content_Id"], []).append(
+            {"genre_id": row["Genre_Id"], "name": row["Genre_Name"]}
+        )
+    return genre_map
+
+
+def fetch_genre_map(table, ids=None):
+    """Return {content_id: [genre, ...]} for the given content table in one query.
+
+    When ids is None the genres of the whole table are loaded, otherwise only
+    those of the given ids.
+    """
+    if ids is not None and not ids:
+        return {}
+    return group_genres(fetch_all(*genre_map_query(table, ids)))
+
+
+def load_catalog(table, genre_name=None, ids=None, page=None):
+    """Load content rows with their genres attached under the "genres" key.
+
+    Always runs exactly two queries: one for the titles and one for all of
+    their genre links, regardless of how many titles match. With a page from
+    get_page_request() the titles are keyset-paginated on the primary key
+    and one look-ahead row is included for split_page().
+    """
+    id_column, link_table = CATALOG_TABLES[table]
+    query = f"SELECT c.* FROM {table} c"
+    params = ()
+
+    if genre_name is not None:
+        query += f"""
+            JOIN {link_table} l ON l.{id_column} = c.{id_column}
+            JOIN genre g ON g.Genre_Id = l.Genre_Id
+            WHERE g.Genre_Name = %s
+        """
+        params = (genre_name,)
+    elif ids is not None:
+        if not ids:
+            return []
+        query += f" WHERE c.{id_column} IN ({_placeholders(ids)})"
+        params = tuple(ids)
+    else:
+        query += " WHERE 1 = 1"
+
+    if page is not None:
+        query, params = paginated_query(query, params, [f"c.{id_column}"], page, descending=False)
+
+    rows = fetch_all(query, params)
+    if not rows:
+        return []
+
+    # The full table is cheaper to join without a long IN list
+    if genre_name is None and ids is None and page is None:
+        genre_map = fetch_genre_map(table)
+    else:
+        genre_map = fetch_genre_map(table, [r[id_column] for r in rows])
+
+    for row in rows:
+        row["genres"] = genre_map.get(row[id_column], [])
+    return rows
+
+
+def load_movies(genre_name=None, ids=None, page=None):
+    return load_catalog("movie", genre_name=genre_name, ids=ids, page=page)
+
+
+def load_tvshows(genre_name=None, ids=None, page=None):
+    return load_catalog("tv_show", genre_name=genre_name, ids=ids, page=page)
@@ -0,0 +1,187 @@
+from db import fetch_all
+from utils.cache import content_index
+from utils.posters import poster_images
+from utils.ratings import get_aggregates, mean_rating
+
+# Remote poster artwork by title, used until a local copy has been ingested
+# into the poster store (see ingest_posters.py)
+MOVIE_POSTERS = {
+    "The Dark Knight": "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg",
+    "Mad Max: Fury Road": "https://image.tmdb.org/t/p/w500/hA2ple9q4qnwxp3hKVNhroipsir.jpg",
+    "John Wick": "https://image.tmdb.org/t/p/w500/fZPSd91yGE9fCcCe6OoQr6E3Bev.jpg",
+    "The Shawshank Redemption": "https://image.tmdb.org/t/p/w500/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg",
+    "Forrest Gump": "https://image.tmdb.org/t/p/w500/arw2vcBveWOVZr6pxd9XTd1TdQa.jpg",
+    "The Green Mile": "https://image.tmdb.org/t/p/w500/velWPhVMQeQKcxggNEU8YmIo52R.jpg",
+    "Inception": "https://image.tmdb.org/t/p/w500/9gk7adHYeDvHkCSEqAvQNLV5Uge.jpg",
+    "The Matrix": "https://image.tmdb.org/t/p/w500/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
+    "Interstellar": "https://image.tmdb.org/t/p/w500/gEU2QniE6E77NI6lCU6MxlNBvIx.jpg",
+    "Blade Runner 2049": "https://image.tmdb.org/t/p/w500/gajva2L0rPYkEWjzgFlBXCAVBE5.jpg",
+    "The Grand Budapest Hotel": "https://image.tmdb.org/t/p/w500/eWdyYQreja6JGCzqHWXpWHDrrPo.jpg",
+    "Superbad": "https://image.tmdb.org/t/p/w500/ek8e8txUyUwd2BNqj6lFEerJfbq.jpg",
+    "Se7en": "https://image.tmdb.org/t/p/w500/6yoghtyTpznpBik8EngEmJskVUO.jpg",
+    "Gone Girl": "https://image.tmdb.org/t/p/w500/lv5xShBIDboxe4WqAjcv8L9FALz.jpg",
+    "Shutter Island": "https://image.tmdb.org/t/p/w500/4GDy0PHYX3VRXUtwK5ysFbg3kEx.jpg",
+    "The Conjuring": "https://image.tmdb.org/t/p/w500/wVYREutTvI2tmxr6ujrHT704wGF.jpg",
+    "A Quiet Place": "https://image.tmdb.org/t/p/w500/nAU74GmpUk7t5iklEp3bufwDq4n.jpg",
+    "The Notebook": "https://image.tmdb.org/t/p/w500/rNzQyW4f8B8cQeg7Dgj3n6eT5k9.jpg",
+    "La La Land": "https://image.tmdb.org/t/p/w500/uDO8zWDhfWwoFdKS4fzkUJt0Rf0.jpg",
+    "The Godfather": "https://image.tmdb.org/t/p/w500/3bhkrj58Vtu7enYsRolD1fZdja1.jpg",
+    "Pulp Fiction": "https://image.tmdb.org/t/p/w500/d5iIlFn5s0ImszYzBPb8JPIfbXD.jpg",
+    "Gladiator": "https://image.tmdb.org/t/p/w500/ty8TGRuvJLPUmAR1H1nRIsgwvim.jpg",
+    "The Lord of the Rings: The Return of the King": "https://image.tmdb.org/t/p/w500/rCzpDGLbOoPwLjy3OAm5NUPOTrC.jpg",
+}
+
+TVSHOW_POSTERS = {
+    "Breaking Bad": "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg",
+    "Better Call Saul": "https://image.tmdb.org/t/p/w500/fC2HDm5t0kHl7mTm7jxMR31b7by.jpg",
+    "The Crown": "https://image.tmdb.org/t/p/w500/1M876KPjulVwppEpldhdc8V4o68.jpg",
+    "Stranger Things": "https://image.tmdb.org/t/p/w500/x2LSRK2Cm7MZhjluni1msVJ3wDF.jpg",
+    "Black Mirror": "https://image.tmdb.org/t/p/w500/5UaYsGZOFhjFDwQh6GuLjjA1WlF.jpg",
+    "Westworld": "https://image.tmdb.org/t/p/w500/8MfgyFHf7XEboZJPZXCIDqqiz6e.jpg",
+    "Narcos": "https://image.tmdb.org/t/p/w500/rTmal9fDbwh5F0waol2hq35U4ah.jpg",
+    "Peaky Blinders": "https://image.tmdb.org/t/p/w500/vUUqzWa2LnHIVqkaKVlVGkVcZIW.jpg",
+    "Ozark": "https://image.tmdb.org/t/p/w500/m73VMp0W5Z3Qn0VY5zyQ8FgJwmV.jpg",
+    "The Office": "https://image.tmdb.org/t/p/w500/qWnJzyZhyy74gjpSjIXWmuk0ifX.jpg",
+    "Brooklyn Nine-Nine": "https://image.tmdb.org/t/p/w500/hgRMSOt7a1b8qyQR68vUixJPang.jpg",
+    "Parks and Recreation": "https://image.tmdb.org/t/p/w500/dDuzrl9rUIBYieZjqmtbJc2hPqK.jpg",
+    "Mindhunter": "https://image.tmdb.org/t/p/w500/oKt4J3TFjWirVwBqoHyIvv5IImd.jpg",
+    "True Detective": "https://image.tmdb.org/t/p/w500/cuV2O5ZyDLHSOWzg3XNBvH3hNI.jpg",
+    "Game of Thrones": "https://image.tmdb.org/t/p/w500/1XS1oqL89opfnbLl8WnZY1O1uJx.jpg",
+    "The Witcher": "https://image.tmdb.org/t/p/w500/7vjaCdMw15FEbXyLQTVa04URsPm.jpg",
+    "The Boys": "https://image.tmdb.org/t/p/w500/stTEycfG9928HYGEISBFaG1ngjM.jpg",
+    "Jack Ryan": "https://image.tmdb.org/t/p/w500/6ovk8nrrSmN1ieT44D7Foable72.jpg",
+    "The Haunting of Hill House": "https://image.tmdb.org/t/p/w500/38PkhBGRQtmVx2drvPik3F42qHO.jpg",
+    "The Walking Dead": "https://image.tmdb.org/t/p/w500/xf9wuDcqlUPWABZNeDKPbZUjWx0.jpg",
+}
+
+DEFAULT_POSTERS = {
+    "Movie": "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg",
+    "TV_Show": "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg",
+}
+
+# Map movie titles to video URLs (for movies that have videos)
+MOVIE_VIDEOS = {
+    "The Dark Knight": "/videos/15097-261402819_small.mp4",
+    "Inception": "/videos/26452-358778857_small.mp4"
+}
+
+# Movie and TV ratings on one scale, from all ages (0) to adults only (3)
+AGE_RATING_LEVELS = {
+    "G": 0, "TV-Y": 0, "TV-G": 0,
+    "PG": 1, "TV-Y7": 1, "TV-PG": 1,
+    "PG-13": 2, "TV-14": 2,
+    "R": 3, "NC-17": 3, "TV-MA": 3,
+}
+
+# Content_Type -> (table, primary key)
+CONTENT_TABLES = {
+    "Movie": ("movie", "Movie_Id"),
+    "TV_Show": ("tv_show", "Show_Id"),
+}
+
+
+def poster(content_type, title):
+    """(poster_url, srcset info or None) for a title.
+
+    Titles in the local store get their largest variant as poster_url plus
+    every width for srcset; the rest keep the remote artwork.
+    """
+    images = poster_images(title)
+    if images is not None:
+        return images["src"], images
+    posters = MOVIE_POSTERS if content_type == "Movie" else TVSHOW_POSTERS
+    return posters.get(title, DEFAULT_POSTERS.get(content_type, DEFAULT_POSTERS["Movie"])), None
+
+
+def poster_url(content_type, title):
+    return poster(content_type, title)[0]
+
+
+def _record(content_type, row):
+    """One content row as a type-independent record"""
+    title = row.get("Title", "")
+    release_date = row.get("Release_Date")
+    return {
+        "content_type": content_type,
+        "content_id": row[CONTENT_TABLES[content_type][1]],
+        "title": title,
+        "description": row.get("Description"),
+        "release_date": release_date,
+        "release_year": release_date.year if release_date else row.get("Release_Year"),
+        "duration": row.get("Duration"),
+        "age_rating": row.get("Age_Rating"),
+        "language": row.get("Language"),
+        "status": row.get("Status"),
+        "catalog_rating": row.get("average_rating"),
+        "video_url": MOVIE_VIDEOS.get(title) if content_type == "Movie" else None,
+    }
+
+
+def resolve_many(keys):
+    """Hydrate (Content_Type, Content_Id) keys into content records.
+
+    Served from the in-process index; misses are loaded with one IN query
+    per content type. Unknown keys are left out of the result. Each record
+    is a copy carrying the current average_rating from the rating store and
+    the current poster, so neither goes stale inside the index.
+    """
+    found, missing = cached_records(keys)
+    for content_type, ids in missing.items():
+        store_records(content_type, fetch_all(*records_query(content_type, ids)), found)
+    return overlay_records(found)
+
+
+def cached_records(keys):
+    """(records found in the index by key, {content_type: ids still to load}).
+
+    Keys of unknown content types are dropped.
+    """
+    found = {}
+    missing = {}
+    for key in dict.fromkeys(keys):
+        record = content_index.get(key)
+        if record is not None:
+            found[key] = record
+        elif key[0] in CONTENT_TABLES:
+            missing.setdefault(key[0], []).append(key[1])
+    return found, missing
+
+
+def records_query(content_type, ids):
+    table, id_column = CONTENT_TABLES[content_type]
+    placeholders = ", ".join(["%s"] * len(ids))
+    return f"SELECT * FROM {table} WHERE {id_column} IN ({placeholders})", tuple(ids)
+
+
+def store_records(content_type, rows, found):
+    """Index loaded rows and add them to `found`"""
+    for row in rows:
+        record = _record(content_type, row)
+        content_index.set((content_type, record["content_id"]), record)
+        found[(content_type, record["content_id"])] = record
+
+
+def overlay_records(found, aggregates=None):
+    """Copies of the indexed records with the current rating and poster.
+
+    `aggregates` is {content_type: {id: aggregate}} covering every record;
+    without it they are read from the rating store.
+    """
+    if aggregates is None:
+        aggregates = {}
+        for content_type in CONTENT_TABLES:
+            ids = [key[1] for key in found if key[0] == content_type]
+            if ids:
+                aggregates[content_type] = get_aggregates(content_type, ids)
+
+    result = {}
+    for key, record in found.items():
+        record = dict(record)
+        record["average_rating"] = mean_rating(aggregates[key[0]][key[1]], record.pop("catalog_rating"))
+        record["poster_url"], record["poster"] = poster(key[0], record["title"])
+        result[key] = record
+    return result
+
+
+def resolve(content_type, content_id):
+    return resolve_many([(content_type, content_id)]).get((content_type, content_id))
@@ -0,0 +1,93 @@
+from datetime import date, datetime, time as dt_time, timedelta
+from functools import wraps
+from flask import jsonify
+from db import fetch_all
+from utils.cache import TTLCache
+import os
+
+# user_id -> entitlement. Active entries live exactly until the end of their
+# End_Date, the moment fn_GetSubscriptionStatus would stop reporting them.
+# Inactive ones are kept for INACTIVE_TTL seconds, so repeated refusals don't
+# each query the database. Subscribing or paying through this worker evicts
+# the entry at once; through another worker it is picked up when it expires.
+entitlements = TTLCache(maxsize=int(os.getenv("ENTITLEMENT_CACHE_SIZE", "50000")), ttl=None)
+INACTIVE_TTL = int(os.getenv("ENTITLEMENT_INACTIVE_TTL", "5"))
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _details(sub):
+    return {
+        "subscription_id": sub.get("Subscription_Id"),
+        "start_date": str(sub["Start_Date"]) if sub.get("Start_Date") else None,
+        "end_date": str(sub["End_Date"]) if sub.get("End_Date") else None,
+        "auto_renewal": bool(sub.get("Auto_Renewal")),
+        "payment_status": sub.get("Payment_Status"),
+    }
+
+
+def _load(user_id):
+    """Status and latest subscription for a user from one query.
+
+    Mirrors fn_GetSubscriptionStatus: the subscription with the latest
+    End_Date that has not ended yet decides the status.
+    """
+    rows = fetch_all("""
+        SELECT Subscription_Id, Start_Date, End_Date, Auto_Renewal, Payment_Status, Status
+        FROM subscription
+        WHERE User_Id = %s
+    """, (user_id,))
+
+    today = date.today()
+    current = [r for r in rows if r.get("End_Date") and _as_date(r["End_Date"]) >= today]
+    current = max(current, key=lambda r: _as_date(r["End_Date"]), default=None)
+    latest = max(rows, key=lambda r: _as_date(r["Start_Date"]) or date.min, default=None)
+
+    # A NULL Status is Inactive, as in fn_GetSubscriptionStatus
+    status = (current or {}).get("Status") or "Inactive"
+    return {
+        "status": status,
+        "active": status == "Active",
+        "active_until": _as_date(current["End_Date"]) if status == "Active" else None,
+        "subscription": _details(latest) if latest else None,
+    }
+
+
+def _ttl(entitlement):
+    if not entitlement["active"]:
+        return INACTIVE_TTL
+    expires = datetime.combine(entitlement["active_until"] + timedelta(days=1), dt_time.min)
+    return max(0.0, (expires - datetime.now()).total_seconds())
+
+
+def get_entitlement(user_id):
+    entitlement = entitlements.get(user_id)
+    if entitlement is None:
+        entitlement = _load(user_id)
+        entitlements.set(user_id, entitlement, _ttl(entitlement))
+    return entitlement
+
+
+def invalidate_entitlement(user_id):
+    entitlements.invalidate(user_id)
+
+
+def has_active_subscription(user_id):
+    return get_entitlement(user_id)["active"]
+
+
+def subscription_required(f):
+    """Reject users without an active subscription. Goes below @token_required."""
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if not has_active_subscription(current_user):
+            return jsonify({"success": False, "message": "An active subscription is required"}), 403
+        return f(current_user, *args, **kwargs)
+
+    return decorated
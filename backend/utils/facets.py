@@ -0,0 +1,202 @@
+import os
+from db import fetch_all
+from utils.catalog import fetch_genre_map
+from utils.content import AGE_RATING_LEVELS
+from utils.snapshot import Snapshot
+
+FACET_REBUILD_INTERVAL = int(os.getenv("FACET_REBUILD_INTERVAL", "900"))
+
+# Facets a filter can name and that get counts. "age_level" is the
+# AGE_RATING_LEVELS scale behind "PG-13 or below" filters.
+FACETS = ("type", "genre", "age_rating", "language", "decade")
+
+# Bytes of a result bitset examined at once when paging through it
+_CHUNK = 64
+
+# Content_Type -> (table, primary key, year expression)
+_SOURCES = {
+    "Movie": ("movie", "Movie_Id", "YEAR(Release_Date)"),
+    "TV_Show": ("tv_show", "Show_Id", "Release_Year"),
+}
+
+
+def _bitset(positions, size):
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+
+class FacetIndex:
+    """Catalog titles as bit positions, with one bitset per facet value.
+
+    Titles are numbered best rated first, so walking a selection's set bits
+    from the lowest yields it already sorted by rating. Bitsets are plain
+    Python ints: AND/OR/NOT over the whole catalog is one big-int operation
+    and a count is int.bit_count().
+    """
+
+    def __init__(self, titles):
+        """`titles` is [(key, rating, {facet: [value, ...]})]"""
+        titles = sorted(titles, key=lambda t: (-t[1], t[0]))
+        self.keys = [t[0] for t in titles]
+        self.size = len(self.keys)
+        self.everything = (1 << self.size) - 1
+
+        positions = {}
+        for position, (_, _, values) in enumerate(titles):
+            for facet, facet_values in values.items():
+                for value in facet_values:
+                    positions.setdefault(facet, {}).setdefault(value, []).append(position)
+        self.bits = {
+            facet: {value: _bitset(members, self.size) for value, members in by_value.items()}
+            for facet, by_value in positions.items()
+        }
+
+    def clause(self, facet, any_of=(), all_of=(), none_of=()):
+        """Titles with at least one of `any_of`, all of `all_of` and none of `none_of`"""
+        values = self.bits.get(facet, {})
+        mask = self.everything
+        if any_of:
+            union = 0
+            for value in any_of:
+                union |= values.get(value, 0)
+            mask &= union
+        for value in all_of:
+            mask &= values.get(value, 0)
+        for value in none_of:
+            mask &= ~values.get(value, 0)
+        return mask
+
+    def select(self, filters):
+        """Bitset of the titles matching every facet's clause.
+
+        `filters` is {facet: {"any_of": [...], "all_of": [...], "none_of": [...]}}.
+        """
+        mask = self.everything
+        for facet, clause in filters.items():
+            mask &= self.clause(facet, **clause)
+        return mask
+
+    def counts(self, filters):
+        """{facet: {value: titles}} for the current selection.
+
+        A facet is counted without its own any_of values, so with "Drama"
+        picked the other genres still show how many titles adding them
+        would bring in. Values with no titles are left out.
+        """
+        masks = {facet: self.clause(facet, **clause) for facet, clause in filters.items()}
+        result = {}
+        for facet in FACETS:
+            base = self.everything
+            for other, mask in masks.items():
+                if other != facet:
+                    base &= mask
+            own = filters.get(facet)
+            if own:
+                base &= self.clause(facet, all_of=own.get("all_of", ()), none_of=own.get("none_of", ()))
+            counts = {}
+            for value, bits in self.bits.get(facet, {}).items():
+                count = (base & bits).bit_count()
+                if count:
+                    counts[value] = count
+            result[facet] = counts
+        return result
+
+    def page(self, mask, offset=0, limit=40):
+        """Keys of the selected titles in rating order, skipping the first `offset`.
+
+        Whole chunks before the page are skipped by their popcount; only the
+        chunks holding the page are walked bit by bit.
+        """
+        keys = []
+        if limit <= 0:
+            return keys
+        data = mask.to_bytes((self.size + 7) // 8, "little")
+        for start in range(0, len(data), _CHUNK):
+            word = int.from_bytes(data[start:start + _CHUNK], "little")
+            if not word:
+                continue
+            count = word.bit_count()
+            if offset >= count:
+                offset -= count
+                continue
+            base = start * 8
+            while word:
+                low = word & -word
+                word ^= low
+                if offset:
+                    offset -= 1
+                    continue
+                keys.append(self.keys[base + low.bit_length() - 1])
+                if len(keys) == limit:
+                    return keys
+        return keys
+
+    def values(self, facet):
+        return sorted(self.bits.get(facet, {}), key=str)
+
+    def stats(self):
+        return {
+            "titles": self.size,
+            "bitsets": sum(len(values) for values in self.bits.values()),
+            "bytes": sum((bits.bit_length() + 7) // 8 for values in self.bits.values() for bits in values.values()),
+        }
+
+
+def load_facet_titles():
+    """Every title as (key, rating, facet values), in three queries per content type.
+
+    The rating matches utils.ratings.average_rating(): the aggregate mean
+    once a title has been rated, the catalog's seeded column before that.
+    Languages only exist on home_page, so titles not featured there have no
+    language facet.
+    """
+    ratings = {
+        (row["Content_Type"], row["Content_Id"]): round(row["Rating_Sum"] / row["Rating_Count"], 2)
+        for row in fetch_all("""
+            SELECT Content_Type, Content_Id, Rating_Sum, Rating_Count
+            FROM rating_aggregate
+            WHERE Rating_Count > 0
+        """)
+    }
+    languages = {
+        (row["Content_Type"], row["Content_Id"]): row["Language"]
+        for row in fetch_all("SELECT Content_Type, Content_Id, Language FROM home_page WHERE Language IS NOT NULL")
+    }
+
+    titles = []
+    for content_type, (table, id_column, year) in _SOURCES.items():
+        genres = fetch_genre_map(table)
+        for row in fetch_all(f"""
+            SELECT {id_column} AS Content_Id, Age_Rating, {year} AS Year, average_rating
+            FROM {table}
+        """):
+            key = (content_type, row["Content_Id"])
+            rating = ratings.get(key)
+            if rating is None:
+                rating = float(row["average_rating"]) if row.get("average_rating") else 0
+            age_rating = row.get("Age_Rating")
+            values = {
+                "type": [content_type],
+                "genre": [g["name"] for g in genres.get(row["Content_Id"], [])],
+                "age_rating": [age_rating] if age_rating else [],
+                "age_level": [AGE_RATING_LEVELS[age_rating]] if age_rating in AGE_RATING_LEVELS else [],
+                "language": [languages[key]] if key in languages else [],
+                "decade": [int(row["Year"]) // 10 * 10] if row.get("Year") else [],
+            }
+            titles.append((key, rating, values))
+    return titles
+
+
+def build_facet_index():
+    return FacetIndex(load_facet_titles())
+
+
+# Rebuilt in the background after catalog, genre or rating changes
+# (utils/cache.py) and every FACET_REBUILD_INTERVAL seconds
+facet_snapshot = Snapshot("facets", build_facet_index, FACET_REBUILD_INTERVAL)
+
+
+def get_facet_index():
+    return facet_snapshot.get().value
@@ -0,0 +1,160 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+import bcrypt
+from db import release_connection
+
+# bcrypt runs in separate processes so a login storm cannot hold the GIL
+# and starve the request threads serving catalog traffic. The calling
+# thread still waits for its result (up to HASH_TIMEOUT). At most
+# HASH_WORKERS hashes run at once and HASH_QUEUE_SIZE more may wait;
+# anything beyond that is rejected immediately with HashingBusy
+# (503 + Retry-After). A slot is held until its hash really finishes, even
+# if the caller timed out, so abandoned work still counts against the bound.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "32"))
+HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "10"))
+RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "2"))
+START_METHOD = os.getenv("HASH_START_METHOD", "forkserver" if os.name == "posix" else "spawn")
+
+
+class HashingBusy(Exception):
+    def __init__(self, message="Authentication service is busy, please retry"):
+        super().__init__(message)
+        self.retry_after = RETRY_AFTER
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_SIZE)
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "in_flight": 0,
+    "completed": 0,
+    "rejected": 0,
+    "timeouts": 0,
+    "hash_seconds_total": 0.0,
+    "hash_seconds_max": 0.0,
+    "wait_seconds_total": 0.0,
+}
+
+
+def _hash_in_worker(password):
+    start = time.perf_counter()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt())
+    return hashed, time.perf_counter() - start
+
+
+def _check_in_worker(password, hashed):
+    start = time.perf_counter()
+    ok = bcrypt.checkpw(password, hashed)
+    return ok, time.perf_counter() - start
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS,
+                mp_context=multiprocessing.get_context(START_METHOD),
+            )
+        return _executor
+
+
+def _reset_executor(broken):
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _record(**changes):
+    with _metrics_lock:
+        for key, value in changes.items():
+            _metrics[key] += value
+
+
+def _release_slot(future=None):
+    _record(in_flight=-1)
+    _slots.release()
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        _record(rejected=1)
+        raise HashingBusy()
+
+    # Don't keep a pooled connection checked out for the length of a hash
+    release_connection()
+    _record(in_flight=1)
+    submitted = time.perf_counter()
+    executor = _get_executor()
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool:
+        _release_slot()
+        _reset_executor(executor)
+        raise HashingBusy()
+    except BaseException:
+        _release_slot()
+        raise
+    # The slot goes back when the work ends (done, cancelled or failed),
+    # not when this caller stops waiting
+    future.add_done_callback(_release_slot)
+
+    try:
+        result, hash_seconds = future.result(timeout=HASH_TIMEOUT)
+    except FutureTimeout:
+        _record(timeouts=1)
+        future.cancel()  # drops it if still queued; a running hash finishes and frees its slot
+        raise HashingBusy()
+    except BrokenProcessPool:
+        _reset_executor(executor)
+        raise HashingBusy()
+
+    with _metrics_lock:
+        _metrics["completed"] += 1
+        _metrics["hash_seconds_total"] += hash_seconds
+        _metrics["hash_seconds_max"] = max(_metrics["hash_seconds_max"], hash_seconds)
+        _metrics["wait_seconds_total"] += time.perf_counter() - submitted - hash_seconds
+    return result
+
+
+def hash_password(password):
+    """bcrypt-hash a password off the request thread; returns the hash as str"""
+    return _run(_hash_in_worker, password.encode("utf-8")).decode("utf-8")
+
+
+def check_password(password, hashed):
+    return _run(_check_in_worker, password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def stats():
+    with _metrics_lock:
+        m = dict(_metrics)
+    completed = m["completed"]
+    return {
+        "workers": HASH_WORKERS,
+        "queue_capacity": HASH_QUEUE_SIZE,
+        "in_flight": m["in_flight"],
+        "queue_depth": max(0, m["in_flight"] - HASH_WORKERS),
+        "completed": completed,
+        "rejected": m["rejected"],
+        "timeouts": m["timeouts"],
+        "hash_ms_avg": round(m["hash_seconds_total"] / completed * 1000, 2) if completed else 0,
+        "hash_ms_max": round(m["hash_seconds_max"] * 1000, 2),
+        "queue_wait_ms_avg": round(m["wait_seconds_total"] / completed * 1000, 2) if completed else 0,
+    }
+
+
+@atexit.register
+def _shutdown():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import threading
+import time
+from functools import wraps
+from flask import request, make_response
+from db import fetch_all, get_connection
+
+# Cache-Control sent with each read-only resource, overridable per deployment
+# e.g. CACHE_CONTROL_MOVIES="public, max-age=300, stale-while-revalidate=60"
+CACHE_CONTROL = {
+    "movies": os.getenv("CACHE_CONTROL_MOVIES", "public, max-age=60"),
+    "tvshows": os.getenv("CACHE_CONTROL_TVSHOWS", "public, max-age=60"),
+    "genres": os.getenv("CACHE_CONTROL_GENRES", "public, max-age=300"),
+    "home": os.getenv("CACHE_CONTROL_HOME", "public, max-age=60"),
+    "plans": os.getenv("CACHE_CONTROL_PLANS", "public, max-age=3600"),
+}
+
+# resource -> version, mirrored from the resource_version table at most every
+# VERSION_SYNC_INTERVAL seconds. Writes bump() the shared counter after they
+# commit, so a tag stops matching on every worker within that interval.
+# Resources without a known version (no sync yet, or the table unreachable)
+# and those built per worker (the home snapshot) are tagged by body instead.
+VERSION_SYNC_INTERVAL = float(os.getenv("HTTP_CACHE_SYNC_INTERVAL", "2"))
+VERSIONED_RESOURCES = ("movies", "tvshows", "genres", "plans")
+_versions = {}
+_versions_lock = threading.Lock()
+_sync_lock = threading.Lock()
+_last_sync = float("-inf")
+# resource -> callbacks that drop this worker's cached data for it
+_listeners = {}
+
+
+def on_change(resource, callback):
+    """Call `callback()` when another worker (or a script) bumps `resource`.
+
+    The callback drops what this worker has cached for the resource, so
+    the next response under the new version is built from fresh data.
+    """
+    _listeners.setdefault(resource, []).append(callback)
+
+
+def _changed(resource):
+    for callback in _listeners.get(resource, ()):
+        try:
+            callback()
+        except Exception as e:
+            print(f"❌ Error dropping cached {resource} after a version change: {e}")
+
+
+def _publish(resource, version):
+    with _versions_lock:
+        _versions[resource] = max(version, _versions.get(resource) or 0)
+
+
+def _apply(resource, version):
+    """Record a version read from the table, dropping the cached data first if it moved"""
+    known = current_version(resource)
+    if known is not None and version <= known:
+        return
+    # Before the new version is published, so it is never served with old data
+    _changed(resource)
+    _publish(resource, version)
+
+
+def sync_versions(force=False):
+    """Pull the shared versions; resources that changed elsewhere drop their cached data"""
+    global _last_sync
+    if not force and time.monotonic() - _last_sync < VERSION_SYNC_INTERVAL:
+        return
+    # One thread syncs; the others carry on with the versions as they are
+    if not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        _last_sync = time.monotonic()
+        rows = {r["Resource"]: r["Version"] for r in fetch_all("SELECT Resource, Version FROM resource_version")}
+        for resource in VERSIONED_RESOURCES:
+            _apply(resource, int(rows.get(resource, 0)))
+    except Exception as e:
+        print(f"❌ Error syncing resource versions: {e}")
+    finally:
+        _sync_lock.release()
+
+
+def bump(*resources):
+    """Mark resources as changed so previously issued ETags stop matching on every worker.
+
+    Call it once the write has committed (the invalidation hooks run from
+    after_commit). Uses its own connection, since the caller's unit of work
+    has already committed. If the table can't be written the resources go
+    back to body tags until the next sync.
+    """
+    resources = [r for r in resources if r in VERSIONED_RESOURCES]
+    if not resources:
+        return
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        versions = {}
+        for resource in resources:
+            cursor.execute(
+                "INSERT INTO resource_version (Resource, Version) VALUES (%s, 1) "
+                "ON DUPLICATE KEY UPDATE Version = Version + 1",
+                (resource,),
+            )
+            cursor.execute("SELECT Version FROM resource_version WHERE Resource = %s", (resource,))
+            versions[resource] = int(cursor.fetchone()["Version"])
+        conn.commit()
+        cursor.close()
+    except Exception as e:
+        print(f"❌ Error bumping resource versions {resources}: {e}")
+        with _versions_lock:
+            for resource in resources:
+                _versions.pop(resource, None)
+        return
+    finally:
+        if conn is not None:
+            conn.close()
+
+    for resource, version in versions.items():
+        known = current_version(resource)
+        # Someone else bumped in between: their changes aren't in this worker's caches
+        if known is None or version > known + 1:
+            _changed(resource)
+        _publish(resource, version)
+
+
+def current_version(resource):
+    with _versions_lock:
+        return _versions.get(resource)
+
+
+def etag_for(resource, full_path):
+    """Strong ETag for a resource at its shared version and a request path, or None if unknown"""
+    version = current_version(resource)
+    if version is None:
+        return None
+    key = f"{resource}:{version}:{full_path}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def body_etag(body):
+    """Strong ETag from the response bytes, for resources without a shared version"""
+    return hashlib.sha1(body).hexdigest()
+
+
+def conditional(resource, cache_control=None):
+    """Serve a read-only route with a strong ETag and Cache-Control.
+
+    With a known version, a matching If-None-Match is answered with 304
+    before the view runs, so no query or transform happens. Otherwise the
+    view runs and the tag is the hash of its body.
+    """
+    policy = cache_control or CACHE_CONTROL.get(resource)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if resource in VERSIONED_RESOURCES:
+                sync_versions()
+            etag = etag_for(resource, request.full_path) if resource in VERSIONED_RESOURCES else None
+
+            if etag is not None and request.if_none_match.contains(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if etag is None:
+                    etag = body_etag(response.get_data())
+                    if request.if_none_match.contains(etag):
+                        response = make_response("", 304)
+
+            response.set_etag(etag)
+            if policy:
+                response.headers["Cache-Control"] = policy
+            return response
+
+        return decorated
+
+    return decorator
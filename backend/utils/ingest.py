@@ -0,0 +1,210 @@
+import atexit
+import queue
+import threading
+import time
+from mysql.connector.errors import DataError, IntegrityError
+from db import transaction
+
+# Errors caused by the rows themselves; anything else (the database down,
+# restarting, out of connections, a deadlock) is retried until it clears
+DATA_ERRORS = (IntegrityError, DataError)
+# Longest pause between retries of a batch the database can't take yet
+MAX_RETRY_DELAY = 5.0
+
+
+class IngestQueueFull(Exception):
+    def __init__(self, message="Ingestion queue is full, please retry", retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class IngestClosed(IngestQueueFull):
+    """submit() after close(): the writer thread is gone, so the row would be lost"""
+
+    def __init__(self, message="Ingestion is shutting down, please retry"):
+        super().__init__(message)
+
+
+class BatchWriter:
+    """Write-behind buffer that inserts rows with executemany from a background thread.
+
+    Rows are flushed once `batch_size` are waiting or `flush_interval`
+    seconds after the first buffered row, whichever comes first. The queue
+    is bounded: submit() raises IngestQueueFull instead of growing without
+    limit when the database falls behind. Pending rows are drained at
+    interpreter shutdown; submit() after that raises IngestClosed.
+
+    While the database is unreachable the writer keeps retrying the batch
+    with backoff; the queue fills up behind it and submit() starts refusing,
+    so accepted rows are not dropped. A batch rejected for its data
+    (IntegrityError, DataError) is written again row by row, so one bad row
+    (e.g. an unknown content id) only loses itself. Only at shutdown does
+    a batch give up after `max_retries` attempts.
+    """
+
+    def __init__(self, name, query, batch_size=500, flush_interval=1.0, max_queue=20000,
+                 max_retries=3, after_write=None):
+        self.name = name
+        self.query = query
+        # Called with each batch once its insert has committed, for derived
+        # tables; its errors are its own to handle and never undo the insert
+        self.after_write = after_write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Orders submit() against close(), so no row is queued after the final drain
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {"accepted": 0, "rejected": 0, "written": 0, "failed": 0, "batches": 0}
+        atexit.register(self.close)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, row, timeout=0.05):
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._submit_lock:
+                if self._closed:
+                    raise IngestClosed()
+                if self._thread is None:
+                    self.start()
+                try:
+                    self._queue.put_nowait(row)
+                    break
+                except queue.Full:
+                    pass
+            # Wait for room outside the lock so close() isn't held up
+            if time.monotonic() >= deadline:
+                self._count(rejected=1)
+                raise IngestQueueFull()
+            time.sleep(0.005)
+        self._count(accepted=1)
+
+    def close(self, timeout=10):
+        """Stop the flush loop and write out everything still queued"""
+        with self._submit_lock:
+            self._closed = True
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _count(self, **changes):
+        with self._stats_lock:
+            for key, value in changes.items():
+                self._stats[key] += value
+
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=0.2)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, rows):
+        with transaction() as uow:
+            cursor = uow.conn.cursor()
+            try:
+                cursor.executemany(self.query, rows)
+            finally:
+                cursor.close()
+            uow.dirty = True
+
+    def _after_write(self, rows):
+        if self.after_write is None or not rows:
+            return
+        try:
+            self.after_write(rows)
+        except Exception as e:
+            print(f"❌ {self.name}: after_write failed for {len(rows)} written rows: {e}")
+
+    def _insert_retrying(self, rows):
+        """Insert, retrying all but data errors with backoff; False if given up at shutdown"""
+        attempt = 0
+        while True:
+            try:
+                self._insert(rows)
+                return True
+            except DATA_ERRORS:
+                raise
+            except Exception as e:
+                attempt += 1
+                print(f"❌ {self.name}: batch of {len(rows)} failed (attempt {attempt}): {e}")
+                if self._stop.is_set() and attempt >= self.max_retries:
+                    return False
+                time.sleep(min(0.5 * attempt, MAX_RETRY_DELAY))
+
+    def _write(self, batch):
+        try:
+            if not self._insert_retrying(batch):
+                print(f"❌ {self.name}: dropped {len(batch)} rows at shutdown, database unavailable")
+                self._count(failed=len(batch))
+                return
+        except DATA_ERRORS as e:
+            print(f"❌ {self.name}: batch of {len(batch)} rejected, writing it row by row: {e}")
+        else:
+            self._count(written=len(batch), batches=1)
+            self._after_write(batch)
+            return
+
+        # Keep the good rows
+        written = []
+        for row in batch:
+            try:
+                if self._insert_retrying([row]):
+                    written.append(row)
+                    self._count(written=1)
+                else:
+                    self._count(failed=1)
+            except DATA_ERRORS as e:
+                print(f"❌ {self.name}: dropped row {row}: {e}")
+                self._count(failed=1)
+        self._count(batches=1)
+        self._after_write(written)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._write(batch)
+
+    def stats(self):
+        with self._stats_lock:
+            result = dict(self._stats)
+        result["queued"] = self._queue.qsize()
+        result["capacity"] = self._queue.maxsize
+        return result
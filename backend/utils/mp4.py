@@ -0,0 +1,327 @@
+import bisect
+import json
+import os
+import shutil
+import struct
+
+# Boxes whose payload is just more boxes, on the path down to the sample tables
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"dinf", b"mvex"}
+
+INDEX_SUFFIX = ".index.json"
+
+
+class MP4Error(ValueError):
+    pass
+
+
+def iter_boxes(data, start=0, end=None):
+    """Yield (type, offset, size, header_size) for the boxes in data[start:end]"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise MP4Error(f"Truncated {box_type!r} box at offset {offset}")
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise MP4Error(f"Corrupt {box_type!r} box at offset {offset}")
+        yield box_type, offset, size, header
+        offset += size
+
+
+def read_top_level(path):
+    """Return the top-level boxes of a file without reading their payloads"""
+    boxes = []
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            head = f.read(16)
+            size, box_type = struct.unpack_from(">I4s", head)
+            header = 8
+            if size == 1:
+                if len(head) < 16:
+                    raise MP4Error(f"Truncated {box_type!r} box at offset {offset}")
+                size = struct.unpack_from(">Q", head, 8)[0]
+                header = 16
+            elif size == 0:
+                size = file_size - offset
+            if size < header or offset + size > file_size:
+                raise MP4Error(f"Corrupt {box_type!r} box at offset {offset}")
+            boxes.append((box_type, offset, size, header))
+            offset += size
+    return boxes
+
+
+def _find(boxes, box_type):
+    return next((b for b in boxes if b[0] == box_type), None)
+
+
+def read_moov(path):
+    boxes = read_top_level(path)
+    moov = _find(boxes, b"moov")
+    if moov is None:
+        raise MP4Error("No moov box")
+    with open(path, "rb") as f:
+        f.seek(moov[1])
+        return boxes, bytearray(f.read(moov[2]))
+
+
+def is_faststart(path):
+    boxes = read_top_level(path)
+    moov, mdat = _find(boxes, b"moov"), _find(boxes, b"mdat")
+    return moov is not None and (mdat is None or moov[1] < mdat[1])
+
+
+def _walk(data, start, end, visit):
+    for box_type, offset, size, header in iter_boxes(data, start, end):
+        visit(box_type, offset, size, header)
+        if box_type in CONTAINER_BOXES:
+            _walk(data, offset + header, offset + size, visit)
+
+
+def _shift_chunk_offsets(moov, delta, lo, hi):
+    """Add delta to every stco/co64 entry in [lo, hi) of a moov box, in place"""
+    def visit(box_type, offset, size, header):
+        body = offset + header
+        if box_type not in (b"stco", b"co64"):
+            return
+        fmt, width = (">I", 4) if box_type == b"stco" else (">Q", 8)
+        count = struct.unpack_from(">I", moov, body + 4)[0] if size >= header + 8 else -1
+        if body + 8 + width * count > offset + size or count < 0:
+            raise MP4Error(f"Truncated {box_type.decode('latin-1')} box at offset {offset}")
+        for i in range(count):
+            pos = body + 8 + width * i
+            value = struct.unpack_from(fmt, moov, pos)[0]
+            if lo <= value < hi:
+                value += delta
+                if width == 4 and value > 0xFFFFFFFF:
+                    raise MP4Error("Chunk offset overflows stco; co64 rewrite not supported")
+                struct.pack_into(fmt, moov, pos, value)
+
+    _walk(moov, 8, len(moov), visit)
+
+
+def faststart(src, dst):
+    """Write src to dst with moov moved in front of the media data.
+
+    Returns False (and writes nothing) if src is already faststart.
+    """
+    boxes, moov = read_moov(src)
+    moov_box = _find(boxes, b"moov")
+    first_mdat = _find(boxes, b"mdat")
+    if first_mdat is None or moov_box[1] < first_mdat[1]:
+        return False
+    if moov_box[3] != 8:
+        raise MP4Error("64-bit moov headers are not supported")
+
+    # Everything between the first mdat and the old moov moves back by len(moov)
+    _shift_chunk_offsets(moov, len(moov), first_mdat[1], moov_box[1])
+
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        for box_type, offset, size, header in boxes:
+            if box_type == b"moov":
+                continue
+            if offset == first_mdat[1]:
+                fout.write(moov)
+            fin.seek(offset)
+            _copy(fin, fout, size)
+    return True
+
+
+def _copy(fin, fout, length, bufsize=1024 * 1024):
+    while length > 0:
+        chunk = fin.read(min(bufsize, length))
+        if not chunk:
+            raise MP4Error("Unexpected end of file")
+        fout.write(chunk)
+        length -= len(chunk)
+
+
+def _full_box(moov, box, name=None):
+    """Return (version, body_offset, end) for a full box; name is the box path for errors"""
+    if box is None:
+        raise MP4Error(f"Missing {name} box")
+    box_type, offset, size, header = box
+    if size < header + 4:
+        raise MP4Error(f"Truncated {box_type.decode('latin-1')} box at offset {offset}")
+    return moov[offset + header], offset + header + 4, offset + size
+
+
+def _unpack(fmt, moov, pos, end, name):
+    """struct.unpack_from that stays inside the box ending at `end`"""
+    if pos + struct.calcsize(fmt) > end:
+        raise MP4Error(f"Truncated {name} box")
+    return struct.unpack_from(fmt, moov, pos)
+
+
+def _children(moov, box):
+    box_type, offset, size, header = box
+    return list(iter_boxes(moov, offset + header, offset + size))
+
+
+def _path(moov, box, *types):
+    for box_type in types:
+        if box is None:
+            return None
+        box = _find(_children(moov, box), box_type)
+    return box
+
+
+def _table(moov, tables, box_type):
+    """(body_offset, end, entry_count) of a sample table box"""
+    name = box_type.decode("latin-1")
+    _, body, end = _full_box(moov, tables.get(box_type), name)
+    return body + 4, end, _unpack(">I", moov, body, end, name)[0]
+
+
+def _track_samples(moov, trak):
+    """Return (timescale, keyframes) for a track, keyframes as (decode_time, byte_offset)"""
+    version, body, end = _full_box(moov, _path(moov, trak, b"mdia", b"mdhd"), "mdhd")
+    timescale = _unpack(">I", moov, body + (16 if version == 1 else 8), end, "mdhd")[0]
+    if not timescale:
+        raise MP4Error("Track timescale is 0")
+
+    stbl = _path(moov, trak, b"mdia", b"minf", b"stbl")
+    if stbl is None:
+        raise MP4Error("Missing stbl box")
+    tables = {b[0]: b for b in _children(moov, stbl)}
+
+    # stsz: size of every sample
+    _, body, end = _full_box(moov, tables.get(b"stsz"), "stsz")
+    sample_size, sample_count = _unpack(">II", moov, body, end, "stsz")
+    if sample_size:
+        sizes = [sample_size] * sample_count
+    else:
+        sizes = list(_unpack(f">{sample_count}I", moov, body + 8, end, "stsz"))
+
+    # stts: decode time of every sample
+    body, end, count = _table(moov, tables, b"stts")
+    times = []
+    t = 0
+    for i in range(count):
+        run_count, delta = _unpack(">II", moov, body + 8 * i, end, "stts")
+        for _ in range(min(run_count, len(sizes) - len(times))):
+            times.append(t)
+            t += delta
+
+    # stco/co64: offset of every chunk
+    if b"stco" in tables:
+        body, end, count = _table(moov, tables, b"stco")
+        chunk_offsets = _unpack(f">{count}I", moov, body, end, "stco")
+    elif b"co64" in tables:
+        body, end, count = _table(moov, tables, b"co64")
+        chunk_offsets = _unpack(f">{count}Q", moov, body, end, "co64")
+    else:
+        raise MP4Error("Missing stco/co64 box")
+
+    # stsc: samples per chunk, as runs of (first_chunk, samples_per_chunk)
+    body, end, count = _table(moov, tables, b"stsc")
+    runs = [_unpack(">III", moov, body + 12 * i, end, "stsc")[:2] for i in range(count)]
+
+    offsets = []
+    sample = 0
+    for r, (first_chunk, per_chunk) in enumerate(runs):
+        last_chunk = runs[r + 1][0] - 1 if r + 1 < len(runs) else len(chunk_offsets)
+        if not 1 <= first_chunk <= len(chunk_offsets) or last_chunk > len(chunk_offsets):
+            raise MP4Error(f"stsc refers to chunk {first_chunk} of {len(chunk_offsets)}")
+        for chunk in range(first_chunk, last_chunk + 1):
+            pos = chunk_offsets[chunk - 1]
+            for _ in range(per_chunk):
+                if sample >= len(sizes):
+                    break
+                offsets.append(pos)
+                pos += sizes[sample]
+                sample += 1
+
+    # stss: sync samples (1-based); absent means every sample is a keyframe
+    if b"stss" in tables:
+        body, end, count = _table(moov, tables, b"stss")
+        sync = [n - 1 for n in _unpack(f">{count}I", moov, body, end, "stss")]
+    else:
+        sync = range(len(offsets))
+
+    keyframes = [(times[n], offsets[n]) for n in sync if 0 <= n < len(offsets) and n < len(times)]
+    return timescale, keyframes
+
+
+def build_index(path):
+    """Extract a compact keyframe index (seconds -> byte offset) for the video track"""
+    boxes, moov = read_moov(path)
+    moov_box = _find(boxes, b"moov")
+    first_mdat = _find(boxes, b"mdat")
+
+    version, body, end = _full_box(moov, _find(iter_boxes(moov, 8), b"mvhd"), "mvhd")
+    if version == 1:
+        movie_timescale, duration = _unpack(">IQ", moov, body + 16, end, "mvhd")
+    else:
+        movie_timescale, duration = _unpack(">II", moov, body + 8, end, "mvhd")
+
+    keyframes = None
+    for trak in (b for b in iter_boxes(moov, 8) if b[0] == b"trak"):
+        _, body, end = _full_box(moov, _path(moov, trak, b"mdia", b"hdlr"), "hdlr")
+        if _unpack(">4x4s", moov, body, end, "hdlr")[0] == b"vide":
+            timescale, samples = _track_samples(moov, trak)
+            keyframes = [[round(t / timescale, 3), offset] for t, offset in samples]
+            break
+    if keyframes is None:
+        raise MP4Error("No video track")
+    if not keyframes:
+        raise MP4Error("Video track has no keyframes")
+
+    return {
+        "size": os.path.getsize(path),
+        "duration": round(duration / movie_timescale, 3) if movie_timescale else None,
+        "faststart": first_mdat is None or moov_box[1] < first_mdat[1],
+        # Bytes the player needs before the first frame (ftyp + moov when faststart)
+        "init_range": [0, moov_box[1] + moov_box[2] - 1],
+        "keyframes": keyframes,
+    }
+
+
+def index_path(video_path):
+    return video_path + INDEX_SUFFIX
+
+
+def write_index(video_path):
+    index = build_index(video_path)
+    with open(index_path(video_path), "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return index
+
+
+def load_index(video_path):
+    """Load the stored index, rebuilding it if missing or older than the video"""
+    sidecar = index_path(video_path)
+    if os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(video_path):
+        with open(sidecar) as f:
+            return json.load(f)
+    return build_index(video_path)
+
+
+def seek(index, seconds):
+    """Return the keyframe at or before `seconds` and the byte range to request"""
+    keyframes = index["keyframes"]
+    i = max(bisect.bisect_right([k[0] for k in keyframes], seconds) - 1, 0)
+    time, offset = keyframes[i]
+    return {"time": time, "offset": offset, "range": f"bytes={offset}-"}
+
+
+def ingest(video_path):
+    """Rewrite a video to faststart in place (if needed) and store its index"""
+    tmp = video_path + ".faststart.tmp"
+    try:
+        rewritten = faststart(video_path, tmp)
+        if rewritten:
+            shutil.copymode(video_path, tmp)
+            os.replace(tmp, video_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return rewritten, write_index(video_path)
@@ -0,0 +1,68 @@
+from functools import wraps
+from flask import request, jsonify
+from db import fetch_all
+from utils.cache import TTLCache
+import os
+
+# user_id -> frozenset of Profile_Ids. trg_CheckProfileLimit caps this at 3
+# profiles per user, so entries are tiny.
+#
+# The cache is per worker: invalidate_user() only clears the worker that
+# deleted the profile, so the others keep counting it as owned for up to
+# PROFILE_OWNER_CACHE_TTL seconds. Reads accept that window; writes
+# (anything but GET/HEAD/OPTIONS) check the database instead, so nothing is
+# written for a profile that is already gone. A refusal is always confirmed
+# against the database, so a new profile is never refused.
+profile_owners = TTLCache(
+    maxsize=int(os.getenv("PROFILE_OWNER_CACHE_SIZE", "50000")),
+    ttl=int(os.getenv("PROFILE_OWNER_CACHE_TTL", "30")),
+)
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _load_profile_ids(user_id):
+    rows = fetch_all("SELECT Profile_Id FROM profile WHERE User_Id = %s", (user_id,))
+    return frozenset(r["Profile_Id"] for r in rows)
+
+
+def owns_profile(user_id, profile_id, fresh=False):
+    """Whether the user owns the profile; fresh=True skips the cache, for writes"""
+    try:
+        profile_id = int(profile_id)
+    except (TypeError, ValueError):
+        return False
+
+    if not fresh and profile_id in profile_owners.get_or_load(user_id, lambda: _load_profile_ids(user_id)):
+        return True
+
+    # The set may predate a profile created or deleted through another
+    # worker, so confirm against the database before refusing or writing
+    profile_ids = _load_profile_ids(user_id)
+    profile_owners.set(user_id, profile_ids)
+    return profile_id in profile_ids
+
+
+def invalidate_user(user_id):
+    profile_owners.invalidate(user_id)
+
+
+def profile_owner_required(f):
+    """Reject requests for a profile_id (URL or JSON body) not owned by the current user.
+
+    Goes below @token_required. Requests without a profile_id are passed
+    through so the route can report the missing field itself. Writes are
+    checked against the database rather than the cache.
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        profile_id = kwargs.get("profile_id")
+        if profile_id is None:
+            profile_id = (request.get_json(silent=True) or {}).get("profile_id")
+
+        fresh = request.method not in SAFE_METHODS
+        if profile_id and not owns_profile(current_user, profile_id, fresh=fresh):
+            return jsonify({"success": False, "message": "Profile not found or not owned by user"}), 403
+
+        return f(current_user, *args, **kwargs)
+
+    return decorated
@@ -0,0 +1,112 @@
+import base64
+import json
+import math
+import os
+from flask import request
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Pack the sort-key values of the last row into an opaque token"""
+    raw = json.dumps([v if isinstance(v, (int, float)) else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise InvalidCursor("Invalid cursor")
+    # Only what encode_cursor writes: each value is bound as a query parameter
+    if not isinstance(values, list) or not all(_is_scalar(v) for v in values):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def _is_scalar(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, (int, str))
+
+
+def get_page_request():
+    """Read ?limit= and ?cursor= from the query string.
+
+    Returns None when the client asked for neither, so routes can keep
+    returning the full, unpaginated list. Otherwise returns (limit, cursor)
+    where cursor is None for the first page.
+    """
+    args = request.args
+    if "limit" not in args and "cursor" not in args:
+        return None
+
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    token = args.get("cursor")
+    return limit, decode_cursor(token) if token else None
+
+
+def keyset_condition(columns, cursor, descending=True):
+    """Build the WHERE fragment that seeks past the cursor row.
+
+    For columns (a, b) sorted descending this is
+    `(a < %s OR (a = %s AND b < %s))`, which the index on the sort columns
+    can satisfy directly, so page N costs the same as page 1.
+    """
+    if len(cursor) != len(columns):
+        raise InvalidCursor("Invalid cursor")
+
+    op = "<" if descending else ">"
+    clauses = []
+    params = []
+    for i, column in enumerate(columns):
+        parts = [f"{c} = %s" for c in columns[:i]] + [f"{column} {op} %s"]
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(cursor[:i + 1])
+    return "(" + " OR ".join(clauses) + ")", tuple(params)
+
+
+def paginated_query(base_query, params, columns, page, descending=True):
+    """Add the keyset condition, ORDER BY and LIMIT to a query.
+
+    base_query must end in a WHERE clause (use "WHERE 1 = 1" if there is no
+    filter). One extra row is fetched so split_page() can tell whether
+    another page exists.
+    """
+    limit, cursor = page
+    query = base_query
+    params = tuple(params or ())
+    if cursor is not None:
+        condition, cursor_params = keyset_condition(columns, cursor, descending)
+        query += f" AND {condition}"
+        params += cursor_params
+
+    direction = "DESC" if descending else "ASC"
+    query += " ORDER BY " + ", ".join(f"{c} {direction}" for c in columns)
+    query += " LIMIT %s"
+    return query, params + (limit + 1,)
+
+
+def split_page(rows, limit, keys):
+    """Trim the look-ahead row and return (rows, next_cursor).
+
+    keys are the result-set names of the sort columns, in the same order
+    as passed to paginated_query().
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][k] for k in keys])
@@ -0,0 +1,171 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import threading
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed to generate variants, not to serve them
+    Image = None
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POSTER_SOURCE = os.getenv("POSTER_SOURCE", os.path.join(BACKEND_DIR, "poster_sources"))
+POSTER_STORE = os.getenv("POSTER_STORE", os.path.join(BACKEND_DIR, "poster_store"))
+# Prefix for generated URLs, e.g. a CDN origin; empty means this server
+POSTER_BASE_URL = os.getenv("POSTER_BASE_URL", "").rstrip("/")
+MANIFEST = "manifest.json"
+
+WIDTHS = (92, 185, 342, 500)
+PLACEHOLDER_WIDTH = 16
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+class PosterError(Exception):
+    pass
+
+
+def slugify(title):
+    """Stable file key for a title: "Se7en" -> "se7en", "La La Land" -> "la-la-land" """
+    return re.sub(r"[^a-z0-9]+", "-", (title or "").lower()).strip("-")
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:20]
+
+
+def _encode(image, width):
+    """Resize to `width` (never upscaling) and return JPEG bytes"""
+    if image.width > width:
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def ingest_file(path, store=POSTER_STORE):
+    """Store one source image and its variants under its content digest.
+
+    Returns the manifest entry. Files are written under <digest>/ so an
+    unchanged source is a no-op and a changed one gets new URLs, which is
+    what makes immutable caching safe. Without Pillow the original is
+    stored as the only variant and no placeholder is produced.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = _digest(data)
+    directory = os.path.join(store, digest)
+    os.makedirs(directory, exist_ok=True)
+
+    if Image is None:
+        ext = os.path.splitext(path)[1].lower()
+        name = f"original{ext}"
+        target = os.path.join(directory, name)
+        if not os.path.exists(target):
+            shutil.copyfile(path, target)
+        return {"digest": digest, "variants": {}, "original": name, "placeholder": None}
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception as e:
+        raise PosterError(f"{path}: not a readable image ({e})")
+    image = image.convert("RGB")
+
+    variants = {}
+    for width in WIDTHS:
+        name = f"w{width}.jpg"
+        target = os.path.join(directory, name)
+        if not os.path.exists(target):
+            _write_atomic(target, _encode(image, width))
+        variants[str(width)] = name
+
+    placeholder = _encode(image, PLACEHOLDER_WIDTH)
+    _write_atomic(os.path.join(directory, "placeholder.jpg"), placeholder)
+    return {
+        "digest": digest,
+        "variants": variants,
+        "original": None,
+        # Small enough to inline, so cards can paint a blurred preview with no request
+        "placeholder": "data:image/jpeg;base64," + base64.b64encode(placeholder).decode("ascii"),
+    }
+
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def ingest_directory(source=POSTER_SOURCE, store=POSTER_STORE):
+    """Ingest every image in `source`, keyed by file name slug, and rewrite the manifest"""
+    if not os.path.isdir(source):
+        raise PosterError(f"Poster source directory not found: {source}")
+    os.makedirs(store, exist_ok=True)
+
+    manifest = {}
+    for name in sorted(os.listdir(source)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in SOURCE_EXTENSIONS:
+            continue
+        manifest[slugify(stem)] = ingest_file(os.path.join(source, name), store)
+
+    _write_atomic(os.path.join(store, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    return manifest
+
+
+class _ManifestCache:
+    """The store's manifest, reloaded when the file changes on disk"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._manifest = {}
+
+    def get(self):
+        path = os.path.join(self.store, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return {}
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with open(path, "r", encoding="utf-8") as f:
+                        self._manifest = json.load(f)
+                    self._mtime = mtime
+        return self._manifest
+
+
+_manifest = _ManifestCache(POSTER_STORE)
+
+
+def poster_path(digest, filename):
+    return f"{POSTER_BASE_URL}/api/posters/{digest}/{filename}"
+
+
+def poster_images(title):
+    """srcset-ready URLs for a title's local poster, or None if it was never ingested"""
+    entry = _manifest.get().get(slugify(title))
+    if not entry:
+        return None
+
+    digest = entry["digest"]
+    variants = {int(w): poster_path(digest, name) for w, name in entry["variants"].items()}
+    if not variants:
+        src = poster_path(digest, entry["original"])
+        return {"src": src, "srcset": None, "variants": {}, "placeholder": None}
+
+    largest = max(variants)
+    return {
+        "src": variants[largest],
+        "srcset": ", ".join(f"{url} {width}w" for width, url in sorted(variants.items())),
+        "variants": variants,
+        "placeholder": entry.get("placeholder"),
+    }
@@ -0,0 +1,175 @@
+import os
+from functools import wraps
+import jwt
+from flask import request, jsonify, make_response
+from db import fetch_all, fetch_one
+from utils.auth_middleware import get_bearer_token, verify_token
+from utils.cache import TTLCache
+from utils.content import AGE_RATING_LEVELS
+from utils.ownership import owns_profile
+
+# A restriction class is (max age level or None, language or None). Every
+# profile maps onto one of a handful of classes, so filtered catalog views
+# are cached per class rather than per profile.
+UNRESTRICTED = (None, None)
+
+# Profile_Id -> restriction class. Profiles can't be edited, only deleted.
+profile_restrictions = TTLCache(
+    maxsize=int(os.getenv("PROFILE_RESTRICTION_CACHE_SIZE", "50000")),
+    ttl=int(os.getenv("PROFILE_RESTRICTION_CACHE_TTL", "3600")),
+)
+
+# (snapshot version, restriction class) -> filtered home feed
+home_views = TTLCache(maxsize=64, ttl=None)
+
+# Ranked lists that are cut to a length before filtering (search,
+# recommendations) fetch this many times more candidates for restricted
+# profiles, so the filtered list is still full in the common case
+RESTRICTED_OVERFETCH = 4
+
+# Languages are only recorded on home_page; reloaded with the catalog cache TTL
+_languages = TTLCache(maxsize=1, ttl=int(os.getenv("CATALOG_CACHE_TTL", "300")))
+
+
+def restriction_class(age_restriction, language):
+    """Class for a profile's Age_Restriction and Language_Preference.
+
+    "All" (or any value not on the rating scale) means no age limit.
+    """
+    level = AGE_RATING_LEVELS.get(age_restriction)
+    language = language.strip().casefold() if language and language.strip() else None
+    return (level, language)
+
+
+def class_key(restriction):
+    """Stable string for a restriction class, used in cache keys"""
+    level, language = restriction
+    return f"age{'' if level is None else level}:{language or ''}"
+
+
+def profile_restriction(profile_id):
+    """Restriction class of a profile, or None if it doesn't exist"""
+    def load():
+        row = fetch_one(
+            "SELECT Age_Restriction, Language_Preference FROM profile WHERE Profile_Id = %s",
+            (profile_id,),
+        )
+        return restriction_class(row.get("Age_Restriction"), row.get("Language_Preference")) if row else None
+
+    return profile_restrictions.get_or_load(profile_id, load)
+
+
+def invalidate_profile(profile_id):
+    profile_restrictions.invalidate(profile_id)
+
+
+def title_languages():
+    """{(Content_Type, Content_Id): Language} for the titles that have one"""
+    return _languages.get_or_load("all", lambda: {
+        (row["Content_Type"], row["Content_Id"]): row["Language"]
+        for row in fetch_all("SELECT Content_Type, Content_Id, Language FROM home_page WHERE Language IS NOT NULL")
+    })
+
+
+def allows(restriction, age_rating, language=None):
+    """Whether a title may be shown under a restriction class.
+
+    Restricted classes never see titles without a known rating. A title
+    whose language is unknown passes the language check.
+    """
+    level, preferred = restriction
+    if level is not None:
+        title_level = AGE_RATING_LEVELS.get(age_rating)
+        if title_level is None or title_level > level:
+            return False
+    if preferred is not None and language and language.casefold() != preferred:
+        return False
+    return True
+
+
+def filter_items(items, restriction, content_key=None):
+    """API items with an "age_rating" that are visible under a restriction class.
+
+    Items without a "language" of their own are looked up by
+    `content_key(item)` -> (Content_Type, Content_Id) when given.
+    """
+    if restriction == UNRESTRICTED:
+        return items
+    languages = title_languages() if restriction[1] is not None and content_key else {}
+    return [
+        item for item in items
+        if allows(
+            restriction,
+            item.get("age_rating"),
+            item.get("language") or (languages.get(content_key(item)) if content_key else None),
+        )
+    ]
+
+
+def item_key(item):
+    """(Content_Type, Content_Id) of a resolved content record, or an API item with both fields"""
+    return (item["content_type"], item["content_id"])
+
+
+def visible_keys(contents, restriction):
+    """The keys of resolve_many() results that a restriction class may see"""
+    return {item_key(c) for c in filter_items(list(contents.values()), restriction, item_key)}
+
+
+def cached_view(cache, key, items, restriction, content_key=None):
+    """`items` filtered for a restriction class, memoized in `cache` under `key` plus the class.
+
+    The key should share the prefix of the unfiltered entry so that
+    invalidating the catalog drops the views along with it.
+    """
+    if restriction == UNRESTRICTED:
+        return items
+    return cache.get_or_load(
+        f"{key}:view:{class_key(restriction)}", lambda: filter_items(items, restriction, content_key)
+    )
+
+
+def _private(policy):
+    """A Cache-Control policy for one user's response: shared caches must not keep it"""
+    if not policy:
+        return "private"
+    if "public" in policy:
+        return policy.replace("public", "private")
+    return f"private, {policy}"
+
+
+def with_restriction(f):
+    """Pass the restriction class of ?profile_id= to the route as `restriction`.
+
+    Requests without a profile_id get UNRESTRICTED. With one, the bearer
+    token must belong to the profile's owner (401/403 otherwise), and the
+    response is marked private and varies on Authorization. Goes above
+    @conditional, so a 304 is never answered before the check.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        profile_id = request.args.get("profile_id", type=int)
+        if profile_id is None:
+            return f(*args, restriction=UNRESTRICTED, **kwargs)
+
+        token = get_bearer_token()
+        if not token:
+            return jsonify({"success": False, "message": "Missing token"}), 401
+        try:
+            current_user = verify_token(token)
+        except jwt.ExpiredSignatureError:
+            return jsonify({"success": False, "message": "Token expired"}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({"success": False, "message": "Invalid token"}), 401
+        if not owns_profile(current_user, profile_id):
+            return jsonify({"success": False, "message": "Profile not found or not owned by user"}), 403
+
+        restriction = profile_restriction(profile_id)
+        if restriction is None:
+            return jsonify({"success": False, "message": "Profile not found"}), 404
+        response = make_response(f(*args, restriction=restriction, **kwargs))
+        response.headers["Cache-Control"] = _private(response.headers.get("Cache-Control"))
+        response.vary.add("Authorization")
+        return response
+
+    return decorated
@@ -0,0 +1,243 @@
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+from db import execute_query, fetch_all, get_connection
+from utils.cache import TTLCache
+
+# A title counts as finished (and drops out of "continue watching") once
+# the position passes this share of its duration
+COMPLETE_RATIO = 0.95
+
+
+class ProgressStore:
+    """Latest playback position per (profile, content), coalesced in memory.
+
+    Heartbeats only overwrite the in-memory entry; a background thread
+    upserts the entries that changed since the last flush every
+    `flush_interval` seconds. DB writes therefore scale with the number of
+    active sessions rather than the number of heartbeats.
+
+    Reads are served from a per-profile snapshot loaded from the table once
+    and kept current by heartbeats. Positions are per worker process until
+    flushed, so another worker sees them after at most one flush interval
+    plus the snapshot TTL.
+    """
+
+    def __init__(self, table="watch_progress", flush_interval=5.0, max_profiles=50000,
+                 profile_ttl=600, max_retries=3):
+        self.table = table
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.upsert = f"""
+            INSERT INTO {table} (Profile_Id, Content_Type, Content_Id, Position_Seconds, Duration_Seconds, Updated_At)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                Position_Seconds = VALUES(Position_Seconds),
+                Duration_Seconds = COALESCE(VALUES(Duration_Seconds), Duration_Seconds),
+                Updated_At = VALUES(Updated_At)
+        """
+        # profile_id -> {(content_type, content_id): entry}, waiting for the next flush
+        self._dirty = {}
+        # The batch a flush is writing, same shape; forget() prunes it too
+        self._in_flight = {}
+        # Bumped each time a flush is done with its batch, so a snapshot
+        # loaded across one can tell it may have missed those positions
+        self._flush_generation = 0
+        self._lock = threading.Lock()
+        # Held while a batch is turned into rows and written
+        self._write_lock = threading.Lock()
+        # profile_id -> {(content_type, content_id): entry}, everything known for the profile
+        self.profiles = TTLCache(maxsize=max_profiles, ttl=profile_ttl)
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"heartbeats": 0, "flushes": 0, "written": 0, "failed": 0}
+        atexit.register(self.close)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f"{self.table}-flush", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout=10):
+        """Stop the flush loop after writing out the last positions"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def heartbeat(self, profile_id, content_type, content_id, position, duration=None):
+        if self._thread is None:
+            self.start()
+        key = (content_type, content_id)
+        entry = {"position": position, "duration": duration, "updated_at": datetime.now()}
+        with self._lock:
+            previous = self._dirty.get(profile_id, {}).get(key) or self._in_flight.get(profile_id, {}).get(key)
+            if duration is None and previous is not None:
+                entry["duration"] = previous["duration"]
+            self._dirty.setdefault(profile_id, {})[key] = entry
+            self._stats["heartbeats"] += 1
+            snapshot = self.profiles.get(profile_id)
+            if snapshot is not None:
+                if entry["duration"] is None and key in snapshot:
+                    entry["duration"] = snapshot[key]["duration"]
+                snapshot[key] = entry
+        return entry
+
+    def _load_profile(self, profile_id):
+        rows = fetch_all(f"""
+            SELECT Content_Type, Content_Id, Position_Seconds, Duration_Seconds, Updated_At
+            FROM {self.table}
+            WHERE Profile_Id = %s
+        """, (profile_id,))
+        return {
+            (r["Content_Type"], r["Content_Id"]): {
+                "position": r["Position_Seconds"],
+                "duration": r["Duration_Seconds"],
+                "updated_at": r["Updated_At"],
+            }
+            for r in rows
+        }
+
+    @staticmethod
+    def _merge(snapshot, entries):
+        for key, entry in entries.items():
+            # A heartbeat without a duration keeps the one already known
+            if entry["duration"] is None and key in snapshot:
+                entry = {**entry, "duration": snapshot[key]["duration"]}
+            snapshot[key] = entry
+
+    def forget(self, profile_id):
+        """Drop a deleted profile's positions, pending, in flight and persisted"""
+        with self._lock:
+            self._dirty.pop(profile_id, None)
+            self._in_flight.pop(profile_id, None)
+            self.profiles.invalidate(profile_id)
+        # A write that took its rows before the line above must land before the DELETE
+        with self._write_lock:
+            pass
+        execute_query(f"DELETE FROM {self.table} WHERE Profile_Id = %s", (profile_id,))
+
+    def positions(self, profile_id):
+        """Every known position for a profile, newest heartbeat first"""
+        snapshot = self.profiles.get(profile_id)
+        while snapshot is None:
+            with self._lock:
+                generation = self._flush_generation
+            loaded = self._load_profile(profile_id)
+            with self._lock:
+                # A flush finished during the load: its rows may have committed
+                # after the SELECT and already left _in_flight, so load again
+                if self._flush_generation != generation:
+                    continue
+                # Heartbeats not yet written, being written or arriving during the load win over the table
+                self._merge(loaded, self._in_flight.get(profile_id, {}))
+                self._merge(loaded, self._dirty.get(profile_id, {}))
+                self.profiles.set(profile_id, loaded)
+                snapshot = loaded
+
+        with self._lock:
+            items = [
+                {"content_type": key[0], "content_id": key[1], **entry}
+                for key, entry in snapshot.items()
+            ]
+        items.sort(key=lambda item: item["updated_at"], reverse=True)
+        return items
+
+    def continue_watching(self, profile_id, limit=20):
+        """Started but unfinished titles, most recently watched first"""
+        result = []
+        for item in self.positions(profile_id):
+            if item["position"] <= 0:
+                continue
+            duration = item["duration"]
+            if duration and item["position"] >= duration * COMPLETE_RATIO:
+                continue
+            result.append(item)
+            if len(result) >= limit:
+                break
+        return result
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            self._in_flight = dirty
+        if not dirty:
+            return 0
+
+        try:
+            written = self._write(dirty)
+            if written is not None:
+                return written
+
+            # Put the batch back for the next attempt unless a newer heartbeat replaced it
+            with self._lock:
+                for profile_id, entries in dirty.items():
+                    pending = self._dirty.setdefault(profile_id, {})
+                    for key, entry in entries.items():
+                        pending.setdefault(key, entry)
+            return 0
+        finally:
+            with self._lock:
+                self._in_flight = {}
+                self._flush_generation += 1
+
+    def _rows(self, batch):
+        with self._lock:
+            return [
+                (profile_id, key[0], key[1], entry["position"], entry["duration"], entry["updated_at"])
+                for profile_id, entries in batch.items()
+                for key, entry in entries.items()
+            ]
+
+    def _write(self, batch):
+        """Upsert the batch, retrying; the number of rows written, or None if every attempt failed"""
+        rows = []
+        for attempt in range(self.max_retries):
+            conn = None
+            try:
+                with self._write_lock:
+                    # Rebuilt on each attempt, without the profiles forgotten meanwhile
+                    rows = self._rows(batch)
+                    if not rows:
+                        return 0
+                    conn = get_connection()
+                    cursor = conn.cursor()
+                    cursor.executemany(self.upsert, rows)
+                    conn.commit()
+                    cursor.close()
+                with self._lock:
+                    self._stats["flushes"] += 1
+                    self._stats["written"] += len(rows)
+                return len(rows)
+            except Exception as e:
+                print(f"❌ {self.table}: flush of {len(rows)} positions failed (attempt {attempt + 1}): {e}")
+                if not self._stop.is_set():
+                    time.sleep(0.5 * (attempt + 1))
+            finally:
+                if conn is not None:
+                    conn.close()
+        with self._lock:
+            self._stats["failed"] += len(rows)
+        return None
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            result = dict(self._stats)
+            result["pending"] = sum(len(entries) for entries in self._dirty.values())
+        result["profiles_cached"] = len(self.profiles)
+        return result
+
+
+watch_progress = ProgressStore(
+    flush_interval=float(os.getenv("PROGRESS_FLUSH_INTERVAL", "5")),
+    max_profiles=int(os.getenv("PROGRESS_CACHE_SIZE", "50000")),
+    profile_ttl=int(os.getenv("PROGRESS_CACHE_TTL", "600")),
+)
@@ -0,0 +1,171 @@
+from db import after_commit, execute_query, fetch_all, transaction
+from utils.cache import TTLCache
+from utils.http_cache import on_change
+import os
+
+RATING_VALUES = (1, 2, 3, 4, 5)
+
+# (Content_Type, Content_Id) -> {"sum", "count", "histogram"}, read through
+# from rating_aggregate. Titles without ratings are cached too.
+rating_aggregates = TTLCache(
+    maxsize=int(os.getenv("RATING_CACHE_SIZE", "20000")),
+    ttl=int(os.getenv("RATING_CACHE_TTL", "300")),
+)
+
+# Catalog responses embed the averages, so a rating written through another
+# worker (which bumps the title's resource) must not be served from here
+on_change("movies", rating_aggregates.clear)
+on_change("tvshows", rating_aggregates.clear)
+
+_HISTOGRAM_COLUMNS = ", ".join(f"Count_{v}" for v in RATING_VALUES)
+
+# Adds the deltas to the existing row, so each rating write touches one row
+# regardless of how many ratings the title has
+_APPLY_DELTA = f"""
+    INSERT INTO rating_aggregate (Content_Type, Content_Id, Rating_Sum, Rating_Count, {_HISTOGRAM_COLUMNS})
+    VALUES (%s, %s, %s, %s, {", ".join("%s" for _ in RATING_VALUES)})
+    ON DUPLICATE KEY UPDATE
+        Rating_Sum = Rating_Sum + VALUES(Rating_Sum),
+        Rating_Count = Rating_Count + VALUES(Rating_Count),
+        {", ".join(f"Count_{v} = Count_{v} + VALUES(Count_{v})" for v in RATING_VALUES)}
+"""
+
+
+def _empty():
+    return {"sum": 0, "count": 0, "histogram": [0] * len(RATING_VALUES)}
+
+
+def _from_row(row):
+    return {
+        "sum": int(row["Rating_Sum"]),
+        "count": int(row["Rating_Count"]),
+        "histogram": [int(row[f"Count_{v}"]) for v in RATING_VALUES],
+    }
+
+
+def apply_rating_change(content_type, content_id, old=None, new=None):
+    """Fold one rating insert (new), edit (old and new) or delete (old) into the aggregate.
+
+    Runs on the caller's connection, so it commits or rolls back together
+    with the rating_review write it accompanies.
+    """
+    histogram = [0] * len(RATING_VALUES)
+    if old is not None:
+        histogram[old - 1] -= 1
+    if new is not None:
+        histogram[new - 1] += 1
+    delta_sum = (new or 0) - (old or 0)
+    delta_count = (new is not None) - (old is not None)
+
+    execute_query(_APPLY_DELTA, (content_type, content_id, delta_sum, delta_count, *histogram))
+    after_commit(rating_aggregates.invalidate, (content_type, content_id))
+
+
+def cached_aggregates(content_type, content_ids):
+    """(aggregates found in the cache by id, ids that still need loading)"""
+    result = {}
+    missing = []
+    for content_id in content_ids:
+        aggregate = rating_aggregates.get((content_type, content_id))
+        if aggregate is None:
+            missing.append(content_id)
+        else:
+            result[content_id] = aggregate
+    return result, missing
+
+
+def aggregates_query(content_type, content_ids):
+    """(query, params) loading the aggregates of the given ids"""
+    placeholders = ", ".join(["%s"] * len(content_ids))
+    return f"""
+        SELECT Content_Id, Rating_Sum, Rating_Count, {_HISTOGRAM_COLUMNS}
+        FROM rating_aggregate
+        WHERE Content_Type = %s AND Content_Id IN ({placeholders})
+    """, (content_type, *content_ids)
+
+
+def store_aggregates(content_type, content_ids, rows):
+    """Cache the loaded rows for `content_ids`; ids without a row are cached as unrated"""
+    loaded = {row["Content_Id"]: _from_row(row) for row in rows}
+    result = {}
+    for content_id in content_ids:
+        aggregate = loaded.get(content_id) or _empty()
+        rating_aggregates.set((content_type, content_id), aggregate)
+        result[content_id] = aggregate
+    return result
+
+
+def get_aggregates(content_type, content_ids):
+    """Aggregates for many titles; cache misses are loaded with a single query"""
+    result, missing = cached_aggregates(content_type, content_ids)
+    if missing:
+        rows = fetch_all(*aggregates_query(content_type, missing))
+        result.update(store_aggregates(content_type, missing, rows))
+    return result
+
+
+def get_aggregate(content_type, content_id):
+    return get_aggregates(content_type, [content_id])[content_id]
+
+
+def load_aggregate(content_type, content_id):
+    """Aggregate read past the cache, on the caller's connection (sees its uncommitted writes)"""
+    rows = fetch_all(*aggregates_query(content_type, [content_id]))
+    return _from_row(rows[0]) if rows else _empty()
+
+
+def average_rating(content_type, content_id, fallback=None):
+    """Mean rating from the aggregate store.
+
+    Titles nobody has rated yet keep `fallback` (the catalog's seeded
+    average_rating column) so they don't all drop to 0.
+    """
+    return mean_rating(get_aggregate(content_type, content_id), fallback)
+
+
+def mean_rating(aggregate, fallback=None):
+    if aggregate["count"] > 0:
+        return round(aggregate["sum"] / aggregate["count"], 2)
+    return float(fallback) if fallback else 0
+
+
+def summarize(aggregate):
+    return {
+        "average_rating": round(aggregate["sum"] / aggregate["count"], 2) if aggregate["count"] else 0,
+        "rating_count": aggregate["count"],
+        "histogram": {str(v): n for v, n in zip(RATING_VALUES, aggregate["histogram"])},
+    }
+
+
+def rebuild_aggregates():
+    """Recompute rating_aggregate from rating_review and copy the averages to the catalog.
+
+    Reconciliation for anything the incremental path missed (manual SQL,
+    failed deploys). Runs as one transaction so readers never see a
+    half-built table.
+    """
+    histogram_sums = ", ".join(f"SUM(Rating = {v})" for v in RATING_VALUES)
+    with transaction():
+        execute_query("DELETE FROM rating_aggregate")
+        execute_query(f"""
+            INSERT INTO rating_aggregate (Content_Type, Content_Id, Rating_Sum, Rating_Count, {_HISTOGRAM_COLUMNS})
+            SELECT Content_Type, Content_Id, SUM(Rating), COUNT(*), {histogram_sums}
+            FROM rating_review
+            GROUP BY Content_Type, Content_Id
+        """)
+        # Keeps average_rating current for queries that still read the column directly
+        execute_query("""
+            UPDATE movie m
+            JOIN rating_aggregate ra ON ra.Content_Type = 'Movie' AND ra.Content_Id = m.Movie_Id
+            SET m.average_rating = ra.Rating_Sum / ra.Rating_Count
+            WHERE ra.Rating_Count > 0
+        """)
+        execute_query("""
+            UPDATE tv_show t
+            JOIN rating_aggregate ra ON ra.Content_Type = 'TV_Show' AND ra.Content_Id = t.Show_Id
+            SET t.average_rating = ra.Rating_Sum / ra.Rating_Count
+            WHERE ra.Rating_Count > 0
+        """)
+        rows = fetch_all("SELECT COUNT(*) AS titles, COALESCE(SUM(Rating_Count), 0) AS ratings FROM rating_aggregate")
+    rating_aggregates.clear()
+    return rows[0]
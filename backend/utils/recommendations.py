@@ -0,0 +1,217 @@
+import heapq
+import math
+import os
+from db import fetch_all, transaction
+from utils.cache import TTLCache
+from utils.progress import watch_progress
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # only the offline build needs them; serving reads content_neighbour
+    np = sparse = None
+
+NEIGHBOURS_PER_TITLE = int(os.getenv("RECOMMEND_NEIGHBOURS", "30"))
+SEED_COUNT = 5  # "because you watched" rows per profile
+
+# How much each kind of interaction says about a profile liking a title.
+# Views are log-damped so a rewatched favourite doesn't drown everything else;
+# ratings of 3 or less are not a positive signal and are left out.
+VIEW_WEIGHT = 1.0
+WATCHLIST_WEIGHT = 0.5
+RATING_WEIGHTS = {4: 0.5, 5: 1.0}
+
+# (Content_Type, Content_Id) -> [((Content_Type, Content_Id), score), ...] best first
+neighbour_cache = TTLCache(
+    maxsize=int(os.getenv("RECOMMEND_CACHE_SIZE", "20000")),
+    ttl=int(os.getenv("RECOMMEND_CACHE_TTL", "3600")),
+)
+
+
+class RecommendationError(Exception):
+    pass
+
+
+# --- offline build ---
+
+def load_interactions():
+    """(profile_id, (Content_Type, Content_Id), weight) for every positive signal"""
+    for row in fetch_all("""
+        SELECT Profile_Id, Content_Type, Content_Id, COUNT(*) AS Views
+        FROM viewing_history
+        GROUP BY Profile_Id, Content_Type, Content_Id
+    """):
+        yield row["Profile_Id"], (row["Content_Type"], row["Content_Id"]), VIEW_WEIGHT * (1 + math.log(row["Views"]))
+
+    for row in fetch_all("SELECT Profile_Id, Content_Type, Content_Id FROM watchlist"):
+        yield row["Profile_Id"], (row["Content_Type"], row["Content_Id"]), WATCHLIST_WEIGHT
+
+    for row in fetch_all("SELECT Profile_Id, Content_Type, Content_Id, Rating FROM rating_review WHERE Rating >= 4"):
+        yield row["Profile_Id"], (row["Content_Type"], row["Content_Id"]), RATING_WEIGHTS[int(row["Rating"])]
+
+
+def compute_neighbours(interactions, k=NEIGHBOURS_PER_TITLE):
+    """Item-item cosine similarity over the profile x title interaction matrix.
+
+    Returns {title: [(neighbour, score), ...]} with the k most similar titles
+    for every title, best first. Weights of repeated (profile, title) pairs
+    add up. The whole matrix product runs in scipy.sparse; only picking each
+    row's top k loops in Python.
+    """
+    if np is None:
+        raise RecommendationError("numpy and scipy are required to build recommendations (pip install numpy scipy)")
+
+    profiles, items = {}, {}
+    rows, cols, weights = [], [], []
+    for profile_id, key, weight in interactions:
+        rows.append(profiles.setdefault(profile_id, len(profiles)))
+        cols.append(items.setdefault(key, len(items)))
+        weights.append(weight)
+    if not items:
+        return {}
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(weights, dtype=np.float32), (np.asarray(rows), np.asarray(cols))),
+        shape=(len(profiles), len(items)),
+    )
+    # Normalizing the columns first makes X^T X the cosine similarity directly
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1
+    matrix = matrix @ sparse.diags(1 / norms)
+    similarity = (matrix.T @ matrix).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    keys = list(items)
+    neighbours = {}
+    indptr, indices, data = similarity.indptr, similarity.indices, similarity.data
+    for item in range(len(keys)):
+        start, end = indptr[item], indptr[item + 1]
+        if start == end:
+            continue
+        scores = data[start:end]
+        if end - start > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(end - start)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        neighbours[keys[item]] = [(keys[indices[start + i]], round(float(scores[i]), 6)) for i in top]
+    return neighbours
+
+
+def rebuild_neighbours(k=NEIGHBOURS_PER_TITLE):
+    """Recompute content_neighbour from the interaction tables.
+
+    Runs as one transaction so readers never see a half-written table.
+    """
+    neighbours = compute_neighbours(load_interactions(), k)
+    rows = [
+        (key[0], key[1], rank, other[0], other[1], score)
+        for key, ranked in neighbours.items()
+        for rank, (other, score) in enumerate(ranked, 1)
+    ]
+    with transaction() as uow:
+        cursor = uow.conn.cursor()
+        try:
+            cursor.execute("DELETE FROM content_neighbour")
+            for start in range(0, len(rows), 5000):
+                cursor.executemany("""
+                    INSERT INTO content_neighbour
+                        (Content_Type, Content_Id, Rank_No, Neighbour_Type, Neighbour_Id, Score)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, rows[start:start + 5000])
+        finally:
+            cursor.close()
+        uow.dirty = True
+    neighbour_cache.clear()
+    return {"titles": len(neighbours), "pairs": len(rows)}
+
+
+# --- online ---
+
+def get_neighbours(keys):
+    """Precomputed neighbour lists for many titles; cache misses are loaded with one query per content type"""
+    result = {}
+    missing = []
+    for key in keys:
+        ranked = neighbour_cache.get(key)
+        if ranked is None:
+            missing.append(key)
+        else:
+            result[key] = ranked
+
+    if missing:
+        loaded = {key: [] for key in missing}
+        by_type = {}
+        for content_type, content_id in missing:
+            by_type.setdefault(content_type, []).append(content_id)
+        for content_type, ids in by_type.items():
+            placeholders = ", ".join(["%s"] * len(ids))
+            for row in fetch_all(f"""
+                SELECT Content_Id, Neighbour_Type, Neighbour_Id, Score
+                FROM content_neighbour
+                WHERE Content_Type = %s AND Content_Id IN ({placeholders})
+                ORDER BY Content_Id, Rank_No
+            """, (content_type, *ids)):
+                loaded[(content_type, row["Content_Id"])].append(
+                    ((row["Neighbour_Type"], row["Neighbour_Id"]), float(row["Score"]))
+                )
+        for key, ranked in loaded.items():
+            neighbour_cache.set(key, ranked)
+            result[key] = ranked
+    return result
+
+
+def merge_recommendations(seeds, neighbours, seen, row_size=20, limit=40):
+    """Turn seed titles and their neighbour lists into recommendation rows.
+
+    `seeds` is [(title, weight)] in display order. Returns
+    (rows, for_you): one "because you watched" row per seed with at least
+    one unseen neighbour, and an overall list that sums weight * similarity
+    over all seeds. Titles in `seen` are never recommended.
+    """
+    rows = []
+    totals = {}
+    for seed, weight in seeds:
+        items = []
+        for other, score in neighbours.get(seed, ()):
+            if other in seen:
+                continue
+            totals[other] = totals.get(other, 0.0) + weight * score
+            if len(items) < row_size:
+                items.append((other, score))
+        if items:
+            rows.append((seed, items))
+
+    for_you = heapq.nlargest(limit, totals.items(), key=lambda item: item[1])
+    return rows, for_you
+
+
+def profile_seeds(profile_id):
+    """Seed titles for a profile plus everything it has already watched.
+
+    Reads only derived state: in-progress titles from the progress store
+    (most recent first) and per-title view counts from profile_title_views,
+    never viewing_history itself.
+    """
+    views = {
+        (row["Content_Type"], row["Content_Id"]): row["Views"]
+        for row in fetch_all(
+            "SELECT Content_Type, Content_Id, Views FROM profile_title_views WHERE Profile_Id = %s",
+            (profile_id,),
+        )
+    }
+    recent = [(item["content_type"], item["content_id"]) for item in watch_progress.positions(profile_id)]
+    seen = set(views) | set(recent)
+
+    ordered = list(dict.fromkeys(recent + sorted(views, key=views.get, reverse=True)))
+    seeds = [(key, 1 + math.log(views.get(key) or 1)) for key in ordered[:SEED_COUNT]]
+    return seeds, seen
+
+
+def recommend_for_profile(profile_id, row_size=20, limit=40):
+    seeds, seen = profile_seeds(profile_id)
+    if not seeds:
+        return [], []
+    neighbours = get_neighbours([seed for seed, _ in seeds])
+    return merge_recommendations(seeds, neighbours, seen, row_size, limit)
@@ -0,0 +1,372 @@
+import heapq
+import math
+import os
+import re
+import threading
+import unicodedata
+from bisect import insort
+from collections import OrderedDict
+from db import fetch_all
+from utils.snapshot import Snapshot
+
+SEARCH_REBUILD_INTERVAL = int(os.getenv("SEARCH_REBUILD_INTERVAL", "900"))
+SUGGEST_SIZE = 10  # titles kept per trie node, the most a suggestion can return
+RESULT_CACHE_SIZE = int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "1024"))
+
+# BM25 parameters; title terms count TITLE_WEIGHT times towards tf and length
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 3
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has he her his in is it its of on or "
+    "she that the their they this to was were what when where which who will with".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Content_Type -> (table, primary key, year expression)
+_SOURCES = {
+    "Movie": ("movie", "Movie_Id", "YEAR(Release_Date)"),
+    "TV_Show": ("tv_show", "Show_Id", "Release_Year"),
+}
+
+
+def tokenize(text):
+    """Lowercased, accent-folded alphanumeric tokens: "Amélie's Café" -> ["amelie", "s", "cafe"]"""
+    if not text:
+        return []
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN.findall(text.lower())
+
+
+def _terms(tokens):
+    return [t for t in tokens if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """Inverted index with BM25 ranking plus a prefix trie for autocomplete.
+
+    Documents are numbered internally; postings map term -> {docno: tf},
+    where tf weights title occurrences by TITLE_WEIGHT. The trie is built
+    over the title vocabulary, and every node keeps the SUGGEST_SIZE best
+    ranked titles containing a word with that prefix, so a suggestion is a
+    walk down a few nodes. All access goes through one lock, since updates
+    are applied to the live index.
+    """
+
+    def __init__(self):
+        self.docs = []         # docno -> (key, title, year, rank, title_tokens, terms) or None once removed
+        self.keys = {}         # (Content_Type, Content_Id) -> docno
+        self.postings = {}     # term -> {docno: weighted tf}
+        self.title_docs = {}   # title token -> set of docno, for suggestions
+        self.norms = []        # docno -> K1 * (1 - B + B * dl / avgdl)
+        self.lengths = []
+        self.total_length = 0
+        self.count = 0
+        self.trie = [{}, []]   # node: [children, top], top sorted by (-rank, docno)
+        self.version = 0
+        self._results = OrderedDict()
+        self._lock = threading.RLock()
+
+    # --- building ---
+
+    def add(self, content_type, content_id, title, description=None, year=None, rank=0):
+        with self._lock:
+            docno = self._add(content_type, content_id, title, description, year, rank)
+            if docno is not None:
+                for token in self.docs[docno][4]:
+                    self._trie_insert(token, docno, self.docs[docno][3])
+                self._changed()
+
+    def _add(self, content_type, content_id, title, description, year, rank):
+        key = (content_type, content_id)
+        title_tokens = tokenize(title)
+        tf = {}
+        for term in _terms(title_tokens):
+            tf[term] = tf.get(term, 0) + TITLE_WEIGHT
+        for term in _terms(tokenize(description)):
+            tf[term] = tf.get(term, 0) + 1
+        rank = float(rank or 0)
+        doc = (key, title, year, rank, tuple(dict.fromkeys(title_tokens)), tuple(tf))
+
+        if key in self.keys:
+            docno = self.keys[key]
+            if self.docs[docno] == doc and all(self.postings[t][docno] == w for t, w in tf.items()):
+                # Rating writes re-queue titles whose indexed fields didn't change
+                return None
+            self._remove(key)
+
+        docno = len(self.docs)
+        self.docs.append(doc)
+        self.keys[key] = docno
+        length = sum(tf.values())
+        self.lengths.append(length)
+        self.total_length += length
+        self.count += 1
+        self.norms.append(self._norm(length))
+
+        for term, weight in tf.items():
+            self.postings.setdefault(term, {})[docno] = weight
+        for token in set(title_tokens):
+            self.title_docs.setdefault(token, set()).add(docno)
+        return docno
+
+    def remove(self, content_type, content_id):
+        with self._lock:
+            if (content_type, content_id) in self.keys:
+                self._remove((content_type, content_id))
+                self._changed()
+
+    @classmethod
+    def build(cls, rows):
+        """Index (content_type, content_id, title, description, year, rank) rows in bulk"""
+        index = cls()
+        for row in rows:
+            index._add(*row)
+        index.norms = [index._norm(length) for length in index.lengths]
+
+        # Visiting titles best first means each node's list fills in order
+        # and never needs re-sorting
+        live = [d for d in range(len(index.docs)) if index.docs[d] is not None]
+        live.sort(key=lambda d: (-index.docs[d][3], d))
+        for docno in live:
+            entry = (-index.docs[docno][3], docno)
+            for token in index.docs[docno][4]:
+                node = index.trie
+                for char in token:
+                    node = node[0].setdefault(char, [{}, []])
+                    # A title with two words sharing a prefix reaches a node twice
+                    if len(node[1]) < SUGGEST_SIZE and (not node[1] or node[1][-1] != entry):
+                        node[1].append(entry)
+        return index
+
+    def _norm(self, length):
+        avgdl = self.total_length / self.count if self.count else 1
+        return K1 * (1 - B + B * length / (avgdl or 1))
+
+    def _remove(self, key):
+        docno = self.keys.pop(key)
+        _, _, _, _, title_tokens, terms = self.docs[docno]
+        self.docs[docno] = None
+        self.total_length -= self.lengths[docno]
+        self.count -= 1
+
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(docno, None)
+                if not postings:
+                    del self.postings[term]
+        for token in title_tokens:
+            docs = self.title_docs.get(token)
+            if docs is not None:
+                docs.discard(docno)
+                if not docs:
+                    del self.title_docs[token]
+        for token in title_tokens:
+            self._trie_remove(token, docno)
+
+    def _changed(self):
+        self.version += 1
+        self._results.clear()
+
+    # --- trie ---
+
+    def _trie_insert(self, token, docno, rank):
+        node = self.trie
+        entry = (-rank, docno)
+        for char in token:
+            node = node[0].setdefault(char, [{}, []])
+            top = node[1]
+            if (len(top) < SUGGEST_SIZE or entry < top[-1]) and entry not in top:
+                insort(top, entry)
+                del top[SUGGEST_SIZE:]
+
+    def _trie_remove(self, token, docno):
+        path = []
+        node = self.trie
+        prefix = ""
+        for char in token:
+            node = node[0].get(char)
+            if node is None:
+                return
+            prefix += char
+            path.append((prefix, node))
+
+        # Deepest first: a node's best titles are the best of its children's
+        # lists plus the titles whose word ends exactly at the node
+        for prefix, node in reversed(path):
+            if not any(d == docno for _, d in node[1]):
+                continue
+            candidates = {(-self.docs[d][3], d) for d in self.title_docs.get(prefix, ())}
+            for child in node[0].values():
+                candidates.update(child[1])
+            node[1] = heapq.nsmallest(
+                SUGGEST_SIZE, (e for e in candidates if self.docs[e[1]] is not None)
+            )
+
+    def _trie_node(self, prefix):
+        node = self.trie
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                return None
+        return node
+
+    # --- queries ---
+
+    def search(self, query, limit=20, content_type=None):
+        """Top `limit` documents for `query` as [(key, score)], best first"""
+        terms = list(dict.fromkeys(_terms(tokenize(query))))
+        if not terms:
+            return []
+
+        cache_key = (" ".join(terms), limit, content_type)
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+                return cached
+
+            n = self.count
+            scores = {}
+            norms = self.norms
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for docno, tf in postings.items():
+                    scores[docno] = scores.get(docno, 0.0) + idf * tf * (K1 + 1) / (tf + norms[docno])
+
+            docs = self.docs
+            if content_type is not None:
+                scores = {d: s for d, s in scores.items() if docs[d][0][0] == content_type}
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            results = [(docs[d][0], round(s, 4)) for d, s in best]
+
+            self._results[cache_key] = results
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+            return results
+
+    def suggest(self, query, limit=SUGGEST_SIZE):
+        """Best ranked titles matching what has been typed so far.
+
+        The last token is a prefix; earlier tokens must appear in the
+        title as whole words.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        limit = min(limit, SUGGEST_SIZE)
+        prefix = tokens[-1]
+        complete = _terms(tokens[:-1])
+
+        with self._lock:
+            node = self._trie_node(prefix)
+            if node is None:
+                return []
+
+            if not complete:
+                docnos = [d for _, d in node[1][:limit]]
+            else:
+                sets = [self.title_docs.get(t) for t in complete]
+                if not all(sets):
+                    return []
+                sets.sort(key=len)
+                candidates = set(sets[0]).intersection(*sets[1:])
+                candidates = [
+                    d for d in candidates
+                    if any(t.startswith(prefix) for t in self.docs[d][4])
+                ]
+                docnos = [d for _, d in heapq.nsmallest(limit, ((-self.docs[d][3], d) for d in candidates))]
+
+            return [self._suggestion(d) for d in docnos]
+
+    def _suggestion(self, docno):
+        (content_type, content_id), title, year = self.docs[docno][:3]
+        return {"content_type": content_type, "content_id": content_id, "title": title, "release_year": year}
+
+    def stats(self):
+        return {"documents": self.count, "terms": len(self.postings), "version": self.version}
+
+
+def _load_rows(keys=None):
+    """Yield (Content_Type, row) for the whole catalog, or only for `keys`"""
+    wanted = {}
+    if keys is not None:
+        for content_type, content_id in keys:
+            wanted.setdefault(content_type, []).append(content_id)
+
+    for content_type, (table, id_column, year) in _SOURCES.items():
+        query = f"""
+            SELECT {id_column} AS Content_Id, Title, Description, {year} AS Year, average_rating
+            FROM {table}
+        """
+        params = ()
+        if keys is not None:
+            ids = wanted.get(content_type)
+            if not ids:
+                continue
+            query += f" WHERE {id_column} IN ({', '.join(['%s'] * len(ids))})"
+            params = tuple(ids)
+        for row in fetch_all(query, params):
+            yield content_type, row
+
+
+def _add_row(index, content_type, row):
+    index.add(content_type, row["Content_Id"], row["Title"], row.get("Description"),
+              row.get("Year"), row.get("average_rating"))
+
+
+# Keys changed since the last read, applied to the live index before it is
+# queried. Keys applied while a full rebuild runs are queued again when the
+# new index is swapped in, since the rebuild may have read them earlier.
+_pending = set()
+_touched = set()
+_pending_lock = threading.Lock()
+
+
+def build_index():
+    with _pending_lock:
+        _touched.clear()
+    return SearchIndex.build(
+        (content_type, row["Content_Id"], row["Title"], row.get("Description"), row.get("Year"), row.get("average_rating"))
+        for content_type, row in _load_rows()
+    )
+
+
+def _requeue_touched(snapshot):
+    with _pending_lock:
+        _pending.update(_touched)
+
+
+search_snapshot = Snapshot("search", build_index, SEARCH_REBUILD_INTERVAL, on_swap=_requeue_touched)
+
+
+def mark_changed(content_type, content_id):
+    """Queue a title to be re-read into the index (added, edited or deleted)"""
+    with _pending_lock:
+        _pending.add((content_type, content_id))
+
+
+def get_index():
+    index = search_snapshot.get().value
+    if _pending:
+        with _pending_lock:
+            keys = list(_pending)
+            _pending.clear()
+            _touched.update(keys)
+        found = set()
+        for content_type, row in _load_rows(keys):
+            _add_row(index, content_type, row)
+            found.add((content_type, row["Content_Id"]))
+        for key in keys:
+            if key not in found:
+                index.remove(*key)
+    return index
@@ -0,0 +1,297 @@
+import math
+import os
+from db import fetch_all, transaction
+from utils.cache import TTLCache
+from utils.catalog import fetch_genre_map
+from utils.content import AGE_RATING_LEVELS
+from utils.search import STOPWORDS, tokenize
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # only the offline build needs them; serving reads similar_title
+    np = sparse = None
+
+SIMILAR_PER_TITLE = int(os.getenv("SIMILAR_PER_TITLE", "20"))
+
+# Share of the final cosine each feature group contributes
+FEATURE_WEIGHTS = {"genre": 0.5, "text": 0.35, "age": 0.1, "era": 0.05}
+# Description words in more than this share of titles carry no signal
+MAX_DOC_FREQUENCY = 0.5
+# Dense similarity rows computed at once during a full build
+BLOCK_BYTES = 64 * 1024 * 1024
+
+# (Content_Type, Content_Id) -> [((Content_Type, Content_Id), score), ...] best first
+similar_cache = TTLCache(
+    maxsize=int(os.getenv("SIMILAR_CACHE_SIZE", "20000")),
+    ttl=int(os.getenv("SIMILAR_CACHE_TTL", "3600")),
+)
+
+# Content_Type -> (table, primary key, year expression)
+_SOURCES = {
+    "Movie": ("movie", "Movie_Id", "YEAR(Release_Date)"),
+    "TV_Show": ("tv_show", "Show_Id", "Release_Year"),
+}
+
+_INSERT = """
+    INSERT INTO similar_title (Content_Type, Content_Id, Rank_No, Similar_Type, Similar_Id, Score)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+class SimilarityError(Exception):
+    pass
+
+
+# --- features ---
+
+def load_titles():
+    """Every title as (key, description, age_rating, year, genre_ids)"""
+    titles = []
+    for content_type, (table, id_column, year) in _SOURCES.items():
+        genres = fetch_genre_map(table)
+        for row in fetch_all(f"""
+            SELECT {id_column} AS Content_Id, Description, Age_Rating, {year} AS Year
+            FROM {table}
+        """):
+            titles.append((
+                (content_type, row["Content_Id"]),
+                row.get("Description"),
+                row.get("Age_Rating"),
+                row.get("Year"),
+                [g["genre_id"] for g in genres.get(row["Content_Id"], [])],
+            ))
+    return titles
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+
+def _ordinal(levels, size):
+    """One-hot on each title's level, with half weight on the neighbouring levels.
+
+    That way PG-13 sits closer to R than to G, and the 1990s closer to the
+    2000s than to the 1970s.
+    """
+    rows, cols, values = [], [], []
+    for row, level in enumerate(levels):
+        if level is None:
+            continue
+        for offset, value in ((-1, 0.5), (0, 1.0), (1, 0.5)):
+            if 0 <= level + offset < size:
+                rows.append(row)
+                cols.append(level + offset)
+                values.append(value)
+    return sparse.csr_matrix((values, (rows, cols)), shape=(len(levels), size), dtype=np.float32)
+
+
+def build_features(titles):
+    """Feature rows for every title, as (dense, text) with unit length overall.
+
+    Four groups, each scaled to unit length and then by the square root of
+    its FEATURE_WEIGHTS share, so the dot product of two rows is the
+    weighted sum of the per-group cosines. Genre multi-hot, age rating level
+    and release decade are few columns and overlap for most pairs, so they
+    are kept dense for BLAS; the description TF-IDF (log tf, smoothed idf)
+    stays sparse.
+    """
+    if np is None:
+        raise SimilarityError("numpy and scipy are required to build similar titles (pip install numpy scipy)")
+    n = len(titles)
+
+    genre_columns = {}
+    rows, cols = [], []
+    for row, (_, _, _, _, genre_ids) in enumerate(titles):
+        for genre_id in genre_ids:
+            rows.append(row)
+            cols.append(genre_columns.setdefault(genre_id, len(genre_columns)))
+    genre = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n, max(1, len(genre_columns)))
+    )
+
+    vocabulary = {}
+    rows, cols = [], []
+    for row, (_, description, _, _, _) in enumerate(titles):
+        for term in tokenize(description):
+            if term not in STOPWORDS and len(term) > 1:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n, max(1, len(vocabulary)))
+    )
+    counts.sum_duplicates()
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + n) / (1 + df)) + 1
+    idf[df > max(1, MAX_DOC_FREQUENCY * n)] = 0
+    counts.data = 1 + np.log(counts.data)
+    text = counts @ sparse.diags(idf.astype(np.float32))
+
+    age = _ordinal([AGE_RATING_LEVELS.get(t[2]) for t in titles], 4)
+    decades = [int(t[3]) // 10 if t[3] else None for t in titles]
+    known = [d for d in decades if d is not None]
+    first = min(known, default=0)
+    era = _ordinal(
+        [d - first if d is not None else None for d in decades],
+        max(known) - first + 1 if known else 1,
+    )
+
+    def weighted(block, name):
+        return _normalize_rows(block) * math.sqrt(FEATURE_WEIGHTS[name])
+
+    dense = sparse.hstack([weighted(genre, "genre"), weighted(age, "age"), weighted(era, "era")]).toarray()
+    text = weighted(text, "text").tocsr()
+    # Titles missing a group (no description, no genres) are renormalized over the rest
+    norms = np.sqrt((dense ** 2).sum(axis=1) + np.asarray(text.multiply(text).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    dense = (dense / norms[:, np.newaxis]).astype(np.float32)
+    text = (sparse.diags(1 / norms) @ text).tocsr().astype(np.float32)
+    return dense, text
+
+
+def _scores(features, rows):
+    """Cosine of the given rows against every title, as a dense len(rows) x n array"""
+    dense, text = features
+    return dense[rows] @ dense.T + (text[rows] @ text.T).toarray()
+
+
+def _top_k(scores, k):
+    """(columns, values) of the k best scores in each row, best first"""
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-values, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def _neighbours(features, keys, rows, k):
+    """Top k neighbours for the given row indices, computed in dense blocks"""
+    block = max(1, BLOCK_BYTES // (4 * len(keys)))
+    result = {}
+    for start in range(0, len(rows), block):
+        chunk = rows[start:start + block]
+        scores = _scores(features, chunk)
+        scores[np.arange(len(chunk)), chunk] = -1  # never your own neighbour
+        columns, values = _top_k(scores, k)
+        for row, cols, vals in zip(chunk, columns.tolist(), values.round(6).tolist()):
+            result[keys[row]] = [(keys[c], v) for c, v in zip(cols, vals) if v > 0]
+    return result
+
+
+def compute_similar(titles, k=SIMILAR_PER_TITLE):
+    """{key: [(key, score), ...]} with the k nearest titles of every title by cosine"""
+    if not titles:
+        return {}
+    keys = [t[0] for t in titles]
+    return _neighbours(build_features(titles), keys, list(range(len(keys))), k)
+
+
+# --- table maintenance ---
+
+def _rows_for(key, ranked):
+    return [(key[0], key[1], rank, other[0], other[1], score) for rank, (other, score) in enumerate(ranked, 1)]
+
+
+def rebuild_similar(k=SIMILAR_PER_TITLE):
+    """Recompute similar_title for the whole catalog in one transaction"""
+    similar = compute_similar(load_titles(), k)
+    rows = [row for key, ranked in similar.items() for row in _rows_for(key, ranked)]
+    with transaction() as uow:
+        cursor = uow.conn.cursor()
+        try:
+            cursor.execute("DELETE FROM similar_title")
+            for start in range(0, len(rows), 5000):
+                cursor.executemany(_INSERT, rows[start:start + 5000])
+        finally:
+            cursor.close()
+        uow.dirty = True
+    similar_cache.clear()
+    return {"titles": len(similar), "pairs": len(rows)}
+
+
+def add_title(content_type, content_id, k=SIMILAR_PER_TITLE):
+    """Fold one new or edited title into similar_title without a full rebuild.
+
+    Scores the title against the catalog once (a single row product)
+    to find the lists it now belongs in: those whose k-th score it beats,
+    plus those that already hold it. Only the title's own list and those are
+    recomputed; every other list is left alone, keeping the description
+    IDF weights of its last full build.
+    """
+    key = (content_type, content_id)
+    titles = load_titles()
+    keys = [t[0] for t in titles]
+    position = {other: i for i, other in enumerate(keys)}
+    if key not in position:
+        raise SimilarityError(f"{content_type} {content_id} not found")
+    features = build_features(titles)
+    row = position[key]
+
+    scores = _scores(features, [row]).ravel()
+    scores[row] = -1
+
+    # The current k-th score of every list; short lists take any positive score
+    kth = np.zeros(len(keys), dtype=np.float32)
+    for summary in fetch_all("""
+        SELECT Content_Type, Content_Id, COUNT(*) AS Size, MIN(Score) AS Kth
+        FROM similar_title
+        GROUP BY Content_Type, Content_Id
+    """):
+        i = position.get((summary["Content_Type"], summary["Content_Id"]))
+        if i is not None and summary["Size"] >= k:
+            kth[i] = summary["Kth"]
+    affected = set(np.nonzero((scores > 0) & (scores > kth))[0].tolist())
+    for holder in fetch_all("""
+        SELECT Content_Type, Content_Id FROM similar_title
+        WHERE Similar_Type = %s AND Similar_Id = %s
+    """, key):
+        i = position.get((holder["Content_Type"], holder["Content_Id"]))
+        if i is not None:
+            affected.add(i)
+
+    updated = _neighbours(features, keys, [row] + sorted(affected - {row}), k)
+    with transaction() as uow:
+        cursor = uow.conn.cursor()
+        try:
+            for other, ranked in updated.items():
+                cursor.execute(
+                    "DELETE FROM similar_title WHERE Content_Type = %s AND Content_Id = %s", other
+                )
+                if ranked:
+                    cursor.executemany(_INSERT, _rows_for(other, ranked))
+        finally:
+            cursor.close()
+        uow.dirty = True
+    for other in updated:
+        similar_cache.invalidate(other)
+    return {"title": key, "neighbours": len(updated[key]), "lists_updated": len(updated) - 1}
+
+
+def _load_lists(keys):
+    lists = {}
+    by_type = {}
+    for content_type, content_id in keys:
+        by_type.setdefault(content_type, []).append(content_id)
+    for content_type, ids in by_type.items():
+        for start in range(0, len(ids), 1000):
+            chunk = ids[start:start + 1000]
+            for row in fetch_all(f"""
+                SELECT Content_Id, Similar_Type, Similar_Id, Score
+                FROM similar_title
+                WHERE Content_Type = %s AND Content_Id IN ({", ".join(["%s"] * len(chunk))})
+                ORDER BY Content_Id, Rank_No
+            """, (content_type, *chunk)):
+                lists.setdefault((content_type, row["Content_Id"]), []).append(
+                    ((row["Similar_Type"], row["Similar_Id"]), float(row["Score"]))
+                )
+    return lists
+
+
+# --- online ---
+
+def get_similar(content_type, content_id):
+    """The precomputed neighbours of one title: a primary-key range read, cached"""
+    key = (content_type, content_id)
+    return similar_cache.get_or_load(key, lambda: _load_lists([key]).get(key, []))
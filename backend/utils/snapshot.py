@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import namedtuple
+
+SnapshotValue = namedtuple("SnapshotValue", ["value", "version", "built_at"])
+
+# name -> Snapshot, so invalidation hooks can reach a snapshot without importing its route
+_registry = {}
+
+
+class Snapshot:
+    """A prebuilt value that readers get without touching the database.
+
+    `builder` runs on a background thread whenever the snapshot is marked
+    stale (and every `refresh_interval` seconds, to pick up changes made
+    outside this worker). The finished value replaces the old one in a
+    single assignment, so readers see either the old or the new snapshot,
+    never a partial one. If a rebuild fails the previous snapshot stays.
+    """
+
+    def __init__(self, name, builder, refresh_interval=300, debounce=0.5, on_swap=None):
+        self.name = name
+        self.builder = builder
+        self.refresh_interval = refresh_interval
+        self.debounce = debounce
+        self.on_swap = on_swap
+        self._current = None
+        self._version = 0
+        self._build_lock = threading.Lock()
+        self._stale = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats = {"builds": 0, "failures": 0, "last_build_ms": 0}
+        _registry[name] = self
+
+    def get(self):
+        current = self._current
+        if current is None:
+            # Cold worker: build once in the request, afterwards only in the background
+            with self._build_lock:
+                if self._current is None:
+                    self._rebuild()
+            current = self._current
+        self._ensure_thread()
+        return current
+
+    def mark_stale(self):
+        # The rebuild thread only runs once the snapshot has been read
+        self._stale.set()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._thread_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name=f"{self.name}-snapshot", daemon=True)
+                    self._thread.start()
+
+    def _rebuild(self):
+        started = time.perf_counter()
+        value = self.builder()
+        self._version += 1
+        self._current = SnapshotValue(value, self._version, time.time())
+        self._stats["builds"] += 1
+        self._stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        if self.on_swap is not None:
+            self.on_swap(self._current)
+
+    def _run(self):
+        while True:
+            if self._stale.wait(self.refresh_interval):
+                # Let a burst of writes settle into one rebuild
+                time.sleep(self.debounce)
+            self._stale.clear()
+            try:
+                with self._build_lock:
+                    self._rebuild()
+            except Exception as e:
+                self._stats["failures"] += 1
+                print(f"❌ {self.name} snapshot rebuild failed, keeping version {self._version}: {e}")
+
+    def stats(self):
+        current = self._current
+        return {
+            **self._stats,
+            "version": current.version if current else 0,
+            "age_seconds": round(time.time() - current.built_at, 1) if current else None,
+        }
+
+
+def mark_stale(name):
+    snapshot = _registry.get(name)
+    if snapshot is not None:
+        snapshot.mark_stale()
@@ -0,0 +1,332 @@
+from datetime import date, datetime, timedelta
+import threading
+from db import execute_query, fetch_all, fetch_one, transaction
+from utils.catalog import fetch_genre_map
+from utils.content import resolve_many
+
+# Materialized per-profile statistics. Every change is a delta against a
+# handful of small rows keyed by Profile_Id, so neither logging nor reading
+# touches viewing_history:
+#   profile_stats          totals and streaks
+#   profile_genre_minutes  minutes per genre
+#   profile_title_views    views per title (Titles_Watched counts its rows)
+#   profile_watch_days     views per calendar day (streaks are derived from it)
+
+_TABLES = ("profile_stats", "profile_genre_minutes", "profile_title_views", "profile_watch_days")
+_GENRE_TABLES = {"Movie": "movie", "TV_Show": "tv_show"}
+
+
+def _day(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _minutes_for(rows):
+    """Minutes per row: the logged Watch_Duration, else the movie's runtime, else 0"""
+    contents = resolve_many((r[1], r[2]) for r in rows if r[3] is None and r[1] == "Movie")
+    return [
+        r[3] if r[3] is not None else (contents.get((r[1], r[2])) or {}).get("duration") or 0
+        for r in rows
+    ]
+
+
+def _genres_for(rows):
+    """{(content_type, content_id): [genre_id, ...]} with one query per content type"""
+    genres = {}
+    for content_type, table in _GENRE_TABLES.items():
+        ids = list({r[2] for r in rows if r[1] == content_type})
+        for content_id, items in fetch_genre_map(table, ids).items():
+            genres[(content_type, content_id)] = [g["genre_id"] for g in items]
+    return genres
+
+
+def _streaks(days):
+    """(current, longest) for an ascending list of distinct days; current ends at the last day"""
+    current = longest = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous is not None and day == previous + timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
+
+
+def _refresh_titles(profile_ids):
+    placeholders = ", ".join(["%s"] * len(profile_ids))
+    execute_query(f"""
+        UPDATE profile_stats
+        SET Titles_Watched = (
+            SELECT COUNT(*) FROM profile_title_views ptv WHERE ptv.Profile_Id = profile_stats.Profile_Id
+        )
+        WHERE Profile_Id IN ({placeholders})
+    """, tuple(profile_ids))
+
+
+def _executemany(uow, query, rows):
+    if not rows:
+        return
+    cursor = uow.conn.cursor()
+    try:
+        cursor.executemany(query, rows)
+    finally:
+        cursor.close()
+    uow.dirty = True
+
+
+def record_views(rows):
+    """Fold newly inserted viewing_history rows into the statistics.
+
+    rows are (Profile_Id, Content_Type, Content_Id, Watch_Duration, Watch_Date)
+    tuples, as queued by log_viewing. Runs as one transaction with one
+    executemany per table.
+    """
+    minutes = _minutes_for(rows)
+    genres = _genres_for(rows)
+
+    per_profile = {}
+    for row, row_minutes in zip(rows, minutes):
+        profile_id, content_type, content_id, _, watch_date = row
+        acc = per_profile.setdefault(profile_id, {"minutes": 0, "views": 0, "genres": {}, "titles": {}, "days": {}})
+        acc["minutes"] += row_minutes
+        acc["views"] += 1
+        for genre_id in genres.get((content_type, content_id), []):
+            acc["genres"][genre_id] = acc["genres"].get(genre_id, 0) + row_minutes
+        title = (content_type, content_id)
+        acc["titles"][title] = acc["titles"].get(title, 0) + 1
+        day = _day(watch_date)
+        acc["days"][day] = acc["days"].get(day, 0) + 1
+    if not per_profile:
+        return
+
+    profile_ids = list(per_profile)
+    with transaction() as uow:
+        _executemany(uow, """
+            INSERT INTO profile_title_views (Profile_Id, Content_Type, Content_Id, Views)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE Views = Views + VALUES(Views)
+        """, [(pid, ct, cid, views) for pid, acc in per_profile.items() for (ct, cid), views in acc["titles"].items()])
+        _executemany(uow, """
+            INSERT INTO profile_watch_days (Profile_Id, Watch_Day, Views)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE Views = Views + VALUES(Views)
+        """, [(pid, day, views) for pid, acc in per_profile.items() for day, views in acc["days"].items()])
+        _executemany(uow, """
+            INSERT INTO profile_genre_minutes (Profile_Id, Genre_Id, Minutes)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE Minutes = Minutes + VALUES(Minutes)
+        """, [(pid, g, m) for pid, acc in per_profile.items() for g, m in acc["genres"].items()])
+
+        # Extend each streak from the stored one; only days after the last one can change it
+        placeholders = ", ".join(["%s"] * len(profile_ids))
+        stored = {r["Profile_Id"]: r for r in fetch_all(f"""
+            SELECT Profile_Id, Current_Streak, Longest_Streak, Last_Watch_Date
+            FROM profile_stats WHERE Profile_Id IN ({placeholders})
+        """, tuple(profile_ids))}
+        totals = []
+        for profile_id, acc in per_profile.items():
+            current = stored.get(profile_id)
+            streak, longest, last_day = (
+                (current["Current_Streak"], current["Longest_Streak"], _day(current["Last_Watch_Date"]))
+                if current else (0, 0, None)
+            )
+            for day in sorted(acc["days"]):
+                if last_day is not None and day <= last_day:
+                    continue
+                streak = streak + 1 if last_day is not None and day == last_day + timedelta(days=1) else 1
+                longest = max(longest, streak)
+                last_day = day
+            totals.append((profile_id, acc["minutes"], acc["views"], streak, longest, last_day))
+
+        _executemany(uow, """
+            INSERT INTO profile_stats (Profile_Id, Total_Minutes, Views, Titles_Watched, Current_Streak, Longest_Streak, Last_Watch_Date)
+            VALUES (%s, %s, %s, 0, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                Total_Minutes = Total_Minutes + VALUES(Total_Minutes),
+                Views = Views + VALUES(Views),
+                Current_Streak = VALUES(Current_Streak),
+                Longest_Streak = VALUES(Longest_Streak),
+                Last_Watch_Date = VALUES(Last_Watch_Date)
+        """, totals)
+        _refresh_titles(profile_ids)
+
+
+# Profiles whose incremental fold failed; rebuilt from viewing_history on the next fold
+_needs_rebuild = set()
+_needs_rebuild_lock = threading.Lock()
+
+
+def fold_views(rows):
+    """BatchWriter after_write hook: fold rows into the statistics after their insert committed.
+
+    viewing_history is the source of truth, so a failure here never
+    touches it: the affected profiles are marked and rebuilt with
+    rebuild_stats() on the next call, and their rows are not folded in
+    the meantime (the rebuild counts them).
+    """
+    with _needs_rebuild_lock:
+        pending = set(_needs_rebuild)
+        _needs_rebuild.clear()
+    failed = set()
+    for profile_id in pending:
+        try:
+            rebuild_stats(profile_id)
+        except Exception as e:
+            print(f"❌ Rebuilding viewing stats for profile {profile_id} failed: {e}")
+            failed.add(profile_id)
+
+    rows = [r for r in rows if r[0] not in pending]
+    try:
+        record_views(rows)
+    except Exception as e:
+        print(f"❌ Folding {len(rows)} views into stats failed, marking profiles for rebuild: {e}")
+        failed.update(r[0] for r in rows)
+    if failed:
+        with _needs_rebuild_lock:
+            _needs_rebuild.update(failed)
+
+
+def remove_view(entry):
+    """Take one deleted viewing_history row (as a dict) back out of the statistics"""
+    row = (entry["Profile_Id"], entry["Content_Type"], entry["Content_Id"], entry["Watch_Duration"], entry["Watch_Date"])
+    profile_id, content_type, content_id = row[:3]
+    minutes = _minutes_for([row])[0]
+    day = _day(row[4])
+
+    execute_query("""
+        UPDATE profile_stats SET Total_Minutes = Total_Minutes - %s, Views = Views - 1
+        WHERE Profile_Id = %s
+    """, (minutes, profile_id))
+    for genre_id in _genres_for([row]).get((content_type, content_id), []):
+        execute_query(
+            "UPDATE profile_genre_minutes SET Minutes = Minutes - %s WHERE Profile_Id = %s AND Genre_Id = %s",
+            (minutes, profile_id, genre_id),
+        )
+    execute_query("DELETE FROM profile_genre_minutes WHERE Profile_Id = %s AND Minutes <= 0", (profile_id,))
+
+    execute_query(
+        "UPDATE profile_title_views SET Views = Views - 1 WHERE Profile_Id = %s AND Content_Type = %s AND Content_Id = %s",
+        (profile_id, content_type, content_id),
+    )
+    execute_query(
+        "DELETE FROM profile_title_views WHERE Profile_Id = %s AND Content_Type = %s AND Content_Id = %s AND Views <= 0",
+        (profile_id, content_type, content_id),
+    )
+    _refresh_titles([profile_id])
+
+    execute_query(
+        "UPDATE profile_watch_days SET Views = Views - 1 WHERE Profile_Id = %s AND Watch_Day = %s",
+        (profile_id, day),
+    )
+    remaining = fetch_one(
+        "SELECT Views FROM profile_watch_days WHERE Profile_Id = %s AND Watch_Day = %s",
+        (profile_id, day),
+    )
+    if remaining and remaining["Views"] <= 0:
+        # The day disappeared, so streaks are recomputed from the (small) day table
+        execute_query("DELETE FROM profile_watch_days WHERE Profile_Id = %s AND Watch_Day = %s", (profile_id, day))
+        _recompute_streaks(profile_id)
+
+
+def _recompute_streaks(profile_id):
+    days = [_day(r["Watch_Day"]) for r in fetch_all(
+        "SELECT Watch_Day FROM profile_watch_days WHERE Profile_Id = %s ORDER BY Watch_Day", (profile_id,)
+    )]
+    current, longest = _streaks(days)
+    execute_query("""
+        UPDATE profile_stats SET Current_Streak = %s, Longest_Streak = %s, Last_Watch_Date = %s
+        WHERE Profile_Id = %s
+    """, (current, longest, days[-1] if days else None, profile_id))
+
+
+def delete_stats(profile_id):
+    for table in _TABLES:
+        execute_query(f"DELETE FROM {table} WHERE Profile_Id = %s", (profile_id,))
+
+
+def get_stats(profile_id):
+    """Statistics for one profile from the materialized tables (two primary-key lookups)"""
+    row = fetch_one("SELECT * FROM profile_stats WHERE Profile_Id = %s", (profile_id,))
+    genres = fetch_all("""
+        SELECT pgm.Genre_Id, g.Genre_Name, pgm.Minutes
+        FROM profile_genre_minutes pgm
+        JOIN genre g ON g.Genre_Id = pgm.Genre_Id
+        WHERE pgm.Profile_Id = %s
+        ORDER BY pgm.Minutes DESC
+    """, (profile_id,))
+
+    last_day = _day(row["Last_Watch_Date"]) if row else None
+    # A streak is only still running if the profile watched something today or yesterday
+    running = last_day is not None and last_day >= date.today() - timedelta(days=1)
+    return {
+        "total_minutes": int(row["Total_Minutes"]) if row else 0,
+        "titles_watched": int(row["Titles_Watched"]) if row else 0,
+        "views": int(row["Views"]) if row else 0,
+        "current_streak": int(row["Current_Streak"]) if row and running else 0,
+        "longest_streak": int(row["Longest_Streak"]) if row else 0,
+        "last_watch_date": str(last_day) if last_day else None,
+        "genres": [
+            {"genre_id": g["Genre_Id"], "name": g["Genre_Name"], "minutes": int(g["Minutes"])}
+            for g in genres
+        ],
+    }
+
+
+_MINUTES = "COALESCE(vh.Watch_Duration, CASE WHEN vh.Content_Type = 'Movie' THEN m.Duration END, 0)"
+
+
+def rebuild_stats(profile_id=None):
+    """Recompute the statistics tables from viewing_history (one profile, or all)"""
+    where = "WHERE vh.Profile_Id = %s" if profile_id is not None else ""
+    params = (profile_id,) if profile_id is not None else ()
+    delete_where = "WHERE Profile_Id = %s" if profile_id is not None else ""
+
+    with transaction():
+        for table in _TABLES:
+            execute_query(f"DELETE FROM {table} {delete_where}", params)
+
+        execute_query(f"""
+            INSERT INTO profile_title_views (Profile_Id, Content_Type, Content_Id, Views)
+            SELECT vh.Profile_Id, vh.Content_Type, vh.Content_Id, COUNT(*)
+            FROM viewing_history vh {where}
+            GROUP BY vh.Profile_Id, vh.Content_Type, vh.Content_Id
+        """, params)
+        execute_query(f"""
+            INSERT INTO profile_watch_days (Profile_Id, Watch_Day, Views)
+            SELECT vh.Profile_Id, DATE(vh.Watch_Date), COUNT(*)
+            FROM viewing_history vh {where}
+            GROUP BY vh.Profile_Id, DATE(vh.Watch_Date)
+        """, params)
+        execute_query(f"""
+            INSERT INTO profile_genre_minutes (Profile_Id, Genre_Id, Minutes)
+            SELECT vh.Profile_Id, cg.Genre_Id, SUM({_MINUTES})
+            FROM viewing_history vh
+            LEFT JOIN movie m ON vh.Content_Type = 'Movie' AND vh.Content_Id = m.Movie_Id
+            JOIN (
+                SELECT 'Movie' AS Content_Type, Movie_Id AS Content_Id, Genre_Id FROM movie_genre
+                UNION ALL
+                SELECT 'TV_Show', Show_Id, Genre_Id FROM tvshow_genre
+            ) cg ON cg.Content_Type = vh.Content_Type AND cg.Content_Id = vh.Content_Id
+            {where}
+            GROUP BY vh.Profile_Id, cg.Genre_Id
+        """, params)
+        execute_query(f"""
+            INSERT INTO profile_stats (Profile_Id, Total_Minutes, Views, Titles_Watched, Current_Streak, Longest_Streak, Last_Watch_Date)
+            SELECT vh.Profile_Id, SUM({_MINUTES}), COUNT(*), COUNT(DISTINCT vh.Content_Type, vh.Content_Id), 0, 0, NULL
+            FROM viewing_history vh
+            LEFT JOIN movie m ON vh.Content_Type = 'Movie' AND vh.Content_Id = m.Movie_Id
+            {where}
+            GROUP BY vh.Profile_Id
+        """, params)
+
+        days_by_profile = {}
+        for r in fetch_all(f"""
+            SELECT Profile_Id, Watch_Day FROM profile_watch_days {delete_where}
+            ORDER BY Profile_Id, Watch_Day
+        """, params):
+            days_by_profile.setdefault(r["Profile_Id"], []).append(_day(r["Watch_Day"]))
+        for pid, days in days_by_profile.items():
+            current, longest = _streaks(days)
+            execute_query("""
+                UPDATE profile_stats SET Current_Streak = %s, Longest_Streak = %s, Last_Watch_Date = %s
+                WHERE Profile_Id = %s
+            """, (current, longest, days[-1], pid))
+    return len(days_by_profile)
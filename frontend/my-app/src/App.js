@@ -15,6 +15,7 @@ import TVShows from './pages/TVShows';
 import Watchlist from './pages/Watchlist';
 import Subscription from './pages/Subscription';
 import ViewingHistory from './pages/ViewingHistory';
+import Search from './pages/Search';
 
 import './App.css';
 
@@ -60,6 +61,7 @@ function MainLayout() {
         <Route path="/my-list" element={<Watchlist />} />
         <Route path="/history" element={<ViewingHistory />} />
         <Route path="/subscription" element={<Subscription />} />
+        <Route path="/search" element={<Search />} />
         <Route path="*" element={<Navigate to="/" replace />} />
       </Routes>
     </>
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { FiPlay, FiPlus, FiCheck, FiInfo, FiStar } from 'react-icons/fi';
 import { useNavigate } from 'react-router-dom';
-import { watchlistAPI, ratingsAPI, viewingHistoryAPI } from '../services/api';
+import { watchlistAPI, ratingsAPI, viewingHistoryAPI, assetUrl, posterSrcSet } from '../services/api';
 import RatingModal from './RatingModal';
 import './MovieCard.css';
 
@@ -98,7 +98,7 @@ const MovieCard = ({ content, type = 'Movie', profileId, isFromWatchlist = false
   };
 
   // Placeholder image if none provided
-  const posterUrl = content.poster_url || `https://via.placeholder.com/300x450/1a1a2e/8B5CF6?text=${encodeURIComponent(title)}`;
+  const posterUrl = assetUrl(content.poster_url) || `https://via.placeholder.com/300x450/1a1a2e/8B5CF6?text=${encodeURIComponent(title)}`;
 
   return (
     <>
@@ -109,7 +109,14 @@ const MovieCard = ({ content, type = 'Movie', profileId, isFromWatchlist = false
         onClick={handleClick}
       >
         <div className="movie-card-image">
-          <img src={posterUrl} alt={title} loading="lazy" />
+          <img
+            src={posterUrl}
+            srcSet={posterSrcSet(content.poster)}
+            sizes="(max-width: 600px) 45vw, 200px"
+            alt={title}
+            loading="lazy"
+            style={content.poster?.placeholder ? { backgroundImage: `url(${content.poster.placeholder})`, backgroundSize: 'cover' } : undefined}
+          />
           
           {isHovered && (
             <div className="movie-card-overlay">
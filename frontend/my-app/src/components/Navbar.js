@@ -1,6 +1,7 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
+import { searchAPI } from '../services/api';
 import { FiSearch, FiBell, FiUser } from 'react-icons/fi';
 import './Navbar.css';
 
@@ -8,8 +9,36 @@ const Navbar = () => {
   const { isAuthenticated, user, logout } = useAuth();
   const [showProfileMenu, setShowProfileMenu] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
+  const [suggestions, setSuggestions] = useState([]);
   const navigate = useNavigate();
 
+  // Autocomplete as the user types, debounced so each pause sends one request
+  useEffect(() => {
+    if (!searchQuery.trim()) {
+      setSuggestions([]);
+      return undefined;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await searchAPI.suggest(searchQuery);
+        setSuggestions(response.data.suggestions || []);
+      } catch (err) {
+        setSuggestions([]);
+      }
+    }, 120);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  const openSuggestion = (item) => {
+    setSuggestions([]);
+    setSearchQuery('');
+    if (item.content_type === 'Movie') {
+      navigate(`/movie/${item.content_id}`);
+    } else {
+      navigate(`/search?q=${encodeURIComponent(item.title)}`);
+    }
+  };
+
   const handleLogout = () => {
     logout();
     navigate('/login');
@@ -18,7 +47,8 @@ const Navbar = () => {
   const handleSearch = (e) => {
     e.preventDefault();
     if (searchQuery.trim()) {
-      navigate(`/search?q=${searchQuery}`);
+      setSuggestions([]);
+      navigate(`/search?q=${encodeURIComponent(searchQuery)}`);
     }
   };
 
@@ -50,7 +80,21 @@ const Navbar = () => {
               className="search-input"
               value={searchQuery}
               onChange={(e) => setSearchQuery(e.target.value)}
+              onBlur={() => setTimeout(() => setSuggestions([]), 150)}
             />
+            {suggestions.length > 0 && (
+              <ul className="search-suggestions">
+                {suggestions.map(item => (
+                  <li
+                    key={`${item.content_type}-${item.content_id}`}
+                    onMouseDown={() => openSuggestion(item)}
+                  >
+                    <span>{item.title}</span>
+                    {item.release_year && <span className="suggestion-year">{item.release_year}</span>}
+                  </li>
+                ))}
+              </ul>
+            )}
           </form>
 
           {isAuthenticated ? (
@@ -33,9 +33,9 @@ const ScrollableRow = ({ title, items, type = 'Movie', profileId }) => {
         <div className="row-content" ref={rowRef}>
           {items.map((item) => (
             <MovieCard
-              key={item.Movie_Id || item.Show_Id || item.Content_Id}
+              key={item.content_type ? `${item.content_type}-${item.content_id}` : (item.Movie_Id || item.Show_Id || item.Content_Id)}
               content={item}
-              type={type}
+              type={item.content_type || type}
               profileId={profileId}
             />
           ))}
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import HeroSection from '../components/HeroSection';
 import ScrollableRow from '../components/ScrollableRow';
-import { homeAPI, moviesAPI, tvShowsAPI } from '../services/api';
+import { homeAPI, moviesAPI, tvShowsAPI, recommendationsAPI } from '../services/api';
 import './Home.css';
 
 const Home = () => {
@@ -10,6 +10,7 @@ const Home = () => {
   const [trendingMovies, setTrendingMovies] = useState([]);
   const [trendingShows, setTrendingShows] = useState([]);
   const [newReleases, setNewReleases] = useState([]);
+  const [recommendations, setRecommendations] = useState({ rows: [], for_you: [] });
   const [loading, setLoading] = useState(true);
   const [profileId, setProfileId] = useState(null);
 
@@ -18,8 +19,24 @@ const Home = () => {
     const storedProfileId = localStorage.getItem('profileId');
     setProfileId(storedProfileId);
     fetchHomeData();
+    if (storedProfileId) {
+      fetchRecommendations(storedProfileId);
+    }
   }, []);
 
+  const fetchRecommendations = async (id) => {
+    try {
+      const response = await recommendationsAPI.getForProfile(id);
+      setRecommendations({
+        rows: response.data.rows || [],
+        for_you: response.data.for_you || [],
+      });
+    } catch (error) {
+      // Recommendations are optional; the rest of the page still renders
+      console.error('Error fetching recommendations:', error);
+    }
+  };
+
   const fetchHomeData = async () => {
     try {
       setLoading(true);
@@ -83,6 +100,25 @@ const Home = () => {
       <HeroSection content={featuredContent} />
 
       <div className="home-content">
+        {recommendations.for_you.length > 0 && (
+          <ScrollableRow
+            title="Top Picks for You"
+            items={recommendations.for_you}
+            type="Movie"
+            profileId={profileId}
+          />
+        )}
+
+        {recommendations.rows.map(row => (
+          <ScrollableRow
+            key={`${row.because_you_watched.content_type}-${row.because_you_watched.content_id}`}
+            title={`Because You Watched ${row.because_you_watched.title}`}
+            items={row.items}
+            type="Movie"
+            profileId={profileId}
+          />
+        ))}
+
         {trendingMovies.length > 0 && (
           <ScrollableRow
             title="Trending Now"
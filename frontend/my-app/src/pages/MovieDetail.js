@@ -3,7 +3,8 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { FiArrowLeft, FiPlay, FiPlus, FiCheck, FiStar } from 'react-icons/fi';
 import VideoPlayer from '../components/VideoPlayer';
 import RatingModal from '../components/RatingModal';
-import { moviesAPI, watchlistAPI, ratingsAPI, viewingHistoryAPI } from '../services/api';
+import ScrollableRow from '../components/ScrollableRow';
+import { moviesAPI, watchlistAPI, ratingsAPI, viewingHistoryAPI, assetUrl } from '../services/api';
 import './MovieDetail.css';
 
 const MovieDetail = () => {
@@ -15,11 +16,13 @@ const MovieDetail = () => {
   const [isInWatchlist, setIsInWatchlist] = useState(false);
   const [showRatingModal, setShowRatingModal] = useState(false);
   const [watchDuration, setWatchDuration] = useState(0);
+  const [similar, setSimilar] = useState([]);
 
   const profileId = localStorage.getItem('profileId');
 
   useEffect(() => {
     fetchMovieDetails();
+    fetchSimilar();
     checkIfInWatchlist();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [id]);
@@ -36,6 +39,16 @@ const MovieDetail = () => {
     }
   };
 
+  const fetchSimilar = async () => {
+    try {
+      const response = await moviesAPI.getSimilar(id);
+      setSimilar(response.data.similar || []);
+    } catch (err) {
+      console.error('Error fetching similar titles:', err);
+      setSimilar([]);
+    }
+  };
+
   const checkIfInWatchlist = async () => {
     if (!profileId) return;
 
@@ -175,7 +188,7 @@ const MovieDetail = () => {
       ) : (
         <div className="movie-hero">
           <img
-            src={movie.poster_url || 'https://via.placeholder.com/1200x600'}
+            src={assetUrl(movie.poster_url) || 'https://via.placeholder.com/1200x600'}
             alt={movie.title}
             className="movie-backdrop"
           />
@@ -245,6 +258,8 @@ const MovieDetail = () => {
             </div>
           )}
         </div>
+
+        <ScrollableRow title="More Like This" items={similar} profileId={profileId} />
       </div>
 
       <RatingModal
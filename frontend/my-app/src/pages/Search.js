@@ -0,0 +1,75 @@
+import React, { useState, useEffect } from 'react';
+import { useSearchParams } from 'react-router-dom';
+import MovieCard from '../components/MovieCard';
+import { searchAPI } from '../services/api';
+import './Movies.css';
+
+const Search = () => {
+  const [searchParams] = useSearchParams();
+  const query = searchParams.get('q') || '';
+  const [results, setResults] = useState([]);
+  const [loading, setLoading] = useState(true);
+
+  useEffect(() => {
+    const fetchResults = async () => {
+      if (!query.trim()) {
+        setResults([]);
+        setLoading(false);
+        return;
+      }
+      try {
+        setLoading(true);
+        const response = await searchAPI.search(query);
+        setResults(response.data.results || []);
+      } catch (err) {
+        console.error('Error searching:', err);
+      } finally {
+        setLoading(false);
+      }
+    };
+    fetchResults();
+  }, [query]);
+
+  if (loading) {
+    return (
+      <div className="movies-page">
+        <div className="loading-container">
+          <div className="spinner"></div>
+          <p>Searching...</p>
+        </div>
+      </div>
+    );
+  }
+
+  return (
+    <div className="movies-page">
+      <div className="movies-header">
+        <div className="header-content">
+          <h1>Results for "{query}"</h1>
+          <p className="subtitle">{results.length} titles found</p>
+        </div>
+      </div>
+
+      <div className="container">
+        {results.length === 0 ? (
+          <div className="no-results">
+            <p>No titles match your search</p>
+          </div>
+        ) : (
+          <div className="movies-grid">
+            {results.map(item => (
+              <MovieCard
+                key={`${item.content_type}-${item.content_id}`}
+                content={item}
+                type={item.content_type}
+                profileId={localStorage.getItem('profileId')}
+              />
+            ))}
+          </div>
+        )}
+      </div>
+    </div>
+  );
+};
+
+export default Search;
@@ -7,6 +7,7 @@ import './ViewingHistory.css';
 // Viewing History Page - Shows all watched content for the current profile
 const ViewingHistory = () => {
   const [history, setHistory] = useState([]);
+  const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
   const navigate = useNavigate();
 
@@ -45,11 +46,23 @@ const ViewingHistory = () => {
       }
     };
 
+    const fetchStats = async () => {
+      try {
+        const response = await viewingHistoryAPI.getStats(profileId);
+        if (response.data.success) {
+          setStats(response.data.stats);
+        }
+      } catch (error) {
+        console.error('Error fetching viewing stats:', error);
+      }
+    };
+
     if (!profileId) {
       navigate('/profiles');
       return;
     }
     fetchHistory();
+    fetchStats();
   }, [profileId, navigate]);
 
   const handleDelete = async (historyId) => {
@@ -104,6 +117,13 @@ const ViewingHistory = () => {
             ? 'No viewing history yet' 
             : `${history.length} item${history.length !== 1 ? 's' : ''} watched`}
         </p>
+        {stats && stats.views > 0 && (
+          <p className="subtitle">
+            {`${stats.total_minutes} min across ${stats.titles_watched} title${stats.titles_watched !== 1 ? 's' : ''}`}
+            {stats.genres.length > 0 && ` • mostly ${stats.genres[0].name}`}
+            {stats.current_streak > 1 && ` • ${stats.current_streak}-day streak`}
+          </p>
+        )}
       </div>
 
       <div className="container">
@@ -38,6 +38,23 @@ const Watchlist = () => {
     ));
   };
 
+  const handleClearWatchlist = async () => {
+    const profile = JSON.parse(localStorage.getItem('selectedProfile'));
+    if (!profile || !window.confirm('Remove everything from your list?')) return;
+
+    try {
+      // One request and one transaction for the whole list
+      await watchlistAPI.bulk(profile.profile_id, watchlistItems.map(item => ({
+        op: 'remove',
+        content_type: item.content_type,
+        content_id: item.content_id,
+      })));
+      setWatchlistItems([]);
+    } catch (err) {
+      console.error('Error clearing watchlist:', err);
+    }
+  };
+
   const getFilteredItems = () => {
     if (filter === 'movies') {
       return watchlistItems.filter(item => item.movie_id);
@@ -103,6 +120,9 @@ const Watchlist = () => {
               >
                 TV Shows ({watchlistItems.filter(item => item.tv_show_id).length})
               </button>
+              <button className="filter-btn" onClick={handleClearWatchlist}>
+                Clear list
+              </button>
             </div>
             
             <div className="watchlist-grid">
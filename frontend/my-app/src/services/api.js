@@ -38,6 +38,13 @@ api.interceptors.response.use(
   }
 );
 
+// Catalog requests carry the active profile so the server can apply its
+// age and language restrictions
+const profileParams = () => {
+  const profileId = localStorage.getItem('profileId');
+  return profileId ? { params: { profile_id: profileId } } : {};
+};
+
 // Auth APIs
 export const authAPI = {
   signup: (data) => api.post('/user/signup', data),
@@ -61,16 +68,31 @@ export const profileAPI = {
 
 // Movies APIs
 export const moviesAPI = {
-  getAll: () => api.get('/movies/'),
-  getById: (id) => api.get(`/movies/${id}`),
-  getByGenre: (genre) => api.get(`/movies/genre/${genre}`),
+  getAll: () => api.get('/movies/', profileParams()),
+  getById: (id) => api.get(`/movies/${id}`, profileParams()),
+  getMany: (ids) => api.get('/movies/batch', { params: { ...profileParams().params, ids: ids.join(',') } }),
+  getByGenre: (genre) => api.get(`/movies/genre/${genre}`, profileParams()),
+  getSimilar: (id) => api.get(`/movies/${id}/similar`, profileParams()),
 };
 
 // TV Shows APIs
 export const tvShowsAPI = {
-  getAll: () => api.get('/tvshows/'),
-  getById: (id) => api.get(`/tvshows/${id}`),
-  getByGenre: (genre) => api.get(`/tvshows/genre/${genre}`),
+  getAll: () => api.get('/tvshows/', profileParams()),
+  getById: (id) => api.get(`/tvshows/${id}`, profileParams()),
+  getMany: (ids) => api.get('/tvshows/batch', { params: { ...profileParams().params, ids: ids.join(',') } }),
+  getByGenre: (genre) => api.get(`/tvshows/genre/${genre}`, profileParams()),
+  getSimilar: (id) => api.get(`/tvshows/${id}/similar`, profileParams()),
+};
+
+// Search APIs
+export const searchAPI = {
+  search: (q, type) => api.get('/search/', { params: { ...profileParams().params, q, type } }),
+  suggest: (q) => api.get('/search/suggest', { params: { ...profileParams().params, q } }),
+};
+
+// Recommendations API
+export const recommendationsAPI = {
+  getForProfile: (profileId) => api.get(`/recommendations/${profileId}`),
 };
 
 // Genres APIs
@@ -81,7 +103,7 @@ export const genresAPI = {
 
 // Home Page API
 export const homeAPI = {
-  getContent: () => api.get('/home/'),
+  getContent: () => api.get('/home/', profileParams()),
 };
 
 // Watchlist APIs
@@ -89,6 +111,8 @@ export const watchlistAPI = {
   add: (data) => api.post('/watchlist/add', data),
   remove: (data) => api.delete('/watchlist/remove', { data }),
   getAll: (profileId) => api.get(`/watchlist/all/${profileId}`),
+  // operations: [{ op: 'add' | 'remove', content_type, content_id }]
+  bulk: (profileId, operations) => api.post('/watchlist/bulk', { profile_id: profileId, operations }),
 };
 
 // Ratings APIs
@@ -104,6 +128,12 @@ export const viewingHistoryAPI = {
   log: (data) => api.post('/viewing_history/log', data),
   getByProfile: (profileId) => api.get(`/viewing_history/profile/${profileId}`),
   delete: (historyId) => api.delete(`/viewing_history/delete/${historyId}`),
+  // Send every few seconds during playback; only the latest position is kept
+  heartbeat: (data) => api.post('/viewing_history/heartbeat', data),
+  continueWatching: (profileId) => api.get(`/viewing_history/continue/${profileId}`),
+  getStats: (profileId) => api.get(`/viewing_history/stats/${profileId}`),
+  getProgress: (profileId, contentType, contentId) =>
+    api.get(`/viewing_history/progress/${profileId}/${contentType}/${contentId}`),
 };
 
 // Subscriptions APIs
@@ -123,4 +153,20 @@ export const paymentsAPI = {
   getHistory: () => api.get('/payments/history'),
 };
 
+// Media APIs
+export const mediaAPI = {
+  // Returns a stream_url that the <video> element can range-request directly
+  openSession: (filename) => api.post(`/media/session/${filename}`),
+};
+
+// Poster URLs from the local store are server-relative ("/api/posters/...")
+export const assetUrl = (url) =>
+  url && url.startsWith('/') ? API_BASE_URL.replace(/\/api$/, '') + url : url;
+
+// srcSet for a response's `poster` field, or undefined for remote artwork
+export const posterSrcSet = (poster) =>
+  poster && Object.keys(poster.variants || {}).length
+    ? Object.entries(poster.variants).map(([width, url]) => `${assetUrl(url)} ${width}w`).join(', ')
+    : undefined;
+
 export default api;